@@ -0,0 +1,508 @@
+"""稽核資料管理工具
+
+    python admin_cli.py list                                  # 各月份工作表筆數（只讀取 metadata）
+    python admin_cli.py delete 2026年1月 2026年2月 --yes       # 一次刪除多個工作表
+    python admin_cli.py delete --match "2025年*" --dry-run     # 只列出會刪除的工作表
+    python admin_cli.py archive --match "2024年*" --output archive --yes   # 先歸檔為 Parquet 再刪除
+    python admin_cli.py compact                               # 將工作表格線縮小到實際使用範圍
+    python admin_cli.py rotate --yes                          # 將去年以前的月份工作表移到年度歸檔
+    python admin_cli.py import 2019.xlsx 2020.csv             # 匯入歷史資料（中斷後重新執行會續傳）
+    python admin_cli.py report 2026年1月 --output reports      # 月份報表（每個單位一個工作表 + 摘要）
+    python admin_cli.py report --archive archive/2025.parquet  # 由年度歸檔產生各月份報表
+    python admin_cli.py forms 2026年1月 --pdf --incremental    # 各單位稽核表（DOCX / PDF），只重做有變動的單位
+    python admin_cli.py query --start 2025-12-01 --end 2026-02-28 --unit ICU --output icu.csv  # 跨月份查詢
+
+預設連接 Google Sheets（本機 key.json 或 .streamlit/secrets.toml 的服務帳號），
+可用 --backend sqlite / --sqlite-path 改為管理本機 SQLite 儲存。
+刪除類操作需輸入 y 確認；加上 --yes 可於排程中直接執行，非互動環境未加 --yes 時不會刪除。
+"""
+import argparse
+import fnmatch
+import json
+import os
+import sys
+import tomllib
+from datetime import datetime
+
+from columnar import iter_parquet_rows, load_parquet, parquet_row_count, save_rows_parquet, to_sheet_frame
+from excel_report import MonthlyReport, write_monthly_report
+from storage import (KEY_FILE, SPREADSHEET_NAME, GoogleSheetsBackend, SQLiteBackend,
+                     open_backend, open_spreadsheet)
+from importer import DEFAULT_BATCH_ROWS, HistoricalImport
+from quota import QuotaClient
+from schema import DATE_COLUMN, DATE_FORMAT, RECORD_ID_FIELD
+from worksheet_cache import month_partition, parse_month_sheet_name
+
+DEFAULT_SECRETS_PATH = os.path.join(".streamlit", "secrets.toml")
+DEFAULT_ARCHIVE_DIR = "archive"
+DEFAULT_REPORT_DIR = "reports"
+DEFAULT_FORMS_DIR = "forms"
+DEFAULT_QUERY_WORKERS = 4
+
+
+def load_secrets(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def build_backend(args):
+    """依命令列參數與 secrets.toml 的 [storage] 區段建立後端"""
+    secrets = load_secrets(args.secrets)
+    config = dict(secrets.get("storage", {}))
+    if args.backend:
+        config["backend"] = args.backend
+    if args.sqlite_path:
+        config["sqlite_path"] = args.sqlite_path
+    # 大量操作時依配額限速，遇到 429 / 5xx 自動重試
+    quota = QuotaClient(**secrets.get("quota", {}))
+    return open_backend(
+        config,
+        connect=lambda: quota.wrap(open_spreadsheet(secrets.get("gcp_service_account"), args.spreadsheet, args.key_file)),
+    )
+
+
+def select_partitions(backend, names, patterns):
+    """指定名稱與萬用字元（例如 2025年*）選取的分區，依原順序"""
+    existing = backend.list_partitions()
+    missing = [name for name in names if name not in existing]
+    if missing:
+        raise SystemExit(f"❌ 找不到工作表：{', '.join(missing)}")
+    return [
+        title for title in existing
+        if title in names or any(fnmatch.fnmatchcase(title, pattern) for pattern in patterns)
+    ]
+
+
+def select_months(backend, names, patterns):
+    """同 select_partitions；沒有指定名稱與萬用字元時選取所有月份工作表（依年月排序）"""
+    if names or patterns:
+        return select_partitions(backend, names, patterns)
+    months = [(parsed, title) for title in backend.list_partitions()
+              if (parsed := parse_month_sheet_name(title)) is not None]
+    return [title for _, title in sorted(months)]
+
+
+def confirm(message, assume_yes):
+    if assume_yes:
+        return True
+    if not sys.stdin.isatty():
+        print("❌ 非互動環境請加上 --yes 確認")
+        return False
+    return input(f"⚠️  {message} (y/n): ").strip().lower() == "y"
+
+
+def cmd_list(backend, args):
+    info = backend.partition_info()
+    if args.json:
+        print(json.dumps(info, ensure_ascii=False, indent=2))
+        return 0
+    print(f"📊 目前的工作表（{len(info)} 個）：")
+    for idx, (title, size) in enumerate(info.items(), 1):
+        grid = f"，格線 {size['grid_rows']}×{size['grid_cols']}" if size["grid_rows"] is not None else ""
+        print(f"  {idx}. {title} ({size['rows']} 筆資料{grid})")
+    print(f"  合計 {sum(size['rows'] for size in info.values())} 筆")
+    return 0
+
+
+def cmd_delete(backend, args):
+    selected = select_partitions(backend, args.names, args.match)
+    if not selected:
+        print("沒有符合的工作表")
+        return 0
+    print("將刪除：" + "、".join(selected))
+    if args.dry_run:
+        return 0
+    if not confirm(f"確定要刪除 {len(selected)} 個工作表嗎？", args.yes):
+        print("❌ 已取消")
+        return 1
+    deleted = backend.delete_partitions(selected)
+    print(f"✅ 已刪除 {len(deleted)} 個工作表")
+    return 0
+
+
+def archive_partitions(backend, names, output_dir, overwrite=False):
+    """將分區歸檔為 Parquet 並驗證筆數，回傳 {名稱: (檔案路徑, 筆數)}（只含驗證成功者）"""
+    os.makedirs(output_dir, exist_ok=True)
+    archived = {}
+    for title, (headers, rows) in backend.export_partitions(names).items():
+        path = os.path.join(output_dir, f"{title}.parquet")
+        if os.path.exists(path) and not overwrite:
+            print(f"⚠️  {path} 已存在，略過「{title}」（加上 --overwrite 覆寫）")
+            continue
+        if not headers:
+            print(f"⚠️  「{title}」沒有標題列，略過")
+            continue
+        # 先寫入暫存檔，確認筆數後才取代正式檔案
+        tmp_path = path + ".tmp"
+        count = save_rows_parquet(headers, rows, tmp_path)
+        if parquet_row_count(tmp_path) != len(rows):
+            os.remove(tmp_path)
+            print(f"❌ 「{title}」歸檔筆數不符，略過")
+            continue
+        os.replace(tmp_path, path)
+        archived[title] = (path, count)
+        print(f"  📦 {title} -> {path}（{count} 筆）")
+    return archived
+
+
+def cmd_archive(backend, args):
+    selected = select_partitions(backend, args.names, args.match)
+    if not selected:
+        print("沒有符合的工作表")
+        return 0
+    action = "歸檔" if args.keep else "歸檔後刪除"
+    print(f"將{action}：" + "、".join(selected))
+    if args.dry_run:
+        return 0
+    if not args.keep and not confirm(f"確定要{action} {len(selected)} 個工作表嗎？", args.yes):
+        print("❌ 已取消")
+        return 1
+    archived = archive_partitions(backend, selected, args.output, args.overwrite)
+    if not args.keep and archived:
+        deleted = backend.delete_partitions(list(archived))
+        print(f"✅ 已歸檔並刪除 {len(deleted)} 個工作表")
+    else:
+        print(f"✅ 已歸檔 {len(archived)} 個工作表")
+    return 0 if len(archived) == len(selected) else 1
+
+
+def cmd_compact(backend, args):
+    names = select_partitions(backend, args.names, args.match) if args.names or args.match else None
+    result = backend.compact(names)
+    if not result:
+        print("✅ 沒有需要整理的空間")
+        return 0
+    for name, (before, after) in result.items():
+        print(f"  🧹 {name}: {before:,} -> {after:,}")
+    print(f"✅ 已整理 {len(result)} 項")
+    return 0
+
+
+def closed_year_partitions(backend, keep_years, current_year):
+    """保留最近 keep_years 年（含今年），回傳 {年度: [月份工作表…]}"""
+    years = {}
+    for title in backend.list_partitions():
+        parsed = parse_month_sheet_name(title)
+        if parsed is not None and parsed[0] <= current_year - keep_years:
+            years.setdefault(parsed[0], []).append(title)
+    return dict(sorted(years.items()))
+
+
+def year_archive_path(output_dir, year):
+    return os.path.join(output_dir, f"{year}.parquet")
+
+
+def rotation_marker_path(archive_path):
+    """已寫入歸檔、但工作表尚未刪除的月份 {工作表: 已歸檔筆數}"""
+    return archive_path + ".rotating.json"
+
+
+def rotate_year(backend, year, titles, output_dir):
+    """將一個年度的月份工作表合併寫入年度歸檔（已有歸檔時合併），驗證筆數後刪除工作表
+
+    歸檔寫入後、刪除工作表前先記下各工作表已歸檔的筆數；刪除失敗（配額、網路）後重新執行時，
+    這些工作表只合併之後新增的列，有紀錄ID的列也不會重複加入。
+    """
+    exported = backend.export_partitions(titles)
+    path = year_archive_path(output_dir, year)
+    marker_path = rotation_marker_path(path)
+    archived = {}
+    if os.path.exists(marker_path) and os.path.exists(path):
+        with open(marker_path, encoding="utf-8") as f:
+            archived = json.load(f)
+
+    # 各月份欄位可能不同（例如較新的工作表才有紀錄ID），以聯集為準
+    parts = []
+    archived_ids = set()
+    if os.path.exists(path):
+        existing = to_sheet_frame(load_parquet(path)).fillna("")
+        parts.append((list(existing.columns), existing.values.tolist()))
+        if RECORD_ID_FIELD in existing:
+            archived_ids = set(existing[RECORD_ID_FIELD]) - {""}
+    moved = 0
+    for title, (part_headers, part_rows) in exported.items():
+        part_rows = part_rows[archived.get(title, 0):]
+        if archived_ids and RECORD_ID_FIELD in part_headers:
+            id_index = part_headers.index(RECORD_ID_FIELD)
+            part_rows = [row for row in part_rows
+                         if not (id_index < len(row) and row[id_index] in archived_ids)]
+        parts.append((part_headers, part_rows))
+        moved += len(part_rows)
+    headers = []
+    for part_headers, _ in parts:
+        for header in part_headers:
+            if header and header not in headers:
+                headers.append(header)
+    rows = []
+    for part_headers, part_rows in parts:
+        index = [headers.index(h) if h in headers else None for h in part_headers]
+        for row in part_rows:
+            merged = [""] * len(headers)
+            for i, value in zip(index, row):
+                if i is not None:
+                    merged[i] = value
+            rows.append(merged)
+
+    os.makedirs(output_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+    save_rows_parquet(headers, rows, tmp_path)
+    if parquet_row_count(tmp_path) != len(rows):
+        os.remove(tmp_path)
+        raise RuntimeError(f"{year} 年歸檔筆數不符")
+    os.replace(tmp_path, path)
+    with open(marker_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({title: len(part_rows) for title, (_, part_rows) in exported.items()}, f, ensure_ascii=False)
+    os.replace(marker_path + ".tmp", marker_path)
+    backend.delete_partitions(list(exported))
+    os.remove(marker_path)
+    return path, moved, len(rows)
+
+
+def cmd_rotate(backend, args):
+    years = closed_year_partitions(backend, args.keep_years, args.current_year)
+    if not years:
+        print("沒有需要輪替的年度")
+        return 0
+    for year, titles in years.items():
+        print(f"{year} 年：" + "、".join(titles))
+    if args.dry_run:
+        return 0
+    if not confirm(f"確定要將 {len(years)} 個年度移到歸檔並刪除工作表嗎？", args.yes):
+        print("❌ 已取消")
+        return 1
+    for year, titles in years.items():
+        path, moved, total = rotate_year(backend, year, titles, args.output)
+        print(f"  📦 {year} 年 -> {path}（移入 {moved} 筆，歸檔共 {total} 筆）")
+    print(f"✅ 已輪替 {len(years)} 個年度")
+    return 0
+
+
+def print_import_progress(job):
+    checkpoint = job.checkpoint
+    print(f"\r  📥 已處理 {checkpoint.rows_done:,} 列，本次寫入 {job.rows_written:,} 筆"
+          f"（{job.rows_per_second:,.0f} 筆/秒）", end="", flush=True)
+
+
+def cmd_import(backend, args):
+    if args.checkpoint and len(args.sources) > 1:
+        raise SystemExit("❌ 指定 --checkpoint 時一次只能匯入一個檔案")
+    failed = 0
+    for source in args.sources:
+        try:
+            job = HistoricalImport(backend, source, checkpoint_path=args.checkpoint, batch_rows=args.batch_rows,
+                                   rejects_path=args.rejects, restart=args.restart)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            failed += 1
+            continue
+        checkpoint = job.checkpoint
+        if checkpoint.finished:
+            print(f"✅ {source} 已匯入完成（{checkpoint.rows_written:,} 筆），加上 --restart 可重新匯入")
+            continue
+        if job.resumed:
+            print(f"{source}：從第 {checkpoint.rows_done + 1:,} 列繼續匯入")
+        else:
+            print(f"{source}：開始匯入")
+        job.run(progress=print_import_progress)
+        print()
+        for name, count in sorted(checkpoint.partitions.items(), key=lambda item: parse_month_sheet_name(item[0])):
+            print(f"  {name}: {count:,} 筆")
+        if job.rows_skipped_existing:
+            print(f"  略過已存在的 {job.rows_skipped_existing:,} 筆（上次中斷前已寫入）")
+        if checkpoint.rows_rejected:
+            where = f"，明細見 {args.rejects}" if args.rejects else "（加上 --rejects 輸出明細）"
+            print(f"  ⚠️  {checkpoint.rows_rejected:,} 列未通過驗證{where}")
+        print(f"✅ 共寫入 {checkpoint.rows_written:,} 筆，累計 {checkpoint.elapsed:,.1f} 秒"
+              f"（本次 {job.rows_per_second:,.0f} 筆/秒，{job.append_calls} 次寫入）")
+    return 1 if failed else 0
+
+
+def report_path(output_dir, title):
+    return os.path.join(output_dir, f"{title}_手部衛生稽核報表.xlsx")
+
+
+def archive_reports(path, output_dir):
+    """逐批讀取年度歸檔，依月份分別寫入報表；回傳 {月份: (檔案路徑, 筆數)}"""
+    reports = {}
+    for headers, rows in iter_parquet_rows(path):
+        date_index, month_index = headers.index(DATE_COLUMN), headers.index("稽核月份")
+        for row in rows:
+            title = month_partition(row[date_index], row[month_index])
+            report = reports.get(title)
+            if report is None:
+                report = reports[title] = MonthlyReport(report_path(output_dir, title), title, headers)
+            report.add(row)
+    ordered = sorted(reports.items(), key=lambda item: parse_month_sheet_name(item[0]) or (0, 0))
+    return {title: (report.path, report.save()) for title, report in ordered}
+
+
+def cmd_report(backend, args):
+    os.makedirs(args.output, exist_ok=True)
+    written = {}
+    # 只指定 --archive 時不讀取工作表；都沒有指定時產生所有月份工作表的報表
+    if args.names or args.match or not args.archive:
+        for name in select_months(backend, args.names, args.match):
+            # 逐個月份讀取，寫完即釋放
+            headers = backend.headers(name)
+            if not headers:
+                continue
+            path = report_path(args.output, name)
+            written[name] = (path, write_monthly_report(path, name, headers, backend.read_rows(name)))
+    for path in args.archive:
+        written.update(archive_reports(path, args.output))
+    if not written:
+        print("沒有符合的資料")
+        return 0
+    for title, (path, count) in written.items():
+        print(f"  📄 {title} -> {path}（{count:,} 筆）")
+    print(f"✅ 已產生 {len(written)} 份報表")
+    return 0
+
+
+def cmd_query(backend, args):
+    from query import query_audits
+
+    try:
+        df = query_audits(backend, args.start, args.end or datetime.now().strftime(DATE_FORMAT),
+                          units=args.unit, staff_categories=args.staff, moments=args.moment, workers=args.workers)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    if df.empty:
+        print("沒有符合的資料")
+        return 0
+    for month, count in df.groupby("稽核月份", observed=True, sort=False).size().items():
+        print(f"  {month}: {count:,} 筆")
+    if args.output:
+        df.to_csv(args.output, index=False, date_format=DATE_FORMAT, encoding="utf-8-sig")
+        print(f"✅ 已寫入 {len(df):,} 筆 -> {args.output}")
+    else:
+        print(f"✅ 共 {len(df):,} 筆")
+    return 0
+
+
+def partition_frame(backend, name):
+    """分區資料轉為 DataFrame（全部為文字）"""
+    import pandas as pd
+
+    headers = backend.headers(name)
+    width = len(headers)
+    rows = [row[:width] + [""] * (width - len(row)) for row in backend.read_rows(name)]
+    return pd.DataFrame(rows, columns=headers, dtype=object)
+
+
+def cmd_forms(backend, args):
+    try:
+        import docx  # noqa: F401  python-docx
+    except ImportError:
+        raise SystemExit("❌ 需要 python-docx：pip install python-docx")
+    from form_report import render_month_forms
+
+    selected = select_months(backend, args.names, args.match)
+    if not selected:
+        print("沒有符合的工作表")
+        return 0
+    for name in selected:
+        output_dir = os.path.join(args.output, name)
+        try:
+            result = render_month_forms(partition_frame(backend, name), name, output_dir, template=args.template,
+                                        workers=args.workers, pdf=args.pdf, incremental=args.incremental)
+        except RuntimeError as e:
+            raise SystemExit(f"❌ {e}")
+        skipped = f"，{len(result['skipped'])} 個單位沒有變動" if result["skipped"] else ""
+        print(f"  📝 {name}: 產生 {len(result['rendered'])} 個單位的稽核表{skipped} -> {output_dir}")
+    print(f"✅ 已處理 {len(selected)} 個月份")
+    return 0
+
+
+def add_selection_arguments(parser):
+    parser.add_argument("names", nargs="*", help="工作表名稱，例如 2026年1月")
+    parser.add_argument("--match", action="append", default=[], metavar="PATTERN",
+                        help="以萬用字元選取，例如 \"2025年*\"（可重複指定）")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="稽核資料管理工具")
+    parser.add_argument("--backend", choices=[GoogleSheetsBackend.name, SQLiteBackend.name],
+                        help="儲存後端（預設依 secrets.toml 的 [storage] 區段，未設定時為 sheets）")
+    parser.add_argument("--sqlite-path", help="SQLite 資料庫檔路徑")
+    parser.add_argument("--spreadsheet", default=SPREADSHEET_NAME, help="試算表名稱")
+    parser.add_argument("--key-file", default=KEY_FILE, help="服務帳號金鑰檔")
+    parser.add_argument("--secrets", default=DEFAULT_SECRETS_PATH, help="secrets.toml 路徑")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="列出各工作表筆數")
+    list_parser.add_argument("--json", action="store_true", help="以 JSON 輸出")
+    list_parser.set_defaults(func=cmd_list)
+
+    delete_parser = commands.add_parser("delete", help="刪除工作表")
+    add_selection_arguments(delete_parser)
+    delete_parser.add_argument("--yes", "-y", action="store_true", help="不詢問直接執行")
+    delete_parser.add_argument("--dry-run", action="store_true", help="只列出會刪除的工作表")
+    delete_parser.set_defaults(func=cmd_delete)
+
+    archive_parser = commands.add_parser("archive", help="歸檔為 Parquet 後刪除工作表")
+    add_selection_arguments(archive_parser)
+    archive_parser.add_argument("--output", default=DEFAULT_ARCHIVE_DIR, help="歸檔資料夾")
+    archive_parser.add_argument("--keep", action="store_true", help="歸檔後保留工作表")
+    archive_parser.add_argument("--overwrite", action="store_true", help="覆寫已存在的歸檔檔案")
+    archive_parser.add_argument("--yes", "-y", action="store_true", help="不詢問直接執行")
+    archive_parser.add_argument("--dry-run", action="store_true", help="只列出會歸檔的工作表")
+    archive_parser.set_defaults(func=cmd_archive)
+
+    compact_parser = commands.add_parser("compact", help="回收未使用的空間")
+    add_selection_arguments(compact_parser)
+    compact_parser.set_defaults(func=cmd_compact)
+
+    rotate_parser = commands.add_parser("rotate", help="將已結束年度的月份工作表移到年度 Parquet 歸檔")
+    rotate_parser.add_argument("--keep-years", type=int, default=1, help="保留最近幾年（含今年），預設 1")
+    rotate_parser.add_argument("--current-year", type=int, default=datetime.now().year, help=argparse.SUPPRESS)
+    rotate_parser.add_argument("--output", default=DEFAULT_ARCHIVE_DIR, help="歸檔資料夾")
+    rotate_parser.add_argument("--yes", "-y", action="store_true", help="不詢問直接執行")
+    rotate_parser.add_argument("--dry-run", action="store_true", help="只列出會輪替的工作表")
+    rotate_parser.set_defaults(func=cmd_rotate)
+
+    import_parser = commands.add_parser("import", help="匯入歷史 Excel / CSV 資料到各月份工作表")
+    import_parser.add_argument("sources", nargs="+", help="來源檔（.xlsx 或 .csv，欄位同工作表）")
+    import_parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS,
+                               help=f"每批處理列數（每個工作表一次寫入），預設 {DEFAULT_BATCH_ROWS}")
+    import_parser.add_argument("--checkpoint", help="進度檔路徑，預設為「來源檔.import.json」")
+    import_parser.add_argument("--rejects", help="未通過驗證的列寫入此 CSV")
+    import_parser.add_argument("--restart", action="store_true", help="忽略進度檔，從頭匯入")
+    import_parser.set_defaults(func=cmd_import)
+
+    report_parser = commands.add_parser(
+        "report", help="產生月份 Excel 報表（每個單位一個工作表與摘要）；未指定工作表時產生所有月份")
+    add_selection_arguments(report_parser)
+    report_parser.add_argument("--archive", action="append", default=[], metavar="PATH",
+                               help="由年度 Parquet 歸檔產生報表（可重複指定）")
+    report_parser.add_argument("--output", default=DEFAULT_REPORT_DIR, help="報表資料夾")
+    report_parser.set_defaults(func=cmd_report)
+
+    forms_parser = commands.add_parser(
+        "forms", help="依稽核表範本產生各單位的月份稽核表（DOCX / PDF）；未指定工作表時處理所有月份")
+    add_selection_arguments(forms_parser)
+    forms_parser.add_argument("--output", default=DEFAULT_FORMS_DIR, help="輸出資料夾（每個月份一個子資料夾）")
+    forms_parser.add_argument("--template", default=None, help="稽核表範本（.docx），預設為專案內附的範本")
+    forms_parser.add_argument("--pdf", action="store_true", help="另以 LibreOffice 轉為 PDF")
+    forms_parser.add_argument("--workers", type=int, default=None, help="平行產生的程序數，預設為 CPU 數")
+    forms_parser.add_argument("--incremental", action="store_true", help="只重新產生資料有變動的單位")
+    forms_parser.set_defaults(func=cmd_forms)
+
+    query_parser = commands.add_parser("query", help="依日期範圍與條件查詢多個月份的資料")
+    query_parser.add_argument("--start", required=True, help="開始日期（YYYY-MM-DD）")
+    query_parser.add_argument("--end", help="結束日期（YYYY-MM-DD），預設為今天")
+    query_parser.add_argument("--unit", action="append", help="稽核者單位（可重複指定）")
+    query_parser.add_argument("--staff", action="append", help="受稽核人員類別（可重複指定）")
+    query_parser.add_argument("--moment", action="append", help="手部衛生時機（可重複指定）")
+    query_parser.add_argument("--workers", type=int, default=DEFAULT_QUERY_WORKERS, help="同時讀取的工作表數")
+    query_parser.add_argument("--output", help="結果寫入此 CSV；未指定時只列出各月份筆數")
+    query_parser.set_defaults(func=cmd_query)
+
+    args = parser.parse_args(argv)
+    return args.func(build_backend(args), args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""手部衛生遵從率／正確率統計
+
+以類別欄位的整數代碼一次 bincount 計算任意分組的觀察次數、遵從次數與正確次數，
+不需對每個月份或單位重複篩選 DataFrame。
+
+依稽核月份分組時一併依稽核年份（由稽核日期取得）分組，跨年度資料的同名月份不會合併。
+"""
+import numpy as np
+import pandas as pd
+
+from schema import NO_HYGIENE, CORRECT, MONTH_LABELS, DATE_COLUMN, DATE_FORMAT
+
+MONTH_COLUMN = "稽核月份"
+# 由稽核日期衍生的欄位，資料中沒有時於分組時計算
+YEAR_COLUMN = "稽核年份"
+
+# 可用於分組的欄位
+GROUP_COLUMNS = [YEAR_COLUMN, MONTH_COLUMN, "稽核者單位", "受稽核人員類別", "手部衛生時機"]
+
+# 結果欄位
+COUNT = "觀察次數"
+COMPLIANT = "遵從次數"
+CORRECT_COUNT = "正確次數"
+COMPLIANCE_RATE = "遵從率"
+CORRECTNESS_RATE = "正確率"
+
+
+def audit_years(df):
+    """由稽核日期取得稽核年份（pd.Categorical，無法解析的日期為缺值）
+
+    只解析不重複的日期值（一年最多數百個），再依代碼展開。
+    """
+    dates = df[DATE_COLUMN]
+    if isinstance(dates.dtype, pd.CategoricalDtype):
+        codes, uniques = dates.cat.codes.to_numpy(), pd.Series(dates.cat.categories)
+    else:
+        codes, uniques = pd.factorize(dates)
+        uniques = pd.Series(uniques)
+    unique_years = _years(uniques)
+    known = ~np.isnan(unique_years)
+    categories = np.unique(unique_years[known]).astype(np.int64)
+    unique_codes = np.full(len(unique_years), -1, dtype=np.int64)
+    unique_codes[known] = np.searchsorted(categories, unique_years[known])
+    # 代碼 -1（缺值）取到尾端補上的 -1
+    year_codes = np.append(unique_codes, -1)[codes]
+    return pd.Categorical.from_codes(year_codes, categories=categories, ordered=True)
+
+
+def _years(dates):
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format=DATE_FORMAT, errors="coerce")
+    return dates.dt.year.to_numpy(dtype=float, na_value=np.nan)
+
+
+def _group_columns(df, by):
+    """依月份分組時在前面加上年份"""
+    by = list(by)
+    if MONTH_COLUMN in by and YEAR_COLUMN not in by and (YEAR_COLUMN in df or DATE_COLUMN in df):
+        by.insert(by.index(MONTH_COLUMN), YEAR_COLUMN)
+    return by
+
+
+def _as_categorical(df, column):
+    """轉為 pd.Categorical；稽核月份依 1~12 月排序，稽核年份由稽核日期計算"""
+    if column == YEAR_COLUMN and column not in df:
+        return audit_years(df)
+    series = df[column]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.array
+    if column == MONTH_COLUMN:
+        return pd.Categorical(series, categories=MONTH_LABELS, ordered=True)
+    return pd.Categorical(series)
+
+
+def outcome_flags(df):
+    """回傳 (是否遵從, 是否正確) 兩個布林陣列"""
+    compliant = (df["手部衛生方式"] != NO_HYGIENE).to_numpy()
+    correct = (df["手部衛生正確性"] == CORRECT).to_numpy() & compliant
+    return compliant, correct
+
+
+def compliance_counts(df, by=()):
+    """依 by 欄位分組計算觀察次數、遵從次數、正確次數
+
+    by 可以是 GROUP_COLUMNS 中任意欄位的組合；空的 by 代表全體合計。
+    含稽核月份時自動加上稽核年份（稽核日期無法解析的列不計入）。
+    只輸出至少有一筆資料的組合。
+    """
+    by = _group_columns(df, by)
+    compliant, correct = outcome_flags(df)
+
+    if not by:
+        index = pd.RangeIndex(1)
+        return pd.DataFrame(
+            {COUNT: [len(df)], COMPLIANT: [int(compliant.sum())], CORRECT_COUNT: [int(correct.sum())]},
+            index=index,
+        )
+
+    codes = []
+    categories = []
+    valid = np.ones(len(df), dtype=bool)
+    for column in by:
+        categorical = _as_categorical(df, column)
+        column_codes = np.asarray(categorical.codes)
+        valid &= column_codes >= 0
+        codes.append(column_codes)
+        categories.append(categorical.categories)
+
+    shape = tuple(len(c) for c in categories)
+    size = int(np.prod(shape))
+    codes = [c[valid] for c in codes]
+    flat = np.ravel_multi_index(codes, shape) if len(codes) > 1 else codes[0].astype(np.intp)
+
+    n = np.bincount(flat, minlength=size)
+    n_compliant = np.bincount(flat, weights=compliant[valid], minlength=size)
+    n_correct = np.bincount(flat, weights=correct[valid], minlength=size)
+
+    present = np.flatnonzero(n)
+    positions = np.unravel_index(present, shape)
+    if len(by) == 1:
+        index = pd.CategoricalIndex(
+            pd.Categorical.from_codes(positions[0], categories[0]), name=by[0]
+        )
+    else:
+        index = pd.MultiIndex(levels=categories, codes=list(positions), names=by)
+
+    return pd.DataFrame(
+        {
+            COUNT: n[present],
+            COMPLIANT: n_compliant[present].astype(np.int64),
+            CORRECT_COUNT: n_correct[present].astype(np.int64),
+        },
+        index=index,
+    )
+
+
+def with_rates(counts):
+    """在計數表加上遵從率與正確率（0~1）"""
+    result = counts.copy()
+    result[COMPLIANCE_RATE] = result[COMPLIANT] / result[COUNT]
+    result[CORRECTNESS_RATE] = result[CORRECT_COUNT] / result[COMPLIANT].where(result[COMPLIANT] > 0)
+    return result
+
+
+def compliance_summary(df, by=()):
+    """分組計數加上遵從率、正確率"""
+    return with_rates(compliance_counts(df, by))
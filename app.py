@@ -1,29 +1,20 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
-import gspread
-
-# Google Sheets 設定
-SPREADSHEET_NAME = "hand-hygiene-new"
-
-# 初始化 Google Sheets 連接
-@st.cache_resource
-def init_google_sheets():
-    """初始化 Google Sheets 連接"""
-    try:
-        # 嘗試使用本地 key.json（本地開發環境）
-        import os
-        if os.path.exists('key.json'):
-            gc = gspread.service_account(filename='key.json')
-        else:
-            # 使用 Streamlit secrets（雲端環境）
-            gc = gspread.service_account_from_dict(st.secrets["gcp_service_account"])
-        
-        sh = gc.open(SPREADSHEET_NAME)
-        return sh
-    except Exception as e:
-        st.error(f"無法連接到 Google Sheets: {str(e)}")
-        return None
+import metrics
+from sheets_writer import (SheetsWriteBehind, DEFAULT_BATCH_SIZE, DEFAULT_FLUSH_INTERVAL,
+                           STATUS_PENDING, STATUS_CONFIRMED, STATUS_FAILED)
+from worksheet_cache import month_partition
+from connections import get_storage_backend, load_secrets_section, start_connection_monitor, start_metrics_exporter
+from journal import ObservationJournal, DEFAULT_JOURNAL_PATH, RECORD_ID_FIELD, new_record_id
+from session_stats import SessionStats
+from observation import ObservationArray
+from reasons import reason_options, OTHER_LABEL as REASON_OTHER_LABEL, SEPARATOR as REASON_SEPARATOR
+from batch_entry import (GRID_COLUMNS, STAFF_CATEGORY_COLUMN, STAFF_UNIT_COLUMN, MOMENT_COLUMN, METHOD_COLUMN,
+                         CORRECTNESS_COLUMN, REASON_COLUMN, empty_grid, build_records)
+from reasons import REASONS
+from schema import (MONTH_LABELS, DEPARTMENTS, DEPARTMENT_OPTIONS, STAFF_CATEGORIES, STAFF_CATEGORY_OPTIONS,
+                    HYGIENE_MOMENTS, HYGIENE_METHODS, ASSESSED_VALUES, NO_HYGIENE, INCORRECT, NOT_ASSESSED,
+                    OTHER_OPTION, NONE_TEXT, DATE_COLUMN, DATE_FORMAT, TIME_FORMAT, validate_record)
 
 def check_login():
     """檢查使用者登入狀態"""
@@ -45,33 +36,152 @@ def check_login():
         return False
     return True
 
+def load_write_behind_config():
+    """讀取 secrets.toml 的 [write_behind] 區段"""
+    return load_secrets_section("write_behind")
+
+@st.cache_resource
+def get_sheets_writer():
+    """建立跨 session 共用的批次寫入器
+
+    記錄先寫入本機日誌，再由背景執行緒同步到儲存後端。
+    可於 secrets.toml 的 [write_behind] 區段設定：
+    batch_size（筆）、flush_interval（秒）、journal_path（日誌檔路徑）
+    """
+    config = load_write_behind_config()
+    journal = ObservationJournal(config.get("journal_path", DEFAULT_JOURNAL_PATH))
+    writer = SheetsWriteBehind(
+        get_storage_backend(),
+        journal,
+        batch_size=config.get("batch_size", DEFAULT_BATCH_SIZE),
+        flush_interval=config.get("flush_interval", DEFAULT_FLUSH_INTERVAL),
+    )
+    metrics.register_collector("writer", writer.stats)
+    return writer
+
+@metrics.timed("save_record")
 def save_to_google_sheets(record, audit_month):
-    """將記錄保存到 Google Sheets"""
+    """將記錄寫入本機日誌，由背景執行緒同步到儲存後端"""
     try:
-        spreadsheet = init_google_sheets()
-        if spreadsheet is None:
-            return False
-        
-        # 根據稽核月份生成工作表名稱，例如：2026年1月
-        from datetime import datetime
-        current_year = datetime.now().year
-        sheet_name = f"{current_year}年{audit_month}"
-        
-        try:
-            worksheet = spreadsheet.worksheet(sheet_name)
-        except:
-            # 工作表不存在，創建新的
-            worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=1000, cols=20)
-            headers = list(record.keys())
-            worksheet.append_row(headers)
+        # 根據稽核日期與稽核月份生成工作表名稱，例如：2026年1月（1 月補登的 12 月稽核屬於前一年）
+        sheet_name = month_partition(record[DATE_COLUMN], audit_month)
         
-        values = list(record.values())
-        worksheet.append_row(values)
+        get_sheets_writer().submit(record, sheet_name)
         return True
     except Exception as e:
         st.error(f"保存失敗: {str(e)}")
         return False
 
+# 提交狀態顯示文字
+SYNC_STATUS_LABELS = {
+    STATUS_PENDING: "⏳ 同步中",
+    STATUS_CONFIRMED: "☁️ 已同步",
+    STATUS_FAILED: "⚠️ 重試中",
+}
+
+# 觀察輸入方式
+SINGLE_ENTRY = "單筆觀察"
+BATCH_ENTRY = "批次表格"
+ENTRY_MODES = [SINGLE_ENTRY, BATCH_ENTRY]
+
+@metrics.timed("save_batch")
+def save_batch_to_google_sheets(records, audit_month):
+    """將整批記錄寫入本機日誌，背景執行緒以一次批次寫入同步到儲存後端"""
+    try:
+        # 同一批記錄的稽核日期相同
+        sheet_name = month_partition(records[0][DATE_COLUMN], audit_month)
+        get_sheets_writer().submit_many(records, sheet_name)
+        return True
+    except Exception as e:
+        st.error(f"保存失敗: {str(e)}")
+        return False
+
+def grid_options(options, current):
+    """表格下拉選項；基本資料填的是「其他」註明文字時一併列入"""
+    options = list(options)
+    if current and current not in options:
+        options.append(current)
+    return options
+
+def reset_batch_grid():
+    """換一份新的輸入表格（人員類別與單位預設為目前的基本資料）"""
+    st.session_state.batch_grid = empty_grid(st.session_state.staff_category, st.session_state.staff_unit)
+    st.session_state.batch_grid_version += 1
+    st.session_state.batch_record_ids = []
+
+def batch_record_ids(count):
+    """表格各列的紀錄ID；送出成功前不變，重複送出時由日誌去除重複"""
+    ids = st.session_state.batch_record_ids
+    while len(ids) < count:
+        ids.append(new_record_id())
+    return ids
+
+def render_batch_grid():
+    """批次輸入表格，回傳編輯後的 DataFrame"""
+    if 'batch_grid' not in st.session_state:
+        reset_batch_grid()
+    saved = st.session_state.pop("batch_saved", None)
+    if saved:
+        st.toast(f"✅ {saved} 筆觀察記錄已保存，正在同步到雲端")
+    st.caption("每列一次觀察；未選時機與執行方式的列不會送出。沒有洗手時正確性可留白。")
+    return st.data_editor(
+        st.session_state.batch_grid,
+        key=f"batch_grid_{st.session_state.batch_grid_version}",
+        num_rows="dynamic",
+        use_container_width=True,
+        hide_index=True,
+        column_order=GRID_COLUMNS,
+        column_config={
+            STAFF_CATEGORY_COLUMN: st.column_config.SelectboxColumn(
+                options=grid_options(STAFF_CATEGORIES, st.session_state.staff_category), required=True),
+            STAFF_UNIT_COLUMN: st.column_config.SelectboxColumn(
+                options=grid_options(DEPARTMENTS, st.session_state.staff_unit), required=True),
+            MOMENT_COLUMN: st.column_config.SelectboxColumn(options=list(HYGIENE_MOMENTS)),
+            METHOD_COLUMN: st.column_config.SelectboxColumn(options=list(HYGIENE_METHODS)),
+            CORRECTNESS_COLUMN: st.column_config.SelectboxColumn(options=list(ASSESSED_VALUES)),
+            REASON_COLUMN: st.column_config.TextColumn(
+                help="不正確時填寫，多個原因以逗號分隔：" + "、".join(REASONS)),
+        },
+    )
+
+def submit_batch(grid):
+    """整個表格一起驗證，全部通過才一次送出"""
+    now = datetime.now()
+    base = {
+        "登入者Email": st.session_state.user_email,
+        "稽核日期": now.strftime(DATE_FORMAT),
+        "稽核時間": now.strftime(TIME_FORMAT),
+        "稽核月份": st.session_state.audit_month,
+        "稽核者單位": st.session_state.department,
+        "稽核人員": st.session_state.auditor,
+    }
+    rows = grid.to_dict("records")
+    records, errors = build_records(rows, base, batch_record_ids(len(rows)))
+    if errors:
+        st.error("  \n".join(errors))
+    elif not records:
+        st.warning("表格中沒有觀察記錄")
+    elif save_batch_to_google_sheets(records, st.session_state.audit_month):
+        for record in records:
+            st.session_state.current_observations.append_record(record)
+            st.session_state.session_stats.add(record)
+        reset_batch_grid()
+        st.session_state.batch_saved = len(records)
+        st.rerun()
+    else:
+        st.error("⚠️ 保存失敗，請檢查網路連接")
+
+@st.fragment(run_every=2)
+def render_sync_status():
+    """提交狀態列：定時查詢尚未確認的記錄，不重新執行整個頁面"""
+    stats = st.session_state.session_stats
+    writer = get_sheets_writer()
+    if stats.unconfirmed:
+        stats.update_status(writer.sync_status(stats.unconfirmed))
+    st.caption(" | ".join(f"{SYNC_STATUS_LABELS[status]} {count}" for status, count in stats.status_summary()))
+    if stats.unconfirmed and writer.last_error:
+        st.caption(f"⚠️ 同步暫時失敗，將自動重試：{writer.last_error}")
+
 # 設置頁面
 st.set_page_config(
     page_title="手部衛生稽核系統",
@@ -79,8 +189,17 @@ st.set_page_config(
     layout="centered"
 )
 
+# 在背景預先建立 Google Sheets 連線（每個伺服器程序只啟動一次），使用者登入時不需等待
+start_connection_monitor()
+start_metrics_exporter()
+
+# 逐段記錄本次執行各區塊的耗時
+lap = metrics.stopwatch("app_section", "app_rerun")
+
 # 檢查登入
-if not check_login():
+logged_in = check_login()
+lap("login")
+if not logged_in:
     st.stop()
 
 # 初始化 session state
@@ -89,11 +208,20 @@ if 'audit_month' not in st.session_state:
 if 'auditor' not in st.session_state:
     st.session_state.auditor = ""
 if 'department' not in st.session_state:
-    st.session_state.department = "ER"
+    st.session_state.department = DEPARTMENTS[0]
 if 'staff_category' not in st.session_state:
-    st.session_state.staff_category = "護理師"
+    st.session_state.staff_category = STAFF_CATEGORIES[0]
 if 'current_observations' not in st.session_state:
-    st.session_state.current_observations = []
+    # 以代碼逐欄保存，避免每筆記錄保留 12 個長字串
+    st.session_state.current_observations = ObservationArray()
+if 'session_stats' not in st.session_state:
+    # 本次稽核的累計統計與顯示表格（含各記錄的提交狀態）
+    st.session_state.session_stats = SessionStats(SYNC_STATUS_LABELS)
+if 'record_id' not in st.session_state:
+    # 此次觀察的唯一編號，重複提交時用於去除重複
+    st.session_state.record_id = new_record_id()
+if 'batch_grid_version' not in st.session_state:
+    st.session_state.batch_grid_version = 0
 
 # 標題
 col_title, col_user = st.columns([3, 1])
@@ -115,9 +243,9 @@ col1, col2, col3 = st.columns(3)
 
 with col1:
     # 限制月份選擇：只能選擇當前月或之前的月份
-    current_month = datetime.now().month
-    all_months = ["1月", "2月", "3月", "4月", "5月", "6月", "7月", "8月", "9月", "10月", "11月", "12月"]
-    available_months = all_months[:current_month]  # 只顯示到當前月
+    today = datetime.now().date()
+    current_month = today.month
+    available_months = MONTH_LABELS[:current_month]  # 只顯示到當前月
     
     default_index = 0
     if st.session_state.audit_month and st.session_state.audit_month in available_months:
@@ -127,24 +255,21 @@ with col1:
         "📅 稽核列計月份",
         available_months,
         index=default_index,
+        format_func=lambda month: month_partition(today, month),
         key="audit_month_select",
         help="只能選擇當前月份或之前的月份"
     )
     st.session_state.audit_month = audit_month
 
 with col2:
-    departments = ["ER", "HDR", "OPD", "OPD(市區)", "ICU", "RCW", "7W", "8W", "9W", "11W", 
-                   "內科", "外科", "精神科", "復健科", "放射科", "檢驗科", 
-                   "松齡1.2區", "松齡3區", "松齡5.6區", "康寧居", "日照", "其他(請註明)"]
-    
     department = st.selectbox(
         "🏥 隸屬稽核單位/病房",
-        departments,
-        index=departments.index(st.session_state.department) if st.session_state.department in departments else 0,
+        DEPARTMENT_OPTIONS,
+        index=DEPARTMENT_OPTIONS.index_of(st.session_state.department),
         key="department_select"
     )
     
-    if department == "其他(請註明)":
+    if department == OTHER_OPTION:
         department = st.text_input("請註明單位", key="department_other")
     
     st.session_state.department = department
@@ -164,18 +289,12 @@ col1, col2 = st.columns(2)
 with col1:
     staff_category = st.selectbox(
         "👥 受稽核人員類別",
-        ["護理師", "照服員", "傳送/班長", "病房服務員", "內科醫師", "外科醫師",
-         "內科專師", "外科專師", "職能治療", "物理治療", "營養師", "呼吸治療師",
-         "門診助理員", "語言治療師", "社工師", "醫檢師", "放射師", "精神科醫師",
-         "精神科專師", "精神科職能治療", "心理師", "其他(請註明)"],
-        index=["護理師", "照服員", "傳送/班長", "病房服務員", "內科醫師", "外科醫師",
-               "內科專師", "外科專師", "職能治療", "物理治療", "營養師", "呼吸治療師",
-               "門診助理員", "語言治療師", "社工師", "醫檢師", "放射師", "精神科醫師",
-               "精神科專師", "精神科職能治療", "心理師", "其他(請註明)"].index(st.session_state.staff_category) if st.session_state.staff_category in ["護理師", "照服員", "傳送/班長", "病房服務員", "內科醫師", "外科醫師", "內科專師", "外科專師", "職能治療", "物理治療", "營養師", "呼吸治療師", "門診助理員", "語言治療師", "社工師", "醫檢師", "放射師", "精神科醫師", "精神科專師", "精神科職能治療", "心理師", "其他(請註明)"] else 0,
+        STAFF_CATEGORY_OPTIONS,
+        index=STAFF_CATEGORY_OPTIONS.index_of(st.session_state.staff_category),
         key="staff_category_select"
     )
     
-    if staff_category == "其他(請註明)":
+    if staff_category == OTHER_OPTION:
         staff_category = st.text_input("請註明人員類別", key="staff_category_other")
     
     st.session_state.staff_category = staff_category
@@ -196,106 +315,108 @@ with col2:
     # 如果選擇「另選隸屬單位」，顯示單位選擇
     if staff_unit_type == "另選隸屬單位":
         if 'staff_unit' not in st.session_state:
-            st.session_state.staff_unit = "ER"
+            st.session_state.staff_unit = DEPARTMENTS[0]
         
         staff_unit = st.selectbox(
             "選擇單位",
-            departments,
-            index=departments.index(st.session_state.staff_unit) if st.session_state.staff_unit in departments else 0,
+            DEPARTMENT_OPTIONS,
+            index=DEPARTMENT_OPTIONS.index_of(st.session_state.staff_unit),
             key="staff_unit_select",
             label_visibility="collapsed"
         )
         
-        if staff_unit == "其他(請註明)":
+        if staff_unit == OTHER_OPTION:
             staff_unit = st.text_input("請註明單位", key="staff_unit_other")
         
         st.session_state.staff_unit = staff_unit
     else:
         st.session_state.staff_unit = st.session_state.department
 
+lap("basic_info_widgets")
 st.markdown("---")
 
 # 手部衛生觀察區塊
 st.header("🔍 手部衛生行為觀察")
 
-col_obs1, col_obs2 = st.columns(2)
-
-with col_obs1:
-    # 1. 選擇觀察時機
-    st.markdown("#### 1️⃣ 手部衛生時機")
-    hand_hygiene_moment = st.radio(
-        "請選擇觀察時機",
-        [
-            "時機1: 接觸病人前",
-            "時機2: 執行清潔/無菌操作技術前",
-            "時機3: 暴露病人體液風險後",
-            "時機4: 接觸病人後",
-            "時機5: 接觸病人周遭環境後"
-        ],
-        key="hand_hygiene_moment",
-        label_visibility="collapsed"
-    )
+entry_mode = st.radio(
+    "輸入方式",
+    ENTRY_MODES,
+    key="entry_mode",
+    horizontal=True,
+    help="批次表格：一次輸入整輪巡視的多筆觀察，整批檢查後一起送出"
+)
 
-with col_obs2:
-    # 2. 選擇手部衛生執行方式
-    st.markdown("#### 2️⃣ 執行方式")
-    hygiene_method = st.radio(
-        "請選擇執行方式",
-        ["乾洗手（酒精性乾洗手液）", "濕洗手（肥皂和水）", "沒有洗手"],
-        key="hygiene_method",
-        label_visibility="collapsed"
-    )
+if entry_mode == SINGLE_ENTRY:
+    col_obs1, col_obs2 = st.columns(2)
 
-# 初始化變數
-technique_correct = None
-incorrect_reason = None
+    with col_obs1:
+        # 1. 選擇觀察時機
+        st.markdown("#### 1️⃣ 手部衛生時機")
+        hand_hygiene_moment = st.radio(
+            "請選擇觀察時機",
+            HYGIENE_MOMENTS,
+            key="hand_hygiene_moment",
+            label_visibility="collapsed"
+        )
 
-if hygiene_method != "沒有洗手":
-    st.markdown("---")
-    st.markdown("#### 3️⃣ 正確性評估")
+    with col_obs2:
+        # 2. 選擇手部衛生執行方式
+        st.markdown("#### 2️⃣ 執行方式")
+        hygiene_method = st.radio(
+            "請選擇執行方式",
+            HYGIENE_METHODS,
+            key="hygiene_method",
+            label_visibility="collapsed"
+        )
+
+    # 初始化變數
+    technique_correct = None
+    incorrect_reason = None
+
+    if hygiene_method != NO_HYGIENE:
+        st.markdown("---")
+        st.markdown("#### 3️⃣ 正確性評估")
     
-    col_correct1, col_correct2 = st.columns([1, 2])
+        col_correct1, col_correct2 = st.columns([1, 2])
     
-    with col_correct1:
-        technique_correct = st.radio(
-            "執行正確性",
-            ["正確(七步驟完全正確)", "不正確"],
-            key="technique_correct"
-        )
+        with col_correct1:
+            technique_correct = st.radio(
+                "執行正確性",
+                ASSESSED_VALUES,
+                key="technique_correct"
+            )
     
-    with col_correct2:
-        if technique_correct == "不正確":
-            # 根據乾洗手或濕洗手顯示不同的不正確原因（支援複選）
-            if hygiene_method == "乾洗手（酒精性乾洗手液）":
-                incorrect_options = ["步驟不完整", "戴手套洗手", "搓揉時間過短(少於20-30秒)或未搓到全乾", 
-                                    "乾洗手液量不足"]
-            else:  # 濕洗手
-                incorrect_options = ["步驟不完整", "戴手套洗手", "未使用洗手劑(含肥皂)洗手", 
-                                    "洗手後未擦乾", "洗手時間過短(少於40-60秒)"]
+        with col_correct2:
+            if technique_correct == INCORRECT:
+                # 根據乾洗手或濕洗手顯示不同的不正確原因（支援複選，選項來自標準原因表）
+                incorrect_options = reason_options(hygiene_method)
             
-            st.write("**不正確原因（可複選）**")
-            selected_reasons = []
+                st.write("**不正確原因（可複選）**")
+                selected_reasons = []
             
-            # 使用 checkbox 顯示所有選項
-            for option in incorrect_options:
-                if st.checkbox(option, key=f"incorrect_{option}"):
-                    selected_reasons.append(option)
+                # 使用 checkbox 顯示所有選項
+                for option in incorrect_options:
+                    if st.checkbox(option, key=f"incorrect_{option}"):
+                        selected_reasons.append(option)
             
-            # 「其他」選項
-            other_checked = st.checkbox("其他(請註明)", key="incorrect_other_checkbox")
-            if other_checked:
-                other_reason = st.text_input("請註明原因", key="incorrect_reason_other")
-                if other_reason:
-                    selected_reasons.append(other_reason)
+                # 「其他」選項
+                other_checked = st.checkbox(REASON_OTHER_LABEL, key="incorrect_other_checkbox")
+                if other_checked:
+                    other_reason = st.text_input("請註明原因", key="incorrect_reason_other")
+                    if other_reason:
+                        selected_reasons.append(other_reason)
             
-            # 將複選結果合併為字串
-            incorrect_reason = ", ".join(selected_reasons) if selected_reasons else None
-        else:
-            incorrect_reason = None
+                # 將複選結果合併為字串
+                incorrect_reason = REASON_SEPARATOR.join(selected_reasons) if selected_reasons else None
+            else:
+                incorrect_reason = None
 
-# 備註
-st.markdown("---")
-notes = st.text_area("💬 備註（選填）", placeholder="請填寫其他觀察事項", height=60, key="notes")
+    # 備註
+    st.markdown("---")
+    notes = st.text_area("💬 備註（選填）", placeholder="請填寫其他觀察事項", height=60, key="notes")
+else:
+    batch_grid = render_batch_grid()
+lap("observation_widgets")
 
 # 提交和結束按鈕
 st.markdown("---")
@@ -303,91 +424,92 @@ st.markdown("---")
 col1, col2 = st.columns(2)
 
 with col1:
-    if st.button("✅ 提交此次觀察", type="primary", use_container_width=True):
-        # 驗證必填欄位
-        if not auditor:
-            st.error("請填寫稽核人員姓名！")
-        elif hygiene_method != "沒有洗手" and not technique_correct:
-            st.error("請評估執行正確性！")
-        elif technique_correct == "不正確" and not incorrect_reason:
-            st.error("請選擇不正確原因！")
+    if entry_mode == BATCH_ENTRY:
+        if st.button("✅ 提交整批觀察", type="primary", use_container_width=True):
+            submit_batch(batch_grid)
+    elif st.button("✅ 提交此次觀察", type="primary", use_container_width=True):
+        # 創建觀察記錄
+        observation = {
+            "登入者Email": st.session_state.user_email,
+            "稽核日期": datetime.now().strftime(DATE_FORMAT),
+            "稽核時間": datetime.now().strftime(TIME_FORMAT),
+            "稽核月份": st.session_state.audit_month,
+            "稽核者單位": st.session_state.department,
+            "稽核人員": st.session_state.auditor,
+            "受稽核人員類別": st.session_state.staff_category,
+            "受稽核者單位": st.session_state.staff_unit,
+            "手部衛生時機": hand_hygiene_moment,
+            "手部衛生方式": hygiene_method,
+            "手部衛生正確性": technique_correct if hygiene_method != NO_HYGIENE else NOT_ASSESSED,
+            "不正確原因": incorrect_reason if incorrect_reason else NONE_TEXT,
+            RECORD_ID_FIELD: st.session_state.record_id
+        }
+        
+        # 依 schema 的驗證規則檢查必填欄位與選項
+        errors = validate_record(observation)
+        if errors:
+            st.error(errors[0])
         else:
-            # 創建觀察記錄
-            observation = {
-                "登入者Email": st.session_state.user_email,
-                "稽核日期": datetime.now().strftime("%Y-%m-%d"),
-                "稽核時間": datetime.now().strftime("%H:%M:%S"),
-                "稽核月份": st.session_state.audit_month,
-                "稽核者單位": st.session_state.department,
-                "稽核人員": st.session_state.auditor,
-                "受稽核人員類別": st.session_state.staff_category,
-                "受稽核者單位": st.session_state.staff_unit,
-                "手部衛生時機": hand_hygiene_moment,
-                "手部衛生方式": hygiene_method,
-                "手部衛生正確性": technique_correct if hygiene_method != "沒有洗手" else "未評估(沒有洗手)",
-                "不正確原因": incorrect_reason if incorrect_reason else "無"
-            }
-            
-            # 保存到 Google Sheets
-            with st.spinner("正在保存到雲端..."):
-                if save_to_google_sheets(observation, st.session_state.audit_month):
-                    st.session_state.current_observations.append(observation)
-                    st.success("✅ 觀察記錄已成功保存！")
-                    st.balloons()
-                    st.rerun()
-                else:
-                    st.error("⚠️ 保存失敗，請檢查網路連接")
+            # 寫入本機日誌後立即返回，雲端同步由背景執行緒處理
+            if save_to_google_sheets(observation, st.session_state.audit_month):
+                st.session_state.current_observations.append_record(observation)
+                st.session_state.session_stats.add(observation)
+                st.session_state.record_id = new_record_id()
+                st.toast("✅ 觀察記錄已保存，正在同步到雲端")
+            else:
+                st.error("⚠️ 保存失敗，請檢查網路連接")
 
 with col2:
     if st.button("🏁 結束觀察", type="secondary", use_container_width=True):
         # 重置所有狀態
         st.session_state.audit_month = ""
         st.session_state.auditor = ""
-        st.session_state.department = "ER"
-        st.session_state.staff_category = "護理師"
-        st.session_state.current_observations = []
+        st.session_state.department = DEPARTMENTS[0]
+        st.session_state.staff_category = STAFF_CATEGORIES[0]
+        st.session_state.current_observations = ObservationArray()
+        st.session_state.session_stats = SessionStats(SYNC_STATUS_LABELS)
+        st.session_state.pop("batch_grid", None)
         st.success("稽核已結束，可以開始新的稽核。")
         st.rerun()
 
+lap("submit")
+
 # 顯示當前會話的觀察記錄
 if st.session_state.current_observations:
     st.markdown("---")
     
-    # 統計資訊
-    df_current = pd.DataFrame(st.session_state.current_observations)
-    total_count = len(df_current)
-    staff_counts = df_current['受稽核人員類別'].value_counts().to_dict()
+    # 統計資訊（由 SessionStats 累計，不重新計算）
+    stats = st.session_state.session_stats
     
     st.subheader("📊 稽核統計")
     
     # 總稽核次數使用大卡片
-    st.metric("總稽核次數", total_count, help="本次稽核的總觀察次數")
+    col_total, col_compliance, col_correctness = st.columns(3)
+    col_total.metric("總稽核次數", stats.total, help="本次稽核的總觀察次數")
+    col_compliance.metric("遵從率", f"{stats.compliance_rate:.1%}", help="有執行手部衛生的比例")
+    col_correctness.metric("正確率", f"{stats.correctness_rate:.1%}", help="執行手部衛生中正確的比例")
     
     # 各人員次數用小字體表格顯示
     st.markdown("<p style='font-size: 14px; margin-top: 10px; margin-bottom: 5px;'><b>各受稽人員次數</b></p>", unsafe_allow_html=True)
     
     # 創建橫向顯示的統計資料
-    staff_items = list(staff_counts.items())
-    staff_summary = " | ".join([f"{staff}: {count}次" for staff, count in staff_items])
+    staff_summary = " | ".join([f"{staff}: {count}次" for staff, count in stats.staff_counts.most_common()])
     st.markdown(f"<p style='font-size: 13px;'>{staff_summary}</p>", unsafe_allow_html=True)
     
     st.markdown("---")
     st.subheader("📝 本次稽核的觀察記錄")
+    render_sync_status()
     
-    # 只顯示必要欄位
-    display_columns = ["稽核者單位", "受稽核人員類別", "受稽核者單位", "手部衛生時機", "手部衛生方式", "手部衛生正確性", "不正確原因"]
-    df_display = df_current[display_columns].copy()
-    
-    # 新增序號欄位
-    df_display.insert(0, "序", range(1, len(df_display) + 1))
-    
+    # 顯示表格已依欄累計（含序號與同步狀態），直接輸出
     st.dataframe(
-        df_display,
+        stats.table,
         use_container_width=True,
-        height=min(400, 50 + len(df_display) * 35),
+        height=min(400, 50 + stats.total * 35),
         hide_index=True
     )
+    lap("session_summary")
 
 # 頁尾
 st.markdown("---")
 st.caption("手部衛生稽核系統 v3.0 | 數據同步至 Google 雲端")
+lap.finish()
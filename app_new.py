@@ -3,6 +3,12 @@ import pandas as pd
 from datetime import datetime
 import gspread
 from google.oauth2.service_account import Credentials
+from storage import GoogleSheetsBackend, open_backend
+from connections import get_quota_client
+from reasons import reason_options, OTHER_LABEL as REASON_OTHER_LABEL
+from schema import (MONTH_LABELS, DEPARTMENT_OPTIONS, STAFF_CATEGORY_OPTIONS, HYGIENE_MOMENTS, HYGIENE_METHODS,
+                    ASSESSED_VALUES, NO_HYGIENE, INCORRECT, NOT_ASSESSED, OTHER_OPTION, NONE_TEXT,
+                    DATE_FORMAT, TIME_FORMAT)
 
 # Google Sheets 設定
 SCOPES = [
@@ -10,6 +16,7 @@ SCOPES = [
     'https://www.googleapis.com/auth/drive'
 ]
 SPREADSHEET_NAME = "hand-hygiene-new"
+DATA_PARTITION = "稽核數據"
 
 # 初始化 Google Sheets 連接
 @st.cache_resource
@@ -48,22 +55,27 @@ def check_login():
         return False
     return True
 
-def save_to_google_sheets(record):
-    """將記錄保存到 Google Sheets"""
+@st.cache_resource
+def get_storage_backend():
+    """依 secrets.toml 的 [storage] 區段建立儲存後端（預設為 Google Sheets）"""
     try:
+        config = dict(st.secrets.get("storage", {}))
+    except Exception:
+        config = {}
+    if config.get("backend", GoogleSheetsBackend.name) == GoogleSheetsBackend.name:
         spreadsheet = init_google_sheets()
         if spreadsheet is None:
-            return False
-        
-        try:
-            worksheet = spreadsheet.worksheet("稽核數據")
-        except:
-            worksheet = spreadsheet.add_worksheet(title="稽核數據", rows=1000, cols=20)
-            headers = list(record.keys())
-            worksheet.append_row(headers)
-        
-        values = list(record.values())
-        worksheet.append_row(values)
+            # 不快取失敗的連線，下次重新連線
+            init_google_sheets.clear()
+            raise ConnectionError("無法連接到 Google Sheets")
+        return GoogleSheetsBackend(get_quota_client().wrap(spreadsheet))
+    return open_backend(config)
+
+def save_to_google_sheets(record):
+    """將記錄保存到儲存後端"""
+    try:
+        backend = get_storage_backend()
+        backend.append_rows(DATA_PARTITION, [list(record.values())], headers=list(record.keys()))
         return True
     except Exception as e:
         st.error(f"保存失敗: {str(e)}")
@@ -115,7 +127,7 @@ if not st.session_state.basic_info_completed:
     with col1:
         audit_month = st.selectbox(
             "📅 稽核列計月份",
-            ["1月", "2月", "3月", "4月", "5月", "6月", "7月", "8月", "9月", "10月", "11月", "12月"],
+            MONTH_LABELS,
             key="audit_month_select"
         )
         
@@ -129,25 +141,20 @@ if not st.session_state.basic_info_completed:
     with col2:
         department = st.selectbox(
             "🏥 隸屬稽核單位/病房",
-            ["ER", "HDR", "OPD", "ICU", "RCW", "7W", "8W", "9W", "11W", 
-             "內科", "外科", "精神科", "復健科", "松1.2", "松3", "松5.6", 
-             "康", "日照", "其他(請註明)"],
+            DEPARTMENT_OPTIONS,
             key="department_select"
         )
         
-        if department == "其他(請註明)":
+        if department == OTHER_OPTION:
             department = st.text_input("請註明單位", key="department_other")
         
         staff_category = st.selectbox(
             "👥 受稽核人員類別",
-            ["護理師", "照服員", "傳送/班長", "病房服務員", "內科醫師", "外科醫師",
-             "內科專師", "外科專師", "職能治療", "物理治療", "營養師", "呼吸治療師",
-             "門診助理員", "語言治療師", "社工師", "醫檢師", "放射師", "精神科醫師",
-             "精神科專師", "精神科職能治療", "心理師", "其他(請註明)"],
+            STAFF_CATEGORY_OPTIONS,
             key="staff_category_select"
         )
         
-        if staff_category == "其他(請註明)":
+        if staff_category == OTHER_OPTION:
             staff_category = st.text_input("請註明人員類別", key="staff_category_other")
     
     st.markdown("---")
@@ -182,13 +189,7 @@ else:
     st.subheader("1️⃣ 選擇手部衛生時機")
     hand_hygiene_moment = st.radio(
         "請點選觀察時機",
-        [
-            "時機1: 接觸病人前",
-            "時機2: 執行清潔/無菌操作技術前",
-            "時機3: 暴露病人體液風險後",
-            "時機4: 接觸病人後",
-            "時機5: 接觸病人周遭環境後"
-        ],
+        HYGIENE_MOMENTS,
         key="hand_hygiene_moment"
     )
     
@@ -198,7 +199,7 @@ else:
     st.subheader("2️⃣ 手部衛生執行方式")
     hygiene_method = st.radio(
         "請選擇執行方式（三選一）",
-        ["乾洗手（酒精性乾洗手液）", "濕洗手（肥皂和水）", "沒有洗手"],
+        HYGIENE_METHODS,
         key="hygiene_method"
     )
     
@@ -206,25 +207,25 @@ else:
     technique_correct = None
     incorrect_reason = None
     
-    if hygiene_method != "沒有洗手":
+    if hygiene_method != NO_HYGIENE:
         st.markdown("---")
         st.subheader("3️⃣ 執行正確性評估")
         
         technique_correct = st.radio(
             "請評估正確性",
-            ["正確(七步驟完全正確)", "不正確"],
+            ASSESSED_VALUES,
             key="technique_correct"
         )
         
-        if technique_correct == "不正確":
+        if technique_correct == INCORRECT:
             st.write("**請選擇不正確原因：**")
             incorrect_reason = st.radio(
                 "不正確原因",
-                ["步驟不完整", "戴手套洗手", "濕洗手後未擦乾", "其他(請註明)"],
+                reason_options(hygiene_method) + [REASON_OTHER_LABEL],
                 key="incorrect_reason"
             )
             
-            if incorrect_reason == "其他(請註明)":
+            if incorrect_reason == REASON_OTHER_LABEL:
                 incorrect_reason = st.text_input("請註明原因", key="incorrect_reason_other")
     
     # 備註
@@ -239,25 +240,25 @@ else:
     with col1:
         if st.button("✅ 提交此次觀察", type="primary", use_container_width=True):
             # 驗證必填欄位
-            if hygiene_method != "沒有洗手" and technique_correct is None:
+            if hygiene_method != NO_HYGIENE and technique_correct is None:
                 st.error("請評估執行正確性！")
-            elif technique_correct == "不正確" and not incorrect_reason:
+            elif technique_correct == INCORRECT and not incorrect_reason:
                 st.error("請選擇不正確原因！")
             else:
                 # 創建觀察記錄
                 observation = {
                     "稽核月份": st.session_state.audit_month,
-                    "稽核日期": datetime.now().strftime("%Y-%m-%d"),
-                    "稽核時間": datetime.now().strftime("%H:%M:%S"),
+                    "稽核日期": datetime.now().strftime(DATE_FORMAT),
+                    "稽核時間": datetime.now().strftime(TIME_FORMAT),
                     "稽核人員": st.session_state.auditor,
                     "稽核單位": st.session_state.department,
                     "受稽核人員類別": st.session_state.staff_category,
                     "手部衛生時機": hand_hygiene_moment,
                     "執行方式": hygiene_method,
-                    "正確性": technique_correct if technique_correct else "未評估(沒有洗手)",
-                    "不正確原因": incorrect_reason if incorrect_reason else "無",
-                    "備註": notes if notes else "無",
-                    "遵從率": "是" if hygiene_method != "沒有洗手" else "否"
+                    "正確性": technique_correct if technique_correct else NOT_ASSESSED,
+                    "不正確原因": incorrect_reason if incorrect_reason else NONE_TEXT,
+                    "備註": notes if notes else NONE_TEXT,
+                    "遵從率": "是" if hygiene_method != NO_HYGIENE else "否"
                 }
                 
                 # 保存到 Google Sheets
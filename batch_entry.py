@@ -0,0 +1,88 @@
+"""批次表格輸入：一次輸入一輪巡視的多筆觀察，整批驗證後一次送出
+
+表格每列只有會隨觀察改變的欄位；稽核月份、稽核單位、稽核人員等共用欄位由基本資料帶入。
+選項與驗證規則與單筆表單相同（schema），不正確原因以 reasons 的標準寫法保存。
+"""
+from reasons import encode_reasons, format_reasons
+from schema import (NO_HYGIENE, INCORRECT, NOT_ASSESSED, NONE_TEXT, RECORD_ID_FIELD, normalize_record,
+                    validate_record)
+
+STAFF_CATEGORY_COLUMN = "受稽核人員類別"
+STAFF_UNIT_COLUMN = "受稽核者單位"
+MOMENT_COLUMN = "手部衛生時機"
+METHOD_COLUMN = "手部衛生方式"
+CORRECTNESS_COLUMN = "手部衛生正確性"
+REASON_COLUMN = "不正確原因"
+
+# 表格欄位（依畫面順序）
+GRID_COLUMNS = [STAFF_CATEGORY_COLUMN, STAFF_UNIT_COLUMN, MOMENT_COLUMN, METHOD_COLUMN,
+                CORRECTNESS_COLUMN, REASON_COLUMN]
+DEFAULT_GRID_ROWS = 10
+
+# 單筆表單以單選鈕確保有值，表格需另外檢查
+REQUIRED_GRID_FIELDS = (
+    (MOMENT_COLUMN, "請選擇手部衛生時機！"),
+    (METHOD_COLUMN, "請選擇執行方式！"),
+)
+
+
+def empty_grid(staff_category, staff_unit, rows=DEFAULT_GRID_ROWS):
+    """新的輸入表格：人員類別與單位預設為基本資料的值，其餘留白"""
+    import pandas as pd
+
+    return pd.DataFrame({
+        STAFF_CATEGORY_COLUMN: [staff_category] * rows,
+        STAFF_UNIT_COLUMN: [staff_unit] * rows,
+        MOMENT_COLUMN: [None] * rows,
+        METHOD_COLUMN: [None] * rows,
+        CORRECTNESS_COLUMN: [None] * rows,
+        REASON_COLUMN: [""] * rows,
+    })
+
+
+def _text(value):
+    """表格儲存格 -> 文字（None、NaN 視為空白）"""
+    if value is None or value != value:
+        return ""
+    return str(value).strip()
+
+
+def is_blank(row):
+    """未選時機與執行方式的列視為空白列，不送出"""
+    return not _text(row.get(MOMENT_COLUMN)) and not _text(row.get(METHOD_COLUMN))
+
+
+def grid_record(row, base):
+    """表格的一列加上共用欄位 -> 觀察記錄（與單筆表單相同的預設值）"""
+    record = dict(base)
+    for column in GRID_COLUMNS:
+        record[column] = _text(row.get(column))
+    if record[METHOD_COLUMN] == NO_HYGIENE and not record[CORRECTNESS_COLUMN]:
+        record[CORRECTNESS_COLUMN] = NOT_ASSESSED
+    if record[CORRECTNESS_COLUMN] == INCORRECT:
+        # 別名轉為標準原因，分隔符號統一
+        mask, other = encode_reasons(record[REASON_COLUMN])
+        record[REASON_COLUMN] = format_reasons(mask, other)
+    else:
+        record[REASON_COLUMN] = NONE_TEXT
+    return normalize_record(record)
+
+
+def build_records(rows, base, record_ids):
+    """驗證整個表格，回傳 (記錄清單, 錯誤訊息清單)
+
+    rows：每列一個 {欄位: 值}；base：共用欄位；record_ids[i] 為第 i 列的紀錄ID
+    （同一份表格重複送出時不變，寫入日誌時據此去除重複）。有任何錯誤時整批都不應送出。
+    """
+    records = []
+    errors = []
+    for i, row in enumerate(rows):
+        if is_blank(row):
+            continue
+        record = grid_record(row, base)
+        row_errors = [message for column, message in REQUIRED_GRID_FIELDS if not record[column]]
+        row_errors += validate_record(record)
+        errors.extend(f"第 {i + 1} 列：{message}" for message in row_errors)
+        record[RECORD_ID_FIELD] = record_ids[i]
+        records.append(record)
+    return records, errors
@@ -0,0 +1 @@
+"""效能基準測試（離線執行，使用程序內的假 Google Sheets）"""
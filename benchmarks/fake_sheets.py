@@ -0,0 +1,142 @@
+"""程序內的假 Google Sheets：提供 app 使用到的 gspread 介面，可選擇模擬網路延遲"""
+import re
+import threading
+import time
+
+from gspread.exceptions import WorksheetNotFound
+
+from storage import column_letter
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, title, rows, cols, sheet_id=0):
+        self.spreadsheet = spreadsheet
+        self.id = sheet_id
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self._values = []
+
+    def append_row(self, values, **kwargs):
+        self.append_rows([values])
+
+    def append_rows(self, values, **kwargs):
+        self.spreadsheet._call("write")
+        first = len(self._values) + 1
+        self._values.extend(list(row) for row in values)
+        if len(self._values) > self.row_count:
+            # 超出格線時 Sheets 自動擴充
+            self.spreadsheet.implicit_resizes += 1
+            self.row_count = len(self._values)
+        width = max((len(row) for row in values), default=1)
+        return {"updates": {"updatedRange": f"'{self.title}'!A{first}:{column_letter(width)}{len(self._values)}"}}
+
+    def add_rows(self, rows):
+        self.spreadsheet._call("metadata")
+        self.row_count += rows
+
+    def add_cols(self, cols):
+        self.spreadsheet._call("metadata")
+        self.col_count += cols
+
+    def update_cell(self, row, col, value):
+        self.spreadsheet._call("write")
+        while len(self._values) < row:
+            self._values.append([])
+        cells = self._values[row - 1]
+        cells.extend([""] * (col - len(cells)))
+        cells[col - 1] = value
+
+    def row_values(self, row):
+        self.spreadsheet._call("read")
+        return list(self._values[row - 1]) if row <= len(self._values) else []
+
+    def col_values(self, col):
+        self.spreadsheet._call("read")
+        return [row[col - 1] if col <= len(row) else "" for row in self._values]
+
+    def get_values(self, range_name=None, **kwargs):
+        """只支援到最後一欄的範圍，例如 A2:T"""
+        self.spreadsheet._call("read")
+        start = int(re.search(r"\d+", range_name).group()) if range_name else 1
+        return [list(row) for row in self._values[start - 1:]]
+
+    def get_all_values(self):
+        self.spreadsheet._call("read")
+        return [list(row) for row in self._values]
+
+    def _range_values(self, range_name):
+        """支援 A:A（第一欄）、1:1（標題列）與 A1:T（整張）"""
+        if range_name == "A:A":
+            return [[row[0]] if row and row[0] != "" else [] for row in self._values]
+        if range_name == "1:1":
+            return [list(self._values[0])] if self._values else []
+        return [list(row) for row in self._values]
+
+
+class FakeSpreadsheet:
+    """以 dict 保存工作表；latency 為每次 API 呼叫的模擬延遲秒數"""
+
+    def __init__(self, title="hand-hygiene-new", latency=0.0):
+        self.title = title
+        self.latency = latency
+        self.calls = {"read": 0, "write": 0, "metadata": 0}
+        self.implicit_resizes = 0
+        self._sheets = {}
+        self._lock = threading.Lock()
+
+    def _call(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def fetch_sheet_metadata(self, params=None):
+        self._call("metadata")
+        return {"spreadsheetId": self.title}
+
+    def worksheets(self):
+        self._call("metadata")
+        return list(self._sheets.values())
+
+    def worksheet(self, title):
+        self._call("metadata")
+        try:
+            return self._sheets[title]
+        except KeyError:
+            raise WorksheetNotFound(title)
+
+    def add_worksheet(self, title, rows, cols, **kwargs):
+        self._call("metadata")
+        worksheet = FakeWorksheet(self, title, rows, cols, sheet_id=len(self._sheets) + 1)
+        self._sheets[title] = worksheet
+        return worksheet
+
+    def del_worksheet(self, worksheet):
+        self._call("metadata")
+        self._sheets.pop(worksheet.title, None)
+
+    def values_batch_get(self, ranges, params=None):
+        self._call("read")
+        value_ranges = []
+        for range_name in ranges:
+            title, _, cells = range_name.rpartition("!")
+            worksheet = self._sheets[title.strip("'").replace("''", "'")]
+            value_ranges.append({"range": range_name, "values": worksheet._range_values(cells)})
+        return {"valueRanges": value_ranges}
+
+    def batch_update(self, body):
+        """支援 deleteSheet 與 updateSheetProperties（格線大小）"""
+        self._call("metadata")
+        by_id = {ws.id: ws for ws in self._sheets.values()}
+        for request in body["requests"]:
+            if "deleteSheet" in request:
+                worksheet = by_id[request["deleteSheet"]["sheetId"]]
+                self._sheets.pop(worksheet.title, None)
+            elif "updateSheetProperties" in request:
+                properties = request["updateSheetProperties"]["properties"]
+                grid = properties["gridProperties"]
+                worksheet = by_id[properties["sheetId"]]
+                worksheet.row_count = grid.get("rowCount", worksheet.row_count)
+                worksheet.col_count = grid.get("columnCount", worksheet.col_count)
+        return {}
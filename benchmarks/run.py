@@ -0,0 +1,429 @@
+"""熱點路徑效能基準測試
+
+    python -m benchmarks.run                          # 執行並列出結果
+    python -m benchmarks.run --quick                  # 縮小資料量（開發時快速檢查）
+    python -m benchmarks.run --save default           # 存為 benchmarks/baselines/default.json
+    python -m benchmarks.run query_quarter_sheets --save default   # 只更新（或新增）指定項目的基準
+    python -m benchmarks.run --compare default        # 與基準比較，變慢超過門檻時回傳非 0
+
+所有輸入都以固定亂數種子產生，且完全離線執行（Google Sheets 以 FakeSpreadsheet 取代）。
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from analytics import compliance_counts
+from benchmarks.fake_sheets import FakeSpreadsheet
+from generate_mock_data import generate_month_data, generate_month_frames
+from journal import ObservationJournal, new_record_id
+from observation import Observation, ObservationArray
+from read_cache import PartitionReadCache
+from schema import RECORD_ID_FIELD
+from session_stats import SessionStats
+from sheets_writer import SheetsWriteBehind, STATUS_PENDING, STATUS_CONFIRMED, STATUS_FAILED
+from storage import GoogleSheetsBackend, MemoryBackend, SQLiteBackend
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+DEFAULT_THRESHOLD = 0.20   # 比基準慢 20% 以上視為退步
+SEED = 20250101
+
+BENCHMARKS = {}
+
+
+def benchmark(name, rounds=5):
+    """註冊基準測試；函式回傳 (每輪要計時的 callable, 每輪處理筆數)"""
+    def register(func):
+        BENCHMARKS[name] = (func, rounds)
+        return func
+    return register
+
+
+def make_workdir(prefix):
+    """暫存資料夾，程式結束時刪除"""
+    path = tempfile.mkdtemp(prefix=prefix)
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+def sample_records(n, seed=SEED):
+    """固定種子的觀察記錄（工作表欄位 dict）"""
+    frame = generate_month_data(2025, 1, np.random.SeedSequence(seed), rows_per_month=(n, n))
+    records = frame.astype(object).to_dict("records")[:n]
+    for i, record in enumerate(records):
+        record[RECORD_ID_FIELD] = f"bench-{seed}-{i}"
+    return records
+
+
+def sample_frame(rows, seed=SEED):
+    """固定種子的大量資料（類別欄位 DataFrame），分散在 12 個月"""
+    seeds = np.random.SeedSequence(seed).spawn(12)
+    per_month = max(rows // 12, 1000)
+    frames = [frame for month, s in enumerate(seeds, 1)
+              for frame in generate_month_frames(2025, month, s, (per_month, per_month))]
+    return pd.concat(frames, ignore_index=True)
+
+
+# ---- 基準測試 ----
+
+@benchmark("observation_record_construction")
+def bench_observation_record(scale):
+    records = sample_records(int(10_000 * scale))
+
+    def run():
+        observations = ObservationArray()
+        for record in records:
+            observations.append(Observation.from_record(record))
+        return observations
+    return run, len(records)
+
+
+@benchmark("submit_path_journal_and_flush")
+def bench_submit_path(scale):
+    records = sample_records(int(2_000 * scale))
+    workdir = make_workdir("bench_journal_")
+    counter = {"round": 0}
+
+    def run():
+        counter["round"] += 1
+        journal = ObservationJournal(os.path.join(workdir, f"journal_{counter['round']}.sqlite3"))
+        writer = SheetsWriteBehind(GoogleSheetsBackend(FakeSpreadsheet()), journal,
+                                   batch_size=10 ** 9, flush_interval=3600)
+        for record in records:
+            writer.submit(dict(record, **{RECORD_ID_FIELD: new_record_id()}), "2025年1月")
+        writer.flush()
+        writer.close()
+        journal.close()
+    return run, len(records)
+
+
+def _backend_bench(kind, scale):
+    """大量附加後由 offset 讀回新增的資料列"""
+    headers = list(sample_records(1)[0].keys())
+    rows = [list(record.values()) for record in sample_records(int(20_000 * scale))]
+    workdir = make_workdir("bench_backend_")
+    counter = {"round": 0}
+
+    def run():
+        counter["round"] += 1
+        if kind == "sqlite":
+            backend = SQLiteBackend(os.path.join(workdir, f"storage_{counter['round']}.sqlite3"))
+        elif kind == "sheets":
+            backend = GoogleSheetsBackend(FakeSpreadsheet())
+        else:
+            backend = MemoryBackend()
+        half = len(rows) // 2
+        backend.append_rows("2025年1月", rows[:half], headers)
+        backend.append_rows("2025年1月", rows[half:], headers)
+        assert len(backend.read_rows("2025年1月", offset=half)) == len(rows) - half
+    return run, len(rows)
+
+
+for _kind in ("memory", "sqlite", "sheets"):
+    benchmark(f"storage_append_read_{_kind}")(lambda scale, kind=_kind: _backend_bench(kind, scale))
+
+
+@benchmark("read_cache_year_refresh")
+def bench_read_cache_refresh(scale):
+    """已快取一年份資料後，每個月份新增少量資料再重新整理"""
+    headers = list(sample_records(1)[0].keys())
+    rows = [list(record.values()) for record in sample_records(int(12_000 * scale))]
+    per_month = len(rows) // 12
+    backend = GoogleSheetsBackend(FakeSpreadsheet())
+    names = [f"2025年{month}月" for month in range(1, 13)]
+    for i, name in enumerate(names):
+        backend.append_rows(name, rows[i * per_month:(i + 1) * per_month], headers)
+    cache = PartitionReadCache(backend)
+    cache.frame(names)
+
+    def run():
+        for name in names:
+            backend.append_rows(name, rows[:5])
+        return cache.frame(names, max_staleness=0)
+    return run, len(rows)
+
+
+@benchmark("historical_import_csv_sheets", rounds=3)
+def bench_historical_import(scale):
+    """CSV 歷史資料串流匯入（每批每個月份一次 append_rows）"""
+    import csv
+    from importer import HistoricalImport
+
+    records = sample_records(int(20_000 * scale))
+    for record in records:
+        record[RECORD_ID_FIELD] = ""
+    workdir = make_workdir("bench_import_")
+    source = os.path.join(workdir, "history.csv")
+    with open(source, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+
+    def run():
+        HistoricalImport(GoogleSheetsBackend(FakeSpreadsheet()), source, restart=True).run()
+    return run, len(records)
+
+
+@benchmark("excel_report_month", rounds=3)
+def bench_excel_report(scale):
+    """月份報表：唯寫模式寫入各單位工作表與摘要"""
+    from excel_report import MonthlyReport
+
+    records = sample_records(int(20_000 * scale))
+    headers = list(records[0].keys())
+    rows = [list(record.values()) for record in records]
+    workdir = make_workdir("bench_report_")
+
+    def run():
+        MonthlyReport(os.path.join(workdir, "report.xlsx"), "2025年1月", headers).extend(rows).save()
+    return run, len(rows)
+
+
+@benchmark("query_quarter_sheets", rounds=3)
+def bench_query_quarter(scale):
+    """兩年份的月份工作表中查詢一季、兩個單位（只以一次 batchGet 讀取三個分區）"""
+    from query import query_audits
+
+    headers = list(sample_records(1)[0].keys())
+    rows = [list(record.values()) for record in sample_records(int(24_000 * scale))]
+    per_month = len(rows) // 24
+    backend = GoogleSheetsBackend(FakeSpreadsheet())
+    for i, (year, month) in enumerate((year, month) for year in (2024, 2025) for month in range(1, 13)):
+        backend.append_rows(f"{year}年{month}月", rows[i * per_month:(i + 1) * per_month], headers)
+
+    def run():
+        return query_audits(backend, "2025-04-01", "2025-06-30", units=["ICU", "ER"])
+    return run, per_month * 3
+
+
+@benchmark("spc_backfill_1m", rounds=3)
+def bench_spc_backfill(scale):
+    """管制圖：一年份歷史資料一次彙總為 (單位, 週／月) 計數"""
+    from spc import ControlCharts
+
+    frame = sample_frame(int(1_000_000 * scale))
+
+    def run():
+        return ControlCharts().backfill(frame)
+    return run, len(frame)
+
+
+@benchmark("spc_incremental")
+def bench_spc_incremental(scale):
+    """管制圖：已有一年份計數後逐筆加入新觀察，每 100 筆重算一次管制界限"""
+    from spc import ControlCharts
+
+    charts = ControlCharts().backfill(sample_frame(int(100_000 * scale)))
+    records = sample_records(int(10_000 * scale))
+
+    def run():
+        for i, record in enumerate(records):
+            charts.add_record(record)
+            if i % 100 == 0:
+                charts.chart(units=[record["稽核者單位"]])
+    return run, len(records)
+
+
+def _session_stats_bench(n):
+    records = sample_records(n)
+    labels = {STATUS_PENDING: "p", STATUS_CONFIRMED: "c", STATUS_FAILED: "f"}
+
+    def run():
+        # 模擬一個 session 逐筆新增，並在每次 rerun 取用統計結果
+        stats = SessionStats(labels)
+        for record in records:
+            stats.add(record)
+            stats.staff_counts.most_common()
+            stats.compliance_rate, stats.correctness_rate
+        return stats
+    return run, n
+
+
+for _n in (10, 100, 1000):
+    benchmark(f"session_stats_{_n}")(lambda scale, n=_n: _session_stats_bench(n))
+
+
+def _aggregation_bench(rows):
+    frame = sample_frame(rows)
+
+    def run():
+        return compliance_counts(frame, by=["稽核月份", "稽核者單位"])
+    return run, len(frame)
+
+
+benchmark("monthly_aggregation_1m", rounds=5)(lambda scale: _aggregation_bench(int(1_000_000 * scale)))
+benchmark("monthly_aggregation_10m", rounds=3)(lambda scale: _aggregation_bench(int(10_000_000 * scale)))
+
+
+def _load_bench(kind, scale):
+    from columnar import save_arrow, save_parquet, load_arrow, load_parquet
+
+    frame = sample_frame(int(13_000 * scale)).astype(object)
+    workdir = make_workdir("bench_load_")
+    path = os.path.join(workdir, f"data.{kind}")
+    if kind == "xlsx":
+        frame.to_excel(path, index=False, engine="openpyxl")
+        loader = lambda: pd.read_excel(path, engine="openpyxl")
+    elif kind == "parquet":
+        save_parquet(frame, path)
+        loader = lambda: load_parquet(path)
+    else:
+        save_arrow(frame, path)
+        loader = lambda: load_arrow(path)
+    return loader, len(frame)
+
+
+benchmark("load_excel", rounds=3)(lambda scale: _load_bench("xlsx", scale))
+benchmark("load_parquet")(lambda scale: _load_bench("parquet", scale))
+benchmark("load_arrow")(lambda scale: _load_bench("arrow", scale))
+
+
+@benchmark("mock_generation_month", rounds=3)
+def bench_mock_generation(scale):
+    rows = int(1_000_000 * scale)
+
+    def run():
+        return generate_month_data(2025, 1, np.random.SeedSequence(SEED), rows_per_month=(rows, rows))
+    return run, rows
+
+
+# ---- 執行與比較 ----
+
+def run_benchmarks(names=None, scale=1.0):
+    results = {}
+    for name, (setup, rounds) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        func, items = setup(scale)
+        func()  # 暖身
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        median = statistics.median(timings)
+        results[name] = {
+            "median_s": median,
+            "min_s": min(timings),
+            "rounds": rounds,
+            "items": items,
+            "items_per_s": items / median if median else None,
+        }
+        print(f"  {name:<36} {median * 1000:>10.2f} ms  ({items:,} 筆，{results[name]['items_per_s']:,.0f} 筆/秒)")
+    return results
+
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def save_baseline(name, results, scale):
+    """儲存基準；既有基準的 scale 相同時只更新這次執行的項目，其他項目保留"""
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    merged = {}
+    if os.path.exists(baseline_path(name)):
+        with open(baseline_path(name), encoding="utf-8") as f:
+            existing = json.load(f)
+        if existing.get("meta", {}).get("scale") == scale:
+            merged = existing.get("results", {})
+    merged.update(results)
+    # 依註冊順序排列，方便比較檔案差異
+    order = {bench_name: i for i, bench_name in enumerate(BENCHMARKS)}
+    results = dict(sorted(merged.items(), key=lambda item: order.get(item[0], len(order))))
+    payload = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": scale,
+        },
+        "results": results,
+    }
+    with open(baseline_path(name), "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    print(f"💾 已儲存基準：{baseline_path(name)}")
+
+
+def load_baseline(name, scale):
+    """讀取基準結果；基準的 scale 與這次執行不同時無法比較，拋出 ValueError"""
+    with open(baseline_path(name), encoding="utf-8") as f:
+        baseline = json.load(f)
+    baseline_scale = baseline.get("meta", {}).get("scale", 1.0)
+    if baseline_scale != scale:
+        raise ValueError(f"基準「{name}」的 scale 為 {baseline_scale}，與這次執行的 {scale} 不同，"
+                         f"耗時無法比較（請以相同的 --quick 設定執行，或另存一份基準）")
+    return baseline["results"]
+
+
+def compare(name, results, threshold, scale=1.0):
+    """與基準比較中位數，回傳退步的項目清單"""
+    baseline = load_baseline(name, scale)
+    regressions = []
+    missing = []
+    print(f"\n📊 與基準「{name}」比較（門檻 {threshold:.0%}）：")
+    for bench_name, result in results.items():
+        if bench_name not in baseline:
+            print(f"  {bench_name:<36} （基準中沒有此項目）")
+            missing.append(bench_name)
+            continue
+        before = baseline[bench_name]["median_s"]
+        change = (result["median_s"] - before) / before if before else 0.0
+        flag = "❌ 退步" if change > threshold else ("✅ 進步" if change < -threshold else "  持平")
+        print(f"  {bench_name:<36} {before * 1000:>10.2f} -> {result['median_s'] * 1000:>10.2f} ms  {change:+.1%}  {flag}")
+        if change > threshold:
+            regressions.append(bench_name)
+    if missing:
+        print(f"\n⚠️  {len(missing)} 個項目沒有基準，無法偵測退步；新增項目時請以 "
+              f"python -m benchmarks.run {' '.join(missing)} --save {name} 補上")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="熱點路徑效能基準測試")
+    parser.add_argument("names", nargs="*", help="只執行指定的項目")
+    parser.add_argument("--quick", action="store_true", help="資料量縮小為 1/10")
+    parser.add_argument("--save", metavar="NAME", help="將結果存為基準")
+    parser.add_argument("--compare", metavar="NAME", help="與指定基準比較")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="退步門檻（比例）")
+    parser.add_argument("--list", action="store_true", help="列出所有項目")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name in BENCHMARKS:
+            print(name)
+        return 0
+
+    scale = 0.1 if args.quick else 1.0
+    if args.compare:
+        # 先確認基準可比較，不必等所有項目跑完才發現
+        try:
+            load_baseline(args.compare, scale)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 2
+    print(f"⏱️  執行基準測試（scale={scale}）")
+    results = run_benchmarks(args.names, scale)
+
+    if args.save:
+        save_baseline(args.save, results, scale)
+    if args.compare:
+        regressions = compare(args.compare, results, args.threshold, scale)
+        if regressions:
+            print(f"\n❌ {len(regressions)} 個項目退步：{', '.join(regressions)}")
+            return 1
+        print("\n✅ 沒有退步")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,29 @@
-"""清除 Google Sheets 測試數據"""
-import gspread
+"""清除 Google Sheets 測試數據（互動式；排程或批次刪除請用 admin_cli.py）"""
+from storage import GoogleSheetsBackend, open_spreadsheet
 
 # 連接到 Google Sheets
-gc = gspread.service_account(filename='key.json')
-spreadsheet = gc.open("hand-hygiene-new")
+backend = GoogleSheetsBackend(open_spreadsheet(key_file='key.json'))
 
-# 列出所有工作表
-worksheets = spreadsheet.worksheets()
+# 列出所有工作表（筆數以一次批次讀取取得，不下載整張工作表）
+info = backend.partition_info()
+worksheets = list(info)
 print("📊 目前的工作表：")
-for idx, ws in enumerate(worksheets, 1):
-    row_count = len(ws.get_all_values())
-    print(f"  {idx}. {ws.title} ({row_count} 列資料)")
+for idx, title in enumerate(worksheets, 1):
+    print(f"  {idx}. {title} ({info[title]['rows']} 筆資料)")
 
-print("\n請輸入要刪除的工作表編號（輸入 0 取消）：")
+print("\n請輸入要刪除的工作表編號，多個以逗號分隔（輸入 0 取消）：")
 choice = input("編號: ")
 
 try:
-    choice = int(choice)
-    if choice == 0:
+    choices = [int(part) for part in choice.split(",") if part.strip()]
+    if not choices or 0 in choices:
         print("❌ 已取消")
-    elif 1 <= choice <= len(worksheets):
-        worksheet = worksheets[choice - 1]
-        confirm = input(f"⚠️  確定要刪除「{worksheet.title}」嗎？(y/n): ")
+    elif all(1 <= c <= len(worksheets) for c in choices):
+        titles = [worksheets[c - 1] for c in dict.fromkeys(choices)]
+        confirm = input(f"⚠️  確定要刪除「{'、'.join(titles)}」嗎？(y/n): ")
         if confirm.lower() == 'y':
-            spreadsheet.del_worksheet(worksheet)
-            print(f"✅ 已刪除「{worksheet.title}」工作表")
+            deleted = backend.delete_partitions(titles)
+            print(f"✅ 已刪除「{'、'.join(deleted)}」工作表")
         else:
             print("❌ 已取消")
     else:
@@ -0,0 +1,203 @@
+"""稽核資料的欄式儲存格式
+
+- Parquet（zstd 壓縮）：年度歸檔
+- Arrow IPC（未壓縮，可 memory-map）：常用資料的快取
+
+固定選項欄位（單位、人員類別、時機、方式…）以類別（dictionary）型別儲存，
+稽核日期存為日期型別，其餘低基數文字欄位也以 dictionary 編碼。
+"""
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from schema import VOCABULARIES, DATE_COLUMN, DATE_FORMAT, RECORD_ID_FIELD
+
+PARQUET_COMPRESSION = "zstd"
+EXCEL_CHUNK_ROWS = 100_000
+
+# 不做 dictionary 編碼的欄位（幾乎每列都不同）
+PLAIN_COLUMNS = {RECORD_ID_FIELD}
+
+
+def categorical_dtype(column, values=None):
+    """欄位的類別型別：固定選項在前（依選項表順序），其他值（如「其他」的註明）接在後面"""
+    categories = list(VOCABULARIES.get(column, []))
+    if values is not None:
+        known = set(categories)
+        extras = sorted({v for v in pd.unique(values) if isinstance(v, str) and v not in known})
+        categories.extend(extras)
+    return pd.CategoricalDtype(categories, ordered=column in VOCABULARIES)
+
+
+def to_columnar_frame(df):
+    """將工作表格式（全部為文字）的 DataFrame 轉為欄式型別"""
+    result = {}
+    for column in df.columns:
+        series = df[column]
+        if column == DATE_COLUMN:
+            result[column] = pd.to_datetime(series, format=DATE_FORMAT, errors="coerce")
+        elif column in PLAIN_COLUMNS or isinstance(series.dtype, pd.CategoricalDtype):
+            result[column] = series
+        else:
+            values = series.astype("string").to_numpy(dtype=object, na_value=None)
+            result[column] = pd.Series(
+                pd.Categorical(values, dtype=categorical_dtype(column, values)),
+                index=df.index,
+            )
+    return pd.DataFrame(result, index=df.index)
+
+
+def to_sheet_frame(df):
+    """欄式型別轉回工作表格式（全部為文字）"""
+    result = df.copy()
+    for column in result.columns:
+        if column == DATE_COLUMN and pd.api.types.is_datetime64_any_dtype(result[column]):
+            result[column] = result[column].dt.strftime(DATE_FORMAT)
+        else:
+            result[column] = result[column].astype(object)
+    return result
+
+
+def save_parquet(df, path, compression=PARQUET_COMPRESSION):
+    """儲存為 Parquet 歸檔"""
+    table = pa.Table.from_pandas(to_columnar_frame(df), preserve_index=False)
+    pq.write_table(table, path, compression=compression)
+
+
+def save_rows_parquet(headers, rows, path, compression=PARQUET_COMPRESSION):
+    """將工作表資料列（可能省略尾端空白儲存格）存為 Parquet，回傳筆數"""
+    width = len(headers)
+    padded = [list(row[:width]) + [""] * (width - len(row)) for row in rows]
+    save_parquet(pd.DataFrame(padded, columns=headers, dtype=object), path, compression)
+    return len(padded)
+
+
+def parquet_row_count(path):
+    """只讀取 Parquet metadata 取得筆數"""
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def load_parquet(path, columns=None):
+    """讀取 Parquet 歸檔，類別欄位還原為 pandas Categorical"""
+    return pq.read_table(path, columns=columns).to_pandas()
+
+
+def iter_parquet_rows(path, batch_rows=EXCEL_CHUNK_ROWS):
+    """逐批讀取 Parquet 歸檔，回傳 (標題列, 工作表格式的資料列)"""
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_rows):
+        frame = to_sheet_frame(batch.to_pandas()).fillna("")
+        yield list(frame.columns), frame.values.tolist()
+
+
+def save_arrow(df, path):
+    """儲存為未壓縮的 Arrow IPC 檔，讀取時可直接 memory-map"""
+    table = pa.Table.from_pandas(to_columnar_frame(df), preserve_index=False)
+    feather.write_feather(table, path, compression="uncompressed")
+
+
+def load_arrow(path, columns=None):
+    """以 memory-map 讀取 Arrow IPC 檔"""
+    return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+
+def iter_excel_chunks(path, chunk_rows=EXCEL_CHUNK_ROWS, sheet_name=None):
+    """以 openpyxl 唯讀模式逐塊讀取 Excel，每塊回傳一個 DataFrame"""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        headers = [str(h) for h in next(rows)]
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield pd.DataFrame(chunk, columns=headers)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=headers)
+    finally:
+        workbook.close()
+
+
+def write_excel_chunks(path, chunks):
+    """以 openpyxl 唯寫模式將多個 DataFrame 逐列寫入同一個工作表，回傳總筆數"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    total = 0
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            worksheet.append(list(chunk.columns))
+        for row in chunk.astype(object).itertuples(index=False, name=None):
+            worksheet.append(row)
+        total += len(chunk)
+    workbook.save(path)
+    return total
+
+
+def _as_sheet_text(df):
+    """Excel 讀入的值統一為文字（日期、時間轉回工作表格式）"""
+    result = {}
+    for column in df.columns:
+        series = df[column]
+        if column == DATE_COLUMN:
+            series = pd.to_datetime(series).dt.strftime(DATE_FORMAT)
+        else:
+            series = series.map(lambda v: v if v is None or isinstance(v, str) else str(v))
+        result[column] = series
+    return pd.DataFrame(result)
+
+
+def _chunk_schema(schema):
+    """逐塊寫入用的固定 schema：dictionary 索引一律 int32、值一律文字
+
+    每塊各自建立類別，pandas 依該塊的類別數選擇索引寬度（int8/int16），
+    之後的塊若有更多不同的自由文字值就無法轉回第一塊的型別。
+    """
+    fields = []
+    for field in schema:
+        if pa.types.is_dictionary(field.type):
+            field = field.with_type(pa.dictionary(pa.int32(), pa.string(), ordered=field.type.ordered))
+        fields.append(field)
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+def excel_to_parquet(src, dst, chunk_rows=EXCEL_CHUNK_ROWS, compression=PARQUET_COMPRESSION):
+    """將現有 Excel 格式（與工作表相同欄位）逐塊轉為 Parquet，回傳總筆數"""
+    writer = None
+    schema = None
+    total = 0
+    try:
+        for chunk in iter_excel_chunks(src, chunk_rows):
+            table = pa.Table.from_pandas(to_columnar_frame(_as_sheet_text(chunk)), preserve_index=False)
+            if writer is None:
+                schema = _chunk_schema(table.schema)
+                writer = pq.ParquetWriter(dst, schema, compression=compression)
+            writer.write_table(table.cast(schema))
+            total += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="將稽核資料 Excel 轉為 Parquet / Arrow 格式")
+    parser.add_argument("src", help="來源 Excel 檔")
+    parser.add_argument("dst", help="輸出檔（.parquet 或 .arrow）")
+    args = parser.parse_args()
+
+    if args.dst.endswith(".arrow"):
+        df = pd.concat([_as_sheet_text(chunk) for chunk in iter_excel_chunks(args.src)], ignore_index=True)
+        save_arrow(df, args.dst)
+        print(f"✅ 已轉換 {len(df)} 筆記錄：{args.dst}")
+    else:
+        count = excel_to_parquet(args.src, args.dst)
+        print(f"✅ 已轉換 {count} 筆記錄：{args.dst}")
@@ -0,0 +1,189 @@
+"""各頁面共用的連線資源：Google Sheets 連線、配額控制、儲存後端與讀取快取
+
+以 st.cache_resource 建立，同一個 Streamlit 程序中的所有 session 與頁面共用。
+gspread、google-auth 等較重的模組在第一次連線時才載入（通常由背景預熱執行緒載入），
+登入畫面不需等待。
+"""
+import os
+import threading
+import time
+
+import streamlit as st
+
+import metrics
+from read_cache import PartitionReadCache, DEFAULT_TTL, DEFAULT_FULL_REFRESH, DEFAULT_MAX_ROWS
+from storage import GoogleSheetsBackend, MirroredBackend, open_backend
+
+# Google Sheets 設定
+SPREADSHEET_NAME = "hand-hygiene-new"
+
+# 連線健康檢查
+HEALTH_CHECK_INTERVAL = 300.0   # 秒；連線正常時的檢查間隔
+RECONNECT_INTERVAL = 30.0       # 秒；連線失敗時的重試間隔
+
+
+def load_secrets_section(name):
+    """讀取 secrets.toml 的區段，未設定時回傳空 dict"""
+    try:
+        return dict(st.secrets.get(name, {}))
+    except Exception:
+        return {}
+
+
+@st.cache_resource
+def get_quota_client():
+    """跨 session 共用的 Sheets API 配額控制（所有 session 共用同一個服務帳號）
+
+    可於 secrets.toml 的 [quota] 區段設定：
+    read_per_minute、write_per_minute（每分鐘次數）、max_retries（429 / 5xx 重試次數）
+    """
+    from quota import QuotaClient, DEFAULT_READ_PER_MINUTE, DEFAULT_WRITE_PER_MINUTE, DEFAULT_MAX_RETRIES
+
+    config = load_secrets_section("quota")
+    client = QuotaClient(
+        read_per_minute=config.get("read_per_minute", DEFAULT_READ_PER_MINUTE),
+        write_per_minute=config.get("write_per_minute", DEFAULT_WRITE_PER_MINUTE),
+        max_retries=config.get("max_retries", DEFAULT_MAX_RETRIES),
+    )
+    metrics.register_collector("quota", client.stats)
+    return client
+
+
+# 初始化 Google Sheets 連接
+@st.cache_resource
+def init_google_sheets():
+    """初始化 Google Sheets 連接（API 呼叫經過配額控制）"""
+    try:
+        import gspread
+        from quota import READ
+
+        # 嘗試使用本地 key.json（本地開發環境）
+        if os.path.exists('key.json'):
+            gc = gspread.service_account(filename='key.json')
+        else:
+            # 使用 Streamlit secrets（雲端環境）
+            gc = gspread.service_account_from_dict(st.secrets["gcp_service_account"])
+
+        client = get_quota_client()
+        sh = client.call(READ, gc.open, SPREADSHEET_NAME)
+        return client.wrap(sh)
+    except Exception as e:
+        st.error(f"無法連接到 Google Sheets: {str(e)}")
+        return None
+
+
+def connect_google_sheets():
+    """供儲存後端建立連線；連線失敗時清除快取的 None，下次重新連線"""
+    spreadsheet = init_google_sheets()
+    if spreadsheet is None:
+        init_google_sheets.clear()
+        raise ConnectionError("無法連接到 Google Sheets")
+    return spreadsheet
+
+
+@st.cache_resource
+def get_storage_backend():
+    """跨 session 共用的儲存後端（預設為 Google Sheets）
+
+    可於 secrets.toml 的 [storage] 區段設定：
+    backend（"sheets"、"sqlite" 或 "memory"）、sqlite_path（SQLite 檔路徑）、
+    mirror（"sheets"：本機後端再非同步複寫到 Google Sheets）、mirror_journal_path（複寫日誌檔路徑）
+    """
+    backend = open_backend(load_secrets_section("storage"), connect=connect_google_sheets)
+    if isinstance(backend, MirroredBackend):
+        metrics.register_collector("mirror", backend.mirror_stats)
+        sheets = backend.mirror.backend
+    else:
+        sheets = backend
+    if isinstance(sheets, GoogleSheetsBackend):
+        metrics.register_collector("worksheet_cache", sheets.cache_stats)
+    return backend
+
+
+@st.cache_resource
+def get_read_cache():
+    """跨 session 共用的分區讀取快取
+
+    可於 secrets.toml 的 [read_cache] 區段設定：
+    ttl（秒）、full_refresh（秒）、max_rows（所有分區合計列數）
+    """
+    config = load_secrets_section("read_cache")
+    cache = PartitionReadCache(
+        get_storage_backend(),
+        ttl=config.get("ttl", DEFAULT_TTL),
+        full_refresh=config.get("full_refresh", DEFAULT_FULL_REFRESH),
+        max_rows=config.get("max_rows", DEFAULT_MAX_ROWS),
+    )
+    metrics.register_collector("read_cache", cache.stats)
+    return cache
+
+
+class ConnectionMonitor:
+    """背景執行緒：啟動時預先建立連線，之後定期做健康檢查，失效時自動重建"""
+
+    def __init__(self, backend, reconnect, interval=HEALTH_CHECK_INTERVAL, retry_interval=RECONNECT_INTERVAL):
+        self.backend = backend
+        self._reconnect = reconnect
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.healthy = None          # None 表示尚未檢查
+        self.last_check = None
+        self.last_error = None
+        self.reconnects = 0
+        self._thread = threading.Thread(target=self._run, name="connection-monitor", daemon=True)
+        self._thread.start()
+
+    def check(self):
+        """檢查一次連線，失敗時捨棄連線；回傳是否正常"""
+        try:
+            self.backend.open()
+            self.backend.ping()
+            self.healthy = True
+            self.last_error = None
+        except Exception as e:
+            self.healthy = False
+            self.last_error = str(e)
+            self.reconnects += 1
+            self._reconnect()
+        self.last_check = time.time()
+        return self.healthy
+
+    def _run(self):
+        while True:
+            healthy = self.check()
+            time.sleep(self.interval if healthy else self.retry_interval)
+
+
+@st.cache_resource
+def start_connection_monitor():
+    """伺服器程序啟動後第一次執行頁面時呼叫：在背景載入模組、完成認證並讀取工作表 metadata"""
+    backend = get_storage_backend()
+    # 本機後端加上 Google Sheets 複寫時，複寫端的連線同樣由監控重建
+    sheets = backend.mirror.backend if isinstance(backend, MirroredBackend) else backend
+
+    def reconnect():
+        # 捨棄快取的連線（失敗或過期），下次使用時重新認證
+        if isinstance(sheets, GoogleSheetsBackend):
+            init_google_sheets.clear()
+        backend.reset()
+
+    return ConnectionMonitor(backend, reconnect)
+
+
+@st.cache_resource
+def start_metrics_exporter():
+    """背景定期匯出效能指標（每個伺服器程序只啟動一次）
+
+    可於 secrets.toml 的 [metrics] 區段設定：
+    export_interval（秒，0 表示不匯出）、json_path、prometheus_path（空字串表示不寫該格式）
+    """
+    config = load_secrets_section("metrics")
+    interval = config.get("export_interval", metrics.DEFAULT_EXPORT_INTERVAL)
+    if not interval or interval <= 0:
+        return None
+    return metrics.MetricsExporter(
+        metrics.REGISTRY,
+        json_path=config.get("json_path", metrics.DEFAULT_JSON_PATH),
+        prometheus_path=config.get("prometheus_path", metrics.DEFAULT_PROMETHEUS_PATH),
+        interval=interval,
+    )
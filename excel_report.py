@@ -0,0 +1,218 @@
+"""月份稽核報表（Excel）
+
+以 openpyxl 唯寫模式（write_only）逐列寫入：每個稽核者單位一個工作表存放原始資料，
+另有「摘要」工作表列出依單位、受稽核人員類別、手部衛生時機的遵從率與正確率。
+資料列寫入後即不再保留，摘要由寫入時累計的計數表產生，記憶體用量與筆數無關。
+"""
+import re
+
+from schema import COLUMNS, DEPARTMENTS, STAFF_CATEGORIES, HYGIENE_MOMENTS, NO_HYGIENE, CORRECT
+
+SUMMARY_SHEET = "摘要"
+UNIT_COLUMN = "稽核者單位"
+STAFF_COLUMN = "受稽核人員類別"
+MOMENT_COLUMN = "手部衛生時機"
+RATE_FORMAT = "0.0%"
+
+SUMMARY_HEADERS = ["觀察次數", "遵從次數", "遵從率", "正確次數", "正確率"]
+
+# Excel 工作表名稱最長 31 字元，且不可含 []:*?/\
+_INVALID_TITLE = re.compile(r"[\[\]:*?/\\]")
+MAX_TITLE_LENGTH = 31
+
+
+def sheet_title(name):
+    return _INVALID_TITLE.sub("_", str(name) or "(空白)")[:MAX_TITLE_LENGTH]
+
+
+class OutcomeCounts:
+    """分組的觀察次數、遵從次數、正確次數；每筆 O(1) 累加"""
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, key, compliant, correct):
+        entry = self.counts.get(key)
+        if entry is None:
+            entry = self.counts[key] = [0, 0, 0]
+        entry[0] += 1
+        entry[1] += compliant
+        entry[2] += correct
+
+    def add_counts(self, key, n, n_compliant, n_correct):
+        """一次累加多筆（已彙總的次數）"""
+        entry = self.counts.get(key)
+        if entry is None:
+            entry = self.counts[key] = [0, 0, 0]
+        entry[0] += n
+        entry[1] += n_compliant
+        entry[2] += n_correct
+
+    def merge(self, other):
+        for key, (n, n_compliant, n_correct) in other.counts.items():
+            self.add_counts(key, n, n_compliant, n_correct)
+        return self
+
+    def total(self):
+        totals = [0, 0, 0]
+        for entry in self.counts.values():
+            for i, value in enumerate(entry):
+                totals[i] += value
+        return totals
+
+    def rows(self, sort_key=str):
+        """依 sort_key 排序；回傳 [(key, 觀察, 遵從, 遵從率, 正確, 正確率)]"""
+        return [(key, *summary_values(*self.counts[key])) for key in sorted(self.counts, key=sort_key)]
+
+
+def option_order(options):
+    """依選項表順序排序的 key，其他值（「其他」的註明文字）接在後面"""
+    return lambda value: (options.index_of(value, len(options)), str(value))
+
+
+def summary_values(n, n_compliant, n_correct):
+    """觀察次數、遵從次數、遵從率、正確次數、正確率（正確率以有洗手的次數為分母）"""
+    compliance_rate = n_compliant / n if n else None
+    correctness_rate = n_correct / n_compliant if n_compliant else None
+    return n, n_compliant, compliance_rate, n_correct, correctness_rate
+
+
+class MonthlyReport:
+    """逐列寫入的月份報表
+
+        report = MonthlyReport("2026年1月.xlsx", "2026年1月", headers)
+        for row in rows:
+            report.add(row)
+        report.save()
+
+    path 也可以是可寫入的檔案物件（例如 io.BytesIO）。
+    """
+
+    def __init__(self, path, title, headers=COLUMNS):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.title = title
+        self.headers = list(headers)
+        self._unit_index = self.headers.index(UNIT_COLUMN)
+        self._staff_index = self.headers.index(STAFF_COLUMN)
+        self._moment_index = self.headers.index(MOMENT_COLUMN)
+        self._method_index = self.headers.index("手部衛生方式")
+        self._correctness_index = self.headers.index("手部衛生正確性")
+
+        self._workbook = Workbook(write_only=True)
+        self._summary = self._workbook.create_sheet(SUMMARY_SHEET)
+        self._unit_sheets = {}
+        self._titles = {SUMMARY_SHEET}
+
+        # 寫入時累計的計數表
+        self.by_unit = OutcomeCounts()
+        self.by_staff = OutcomeCounts()
+        self.by_moment = OutcomeCounts()
+        self.by_staff_moment = OutcomeCounts()
+        self.rows_written = 0
+
+    def add(self, row):
+        """寫入一列（依 headers 順序的值）"""
+        width = len(self.headers)
+        if len(row) < width:
+            row = list(row) + [""] * (width - len(row))
+        unit = row[self._unit_index]
+        self._sheet_for(unit).append(row[:width])
+
+        compliant = row[self._method_index] != NO_HYGIENE
+        correct = compliant and row[self._correctness_index] == CORRECT
+        staff = row[self._staff_index]
+        moment = row[self._moment_index]
+        self.by_unit.add(unit, compliant, correct)
+        self.by_staff.add(staff, compliant, correct)
+        self.by_moment.add(moment, compliant, correct)
+        self.by_staff_moment.add((staff, moment), compliant, correct)
+        self.rows_written += 1
+
+    def extend(self, rows):
+        for row in rows:
+            self.add(row)
+        return self
+
+    def save(self):
+        """寫入摘要工作表並存檔；回傳寫入的資料列數"""
+        self._write_summary()
+        # 單位工作表依單位選項表排序（摘要在最前面）
+        by_department = option_order(DEPARTMENTS)
+        for position, unit in enumerate(sorted(self._unit_sheets, key=by_department), 1):
+            worksheet = self._unit_sheets[unit]
+            self._workbook.move_sheet(worksheet.title, position - self._workbook.index(worksheet))
+        self._workbook.save(self.path)
+        return self.rows_written
+
+    def _sheet_for(self, unit):
+        worksheet = self._unit_sheets.get(unit)
+        if worksheet is None:
+            title = sheet_title(unit)
+            # 截斷或替換字元後可能與既有名稱重複
+            suffix = 2
+            while title in self._titles:
+                tail = f"({suffix})"
+                title = sheet_title(unit)[:MAX_TITLE_LENGTH - len(tail)] + tail
+                suffix += 1
+            self._titles.add(title)
+            worksheet = self._unit_sheets[unit] = self._workbook.create_sheet(title)
+            worksheet.freeze_panes = "A2"
+            worksheet.append(self._bold(worksheet, self.headers))
+        return worksheet
+
+    def _bold(self, worksheet, values):
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(worksheet, value=value)
+            cell.font = Font(bold=True)
+            cells.append(cell)
+        return cells
+
+    def _values(self, values):
+        """摘要列：比率欄位套用百分比格式"""
+        from openpyxl.cell import WriteOnlyCell
+
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(self._summary, value=value)
+            if isinstance(value, float):
+                cell.number_format = RATE_FORMAT
+            cells.append(cell)
+        return cells
+
+    def _write_table(self, caption, key_headers, rows):
+        ws = self._summary
+        ws.append([])
+        ws.append(self._bold(ws, [caption]))
+        ws.append(self._bold(ws, key_headers + SUMMARY_HEADERS))
+        for row in rows:
+            key, values = row[0], row[1:]
+            keys = list(key) if isinstance(key, tuple) else [key]
+            ws.append(self._values(keys + list(values)))
+
+    def _write_summary(self):
+        ws = self._summary
+        ws.column_dimensions["A"].width = 24
+        ws.column_dimensions["B"].width = 30
+        ws.append(self._bold(ws, [f"{self.title} 手部衛生稽核報表"]))
+        ws.append(self._bold(ws, ["全體"] + SUMMARY_HEADERS))
+        ws.append(self._values(["合計", *summary_values(*self.by_unit.total())]))
+        by_staff = option_order(STAFF_CATEGORIES)
+        by_moment = option_order(HYGIENE_MOMENTS)
+        self._write_table("依稽核單位", [UNIT_COLUMN], self.by_unit.rows(option_order(DEPARTMENTS)))
+        self._write_table("依受稽核人員類別", [STAFF_COLUMN], self.by_staff.rows(by_staff))
+        self._write_table("依手部衛生時機", [MOMENT_COLUMN], self.by_moment.rows(by_moment))
+        self._write_table(
+            "依受稽核人員類別與時機", [STAFF_COLUMN, MOMENT_COLUMN],
+            self.by_staff_moment.rows(lambda key: (by_staff(key[0]), by_moment(key[1]))),
+        )
+
+
+def write_monthly_report(path, title, headers, rows):
+    """將一個月份的資料列寫成報表，回傳筆數"""
+    return MonthlyReport(path, title, headers).extend(rows).save()
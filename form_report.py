@@ -0,0 +1,291 @@
+"""依稽核表範本批次產生各單位的月份稽核表（DOCX，可另轉 PDF）
+
+    render_month_forms(df, "2026年1月", "forms/2026年1月", workers=4, pdf=True, incremental=True)
+
+先在主程序一次計算整個月份的彙總（各單位的次數、遵從率、正確率、原因統計），
+再以 process pool 平行填寫各單位的表單；彙總只在每個子程序啟動時傳送一次。
+incremental=True 時比對 manifest.json 中各單位彙總的雜湊值，只重新產生資料有變動的單位。
+PDF 由 LibreOffice（soffice）轉換，每個子程序使用獨立的設定檔目錄以便同時執行。
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from schema import DEPARTMENTS, HYGIENE_MOMENTS, NO_HYGIENE, CORRECT, DATE_COLUMN
+from reasons import REASONS
+
+DEFAULT_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "手部衛生遵從率與手部衛生行為稽核表.docx")
+MANIFEST_NAME = "manifest.json"
+# 填寫方式變更時遞增，使 incremental 模式重新產生所有表單
+FORM_VERSION = 1
+FONT_SIZE_PT = 12
+
+UNIT_COLUMN = "稽核者單位"
+STAFF_COLUMN = "受稽核人員類別"
+AUDITOR_COLUMN = "稽核人員"
+
+# 表單上的受稽人員代碼：01 護理人員、02 照顧服務員、03 其他
+STAFF_CODES = {"護理師": "01", "照服員": "02"}
+STAFF_CODE_LABELS = {"01": "護理人員", "02": "照顧服務員", "03": "其他"}
+
+# 表單上的未確實代碼 -> 標準原因
+FORM_REASON_CODES = {
+    "01": ("洗手不完整", ["步驟不完整"]),
+    "02": ("洗手時間不夠", ["搓揉時間過短(少於20-30秒)或未搓到全乾", "洗手時間過短(少於40-60秒)"]),
+    "03": ("未擦乾", ["洗手後未擦乾"]),
+    "04": ("戴手套洗手", ["戴手套洗手"]),
+}
+
+_UNSAFE_FILE_CHARS = re.compile(r'[\\/:*?"<>|]')
+
+
+def form_file_name(unit, month):
+    return _UNSAFE_FILE_CHARS.sub("_", f"{month}_{unit}_手部衛生稽核表") + ".docx"
+
+
+def _rate(numerator, denominator):
+    return numerator / denominator if denominator else None
+
+
+def month_aggregate(df):
+    """整個月份依單位的彙總（只含基本型別，可直接傳給子程序）
+
+    {單位: {"count", "compliant", "correct", "first_date", "last_date", "auditors",
+            "staff": {代碼: 次數}, "moments": {時機: [次數, 遵從, 正確]}, "reasons": {原因: 次數}}}
+    """
+    from reasons import reason_breakdown
+
+    if df.empty:
+        return {}
+    compliant = (df["手部衛生方式"] != NO_HYGIENE).to_numpy()
+    correct = (df["手部衛生正確性"] == CORRECT).to_numpy() & compliant
+    frame = df.assign(_compliant=compliant, _correct=correct)
+    frame["_staff_code"] = frame[STAFF_COLUMN].map(STAFF_CODES).fillna("03")
+
+    reasons = reason_breakdown(frame, by=UNIT_COLUMN)
+    aggregate = {}
+    for unit, group in frame.groupby(UNIT_COLUMN, sort=False, observed=True):
+        unit = str(unit)
+        moments = group.groupby("手部衛生時機", sort=False, observed=True)[["_compliant", "_correct"]].agg(["size", "sum"])
+        aggregate[unit] = {
+            "count": int(len(group)),
+            "compliant": int(group["_compliant"].sum()),
+            "correct": int(group["_correct"].sum()),
+            "first_date": str(group[DATE_COLUMN].min()),
+            "last_date": str(group[DATE_COLUMN].max()),
+            "auditors": sorted(str(name) for name in group[AUDITOR_COLUMN].dropna().unique() if name),
+            "staff": {str(code): int(n) for code, n in group["_staff_code"].value_counts().sort_index().items()},
+            "moments": {
+                str(moment): [int(row[("_compliant", "size")]), int(row[("_compliant", "sum")]),
+                              int(row[("_correct", "sum")])]
+                for moment, row in moments.iterrows()
+            },
+            "reasons": {reason: int(n) for reason, n in reasons.loc[unit].items() if n} if unit in reasons.index else {},
+        }
+    return aggregate
+
+
+def unit_digest(summary, template_digest):
+    """單位彙總 + 範本 + 表單版本的雜湊；不變時表單內容也不變"""
+    payload = json.dumps([FORM_VERSION, template_digest, summary], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def ordered_units(units):
+    """依單位選項表排序，其他單位接在後面"""
+    return sorted(units, key=lambda unit: (DEPARTMENTS.index_of(unit, len(DEPARTMENTS)), unit))
+
+
+# ---- 填寫表單（在子程序中執行） ----
+
+def _set_cell(cell, text):
+    """以範本字級覆寫儲存格文字"""
+    from docx.shared import Pt
+
+    paragraph = cell.paragraphs[0]
+    for run in paragraph.runs:
+        run.text = ""
+    run = paragraph.runs[0] if paragraph.runs else paragraph.add_run()
+    run.text = text
+    run.font.size = Pt(FONT_SIZE_PT)
+
+
+def _append_line(cell, text):
+    from docx.shared import Pt
+
+    run = cell.add_paragraph().add_run(text)
+    run.font.size = Pt(FONT_SIZE_PT)
+
+
+def _percent(numerator, denominator):
+    rate = _rate(numerator, denominator)
+    return "-" if rate is None else f"{rate:.1%}（{numerator}/{denominator}）"
+
+
+def _add_table(document, caption, headers, rows):
+    from docx.shared import Pt
+
+    heading = document.add_paragraph().add_run(caption)
+    heading.bold = True
+    heading.font.size = Pt(FONT_SIZE_PT)
+    table = document.add_table(rows=1, cols=len(headers))
+    table.style = document.tables[0].style
+    for cell, header in zip(table.rows[0].cells, headers):
+        _set_cell(cell, header)
+    for values in rows:
+        for cell, value in zip(table.add_row().cells, values):
+            _set_cell(cell, str(value))
+
+
+def fill_form(template, unit, month, summary):
+    """依範本填入單位的月份彙總，回傳 docx Document"""
+    import docx
+
+    document = docx.Document(template)
+    title = document.paragraphs[0]
+    title.add_run().add_break()
+    title.add_run(f"{unit}　{month}")
+
+    header = document.tables[0]
+    row = header.rows[0].cells
+    _set_cell(row[1], f"{summary['first_date']} ~ {summary['last_date']}")
+    _set_cell(row[3], "、".join(summary["auditors"]))
+    _set_cell(row[5], _percent(summary["compliant"], summary["count"]))
+    _set_cell(row[7], _percent(summary["correct"], summary["compliant"]))
+
+    # 受稽人員代碼、未確實代碼的說明欄下方加上本月次數
+    staff = "、".join(f"{code} {STAFF_CODE_LABELS[code]} {summary['staff'].get(code, 0)} 次" for code in STAFF_CODE_LABELS)
+    _append_line(header.rows[1].cells[2], f"本月：{staff}")
+    reasons = summary["reasons"]
+    mapped = set()
+    parts = []
+    for code, (label, standard) in FORM_REASON_CODES.items():
+        mapped.update(standard)
+        parts.append(f"{code} {label} {sum(reasons.get(reason, 0) for reason in standard)} 次")
+    others = sum(n for reason, n in reasons.items() if reason not in mapped)
+    if others:
+        parts.append(f"其他 {others} 次")
+    _append_line(header.rows[2].cells[2], "本月：" + "、".join(parts))
+
+    moment_rows = []
+    moments = summary["moments"]
+    for moment in sorted(moments, key=lambda m: (HYGIENE_MOMENTS.index_of(m, len(HYGIENE_MOMENTS)), m)):
+        n, n_compliant, n_correct = moments[moment]
+        moment_rows.append((moment, n, _percent(n_compliant, n), _percent(n_correct, n_compliant)))
+    _add_table(document, "各時機統計", ["時機", "觀察次數", "遵從率", "正確率"], moment_rows)
+
+    reason_rows = [(reason, reasons[reason]) for reason in REASONS if reasons.get(reason)]
+    _add_table(document, "未確實原因統計", ["原因", "次數"], reason_rows or [("無", 0)])
+    return document
+
+
+def soffice_path():
+    return shutil.which("soffice") or shutil.which("libreoffice")
+
+
+def convert_to_pdf(docx_path, soffice, profile_dir):
+    """以 LibreOffice 轉為 PDF（與 docx 同一資料夾）；profile_dir 為此程序專用的設定檔目錄"""
+    subprocess.run(
+        [soffice, f"-env:UserInstallation=file://{profile_dir}", "--headless", "--convert-to", "pdf",
+         "--outdir", os.path.dirname(docx_path) or ".", docx_path],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=300,
+    )
+    return os.path.splitext(docx_path)[0] + ".pdf"
+
+
+_worker = {}
+
+
+def _init_worker(aggregate, month, template, output_dir, soffice, profile_root):
+    """子程序啟動時接收整個月份的彙總，之後的工作只傳單位名稱"""
+    _worker.update(aggregate=aggregate, month=month, template=template, output_dir=output_dir, soffice=soffice,
+                   profile=os.path.join(profile_root, str(os.getpid())) if profile_root else None)
+
+
+def _render_unit(unit):
+    month = _worker["month"]
+    path = os.path.join(_worker["output_dir"], form_file_name(unit, month))
+    fill_form(_worker["template"], unit, month, _worker["aggregate"][unit]).save(path)
+    if _worker["soffice"]:
+        convert_to_pdf(path, _worker["soffice"], _worker["profile"])
+    return unit, path
+
+
+# ---- 批次產生 ----
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def render_month_forms(df, month, output_dir, template=None, workers=None, pdf=False,
+                       incremental=False, aggregate=None):
+    """產生一個月份各單位的表單，回傳 {"rendered": [單位…], "skipped": [單位…], "paths": {單位: 路徑}}
+
+    aggregate 可傳入已計算的 month_aggregate(df)（此時 df 可為 None）。
+    """
+    template = template or DEFAULT_TEMPLATE
+    soffice = None
+    if pdf:
+        soffice = soffice_path()
+        if soffice is None:
+            raise RuntimeError("找不到 LibreOffice（soffice），無法轉換 PDF")
+    if aggregate is None:
+        aggregate = month_aggregate(df)
+    os.makedirs(output_dir, exist_ok=True)
+
+    template_digest = file_digest(template)
+    manifest = load_manifest(output_dir) if incremental else {}
+    digests = {unit: unit_digest([summary, bool(pdf)], template_digest) for unit, summary in aggregate.items()}
+    pending, skipped = [], []
+    for unit in ordered_units(aggregate):
+        path = os.path.join(output_dir, form_file_name(unit, month))
+        outputs = [path] + ([os.path.splitext(path)[0] + ".pdf"] if pdf else [])
+        if manifest.get(unit) == digests[unit] and all(os.path.exists(p) for p in outputs):
+            skipped.append(unit)
+        else:
+            pending.append(unit)
+
+    paths = {unit: os.path.join(output_dir, form_file_name(unit, month)) for unit in skipped}
+    if pending:
+        workers = max(1, min(workers or os.cpu_count() or 1, len(pending)))
+        # LibreOffice 同一個設定檔目錄不能同時執行多個轉換，每個子程序使用各自的目錄
+        profile_root = tempfile.mkdtemp(prefix="form_report_lo_") if soffice else None
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(aggregate, month, template, output_dir, soffice, profile_root)) as pool:
+                for unit, path in pool.map(_render_unit, pending):
+                    paths[unit] = path
+                    # 每完成一個單位就更新 manifest，中斷後已完成的單位不需重做
+                    manifest[unit] = digests[unit]
+                    save_manifest(output_dir, manifest)
+        finally:
+            if profile_root:
+                shutil.rmtree(profile_root, ignore_errors=True)
+    # 本月已沒有資料的單位從 manifest 移除
+    for unit in list(manifest):
+        if unit not in aggregate:
+            del manifest[unit]
+    save_manifest(output_dir, manifest)
+    return {"rendered": pending, "skipped": skipped, "paths": paths}
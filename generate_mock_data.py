@@ -1,164 +1,288 @@
-"""生成2025年手部衛生稽核模擬資料"""
+"""生成手部衛生稽核模擬資料
+
+以 numpy 一次產生整欄資料；各月份使用獨立的亂數子序列，可平行產生，
+並可逐塊串流寫入 Parquet / CSV，適合產生千萬筆以上的壓力測試資料。
+
+    python generate_mock_data.py                                # 2025年，輸出 Excel
+    python generate_mock_data.py --years 2024 2025 --rows-per-month 800000 1000000 \\
+        --format parquet --output mock_data --workers 8
+"""
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
-import random
-from datetime import datetime, timedelta
-import openpyxl
-
-# 設定隨機種子以確保可重現
-random.seed(42)
-
-# 定義選項
-departments = ["ER", "HDR", "OPD", "OPD(市區)", "ICU", "RCW", "7W", "8W", "9W", "11W", 
-               "內科", "外科", "精神科", "復健科", "放射科", "檢驗科", 
-               "松齡1.2區", "松齡3區", "松齡5.6區", "康寧居", "日照"]
-
-staff_categories = ["護理師", "照服員", "傳送/班長", "病房服務員", "內科醫師", "外科醫師",
-                   "內科專師", "外科專師", "職能治療", "物理治療", "營養師", "呼吸治療師",
-                   "門診助理員", "語言治療師", "社工師", "醫檢師", "放射師", "精神科醫師",
-                   "精神科專師", "精神科職能治療", "心理師"]
-
-hygiene_moments = [
-    "時機1: 接觸病人前",
-    "時機2: 執行清潔/無菌操作技術前",
-    "時機3: 暴露病人體液風險後",
-    "時機4: 接觸病人後",
-    "時機5: 接觸病人周遭環境後"
-]
+
+from schema import (COLUMNS, DEPARTMENTS, STAFF_CATEGORIES, HYGIENE_MOMENTS,
+                    DRY_HANDRUB, WET_HANDWASH, VOCABULARIES)
+from reasons import reason_options, SEPARATOR, NONE_TEXT
+from analytics import compliance_counts, with_rates, COUNT, COMPLIANT, COMPLIANCE_RATE, CORRECTNESS_RATE
+
+DEFAULT_SEED = 42
+DEFAULT_ROWS_PER_MONTH = (1000, 1200)   # 每月總次數範圍
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+MIN_PER_DEPT = 30              # 每個單位至少次數
+MIN_DEPT_COMPLIANCE = 0.88     # 單位遵從率下限
+MIN_DEPT_CORRECTNESS = 0.90    # 單位正確率下限
 
 auditors = ["王小明", "李小華", "張美麗", "陳大同", "林淑芬", "黃志明", "吳雅婷", "劉建國"]
 
-def generate_month_data(year, month, target_compliance_rate, target_correctness_rate):
-    """生成單月資料"""
-    # 每月總次數：1000-1200
-    total_count = random.randint(1000, 1200)
-    
-    # 確保每個單位至少30次
-    min_per_dept = 30
-    remaining = total_count - (len(departments) * min_per_dept)
-    
-    # 分配次數給各單位
-    dept_counts = {dept: min_per_dept for dept in departments}
-    for _ in range(remaining):
-        dept = random.choice(departments)
-        dept_counts[dept] += 1
-    
-    records = []
-    
-    for dept in departments:
-        dept_count = dept_counts[dept]
-        
-        # 為此單位設定遵從率和正確率（確保不低於最低標準）
-        dept_compliance = max(0.88, random.uniform(target_compliance_rate - 0.03, target_compliance_rate + 0.03))
-        dept_correctness = max(0.90, random.uniform(target_correctness_rate - 0.02, target_correctness_rate + 0.02))
-        
-        # 計算此單位應有多少次洗手（遵從）和多少次正確
-        compliant_count = int(dept_count * dept_compliance)
-        non_compliant_count = dept_count - compliant_count
-        correct_count = int(compliant_count * dept_correctness)
-        incorrect_count = compliant_count - correct_count
-        
-        # 生成記錄
-        for i in range(dept_count):
-            # 生成隨機日期
-            day = random.randint(1, 28)  # 安全起見用28天
-            hour = random.randint(7, 18)
-            minute = random.randint(0, 59)
-            second = random.randint(0, 59)
-            
-            audit_date = f"{year}-{month:02d}-{day:02d}"
-            audit_time = f"{hour:02d}:{minute:02d}:{second:02d}"
-            
-            # 隨機選擇
-            staff_category = random.choice(staff_categories)
-            moment = random.choice(hygiene_moments)
-            auditor = random.choice(auditors)
-            
-            # 決定是否遵從（洗手）
-            if i < non_compliant_count:
-                # 沒有洗手
-                hygiene_method = "沒有洗手"
-                correctness = "未評估(沒有洗手)"
-                incorrect_reason = "無"
-            elif i < non_compliant_count + incorrect_count:
-                # 洗手但不正確
-                hygiene_method = random.choice(["乾洗手（酒精性乾洗手液）", "濕洗手（肥皂和水）"])
-                correctness = "不正確"
-                
-                if hygiene_method == "乾洗手（酒精性乾洗手液）":
-                    # 乾洗手不正確原因（可複選，隨機生成1-2個原因）
-                    dry_reasons = ["步驟不完整", "戴手套洗手", "未搓到手部全乾", 
-                                  "搓揉時間過短(少於20-30秒)", "乾洗手液量不足已覆蓋全手"]
-                    num_reasons = random.choices([1, 2], weights=[0.7, 0.3])[0]
-                    selected_reasons = random.sample(dry_reasons, num_reasons)
-                    incorrect_reason = ", ".join(selected_reasons)
-                else:
-                    # 濕洗手不正確原因（可複選，隨機生成1-2個原因）
-                    wet_reasons = ["步驟不完整", "戴手套洗手", "只用清水洗手", 
-                                  "洗手後未擦乾", "洗手時間過短(少於40-60秒)"]
-                    num_reasons = random.choices([1, 2], weights=[0.7, 0.3])[0]
-                    selected_reasons = random.sample(wet_reasons, num_reasons)
-                    incorrect_reason = ", ".join(selected_reasons)
-            else:
-                # 洗手且正確
-                hygiene_method = random.choice(["乾洗手（酒精性乾洗手液）", "濕洗手（肥皂和水）"])
-                correctness = "正確(七步驟完全正確)"
-                incorrect_reason = "無"
-            
-            record = {
-                "登入者Email": f"{auditor}@hospital.com",
-                "稽核日期": audit_date,
-                "稽核時間": audit_time,
-                "稽核月份": f"{month}月",
-                "稽核者單位": dept,
-                "稽核人員": auditor,
-                "受稽核人員類別": staff_category,
-                "受稽核者單位": dept,  # 簡化：假設都在同一單位
-                "手部衛生時機": moment,
-                "手部衛生方式": hygiene_method,
-                "手部衛生正確性": correctness,
-                "不正確原因": incorrect_reason
-            }
-            
-            records.append(record)
-    
-    return records
-
-# 生成2025年全年資料
-print("🔄 開始生成2025年手部衛生稽核模擬資料...")
-all_records = []
-
-for month in range(1, 13):
+# 稽核時間：07:00:00 ~ 18:59:59，以秒數為代碼
+FIRST_HOUR = 7
+LAST_HOUR = 18
+TIME_LABELS = [f"{h:02d}:{m:02d}:{s:02d}"
+               for h in range(FIRST_HOUR, LAST_HOUR + 1) for m in range(60) for s in range(60)]
+DAYS_PER_MONTH = 28  # 安全起見用28天
+
+# 手部衛生方式代碼（順序同 schema.HYGIENE_METHODS）
+DRY, WET, NONE = 0, 1, 2
+METHOD_CODES = [DRY_HANDRUB, WET_HANDWASH]
+
+
+def _reason_labels():
+    """預先組合所有「1~2個原因」的文字，之後以代碼查表即可，不需逐列字串串接"""
+    label_codes = {NONE_TEXT: 0}
+    codes = {}
+    for method in (DRY, WET):
+        options = reason_options(METHOD_CODES[method])
+        for i, first in enumerate(options):
+            for j, second in [(-1, None)] + list(enumerate(options)):
+                if i == j:
+                    continue
+                label = first if second is None else first + SEPARATOR + second
+                codes[(method, i, j)] = label_codes.setdefault(label, len(label_codes))
+    return list(label_codes), codes
+
+
+REASON_LABELS, _REASON_CODES = _reason_labels()
+MAX_REASON_OPTIONS = max(len(reason_options(m)) for m in METHOD_CODES)
+REASON_OPTION_COUNTS = np.array([len(reason_options(m)) for m in METHOD_CODES])
+
+# 代碼表：[方式, 第一個原因, 第二個原因 + 1] -> 原因文字代碼（第二個原因為 -1 時取索引 0）
+_REASON_TABLE = np.zeros((len(METHOD_CODES), MAX_REASON_OPTIONS, MAX_REASON_OPTIONS + 1), dtype=np.int32)
+for (_method, _first, _second), _code in _REASON_CODES.items():
+    _REASON_TABLE[_method, _first, _second + 1] = _code
+
+
+def _categorical(codes, column=None, categories=None):
+    if column is not None:
+        dtype = pd.CategoricalDtype(VOCABULARIES[column], ordered=True)
+    else:
+        dtype = pd.CategoricalDtype(categories)
+    return pd.Categorical.from_codes(codes, dtype=dtype)
+
+
+def _department_counts(rng, count, target_compliance, target_correctness):
+    """單一單位的 (沒有洗手次數, 不正確次數)"""
+    # 為此單位設定遵從率和正確率（確保不低於最低標準）
+    dept_compliance = max(MIN_DEPT_COMPLIANCE, rng.uniform(target_compliance - 0.03, target_compliance + 0.03))
+    dept_correctness = max(MIN_DEPT_CORRECTNESS, rng.uniform(target_correctness - 0.02, target_correctness + 0.02))
+
+    # 無條件進位，確保遵從率、正確率不低於下限
+    compliant_count = math.ceil(count * dept_compliance)
+    correct_count = math.ceil(compliant_count * dept_correctness)
+    return count - compliant_count, compliant_count - correct_count
+
+
+def _department_block(rng, year, month, dept, start, stop, non_compliant_count, incorrect_count):
+    """生成單一單位第 start ~ stop 筆的整欄資料（DataFrame，全部為類別欄位）
+
+    單位內前 non_compliant_count 筆沒有洗手，接著 incorrect_count 筆不正確，其餘正確；
+    大單位可分段產生，每段只配置該段的陣列。
+    """
+    count = stop - start
+    position = np.arange(start, stop)
+    non_compliant = position < non_compliant_count
+    incorrect = ~non_compliant & (position < non_compliant_count + incorrect_count)
+
+    method = rng.integers(0, 2, size=count)
+    method[non_compliant] = NONE
+    # 代碼順序同 schema.CORRECTNESS_VALUES：0 正確、1 不正確、2 未評估
+    correctness = np.zeros(count, dtype=np.int8)
+    correctness[non_compliant] = 2
+    correctness[incorrect] = 1
+
+    # 不正確原因（可複選，隨機生成1-2個原因）：以隨機排序取前兩個選項，再查代碼表
+    reason = np.zeros(count, dtype=np.int32)
+    n_incorrect = int(np.count_nonzero(incorrect))
+    if n_incorrect:
+        inc_method = method[incorrect]
+        keys = rng.random((n_incorrect, MAX_REASON_OPTIONS))
+        keys[np.arange(MAX_REASON_OPTIONS) >= REASON_OPTION_COUNTS[inc_method][:, None]] = np.inf
+        order = np.argsort(keys, axis=1)
+        two = rng.random(n_incorrect) < 0.3
+        second = np.where(two, order[:, 1], -1)
+        reason[incorrect] = _REASON_TABLE[inc_method, order[:, 0], second + 1]
+
+    day = rng.integers(0, DAYS_PER_MONTH, size=count)
+    seconds = rng.integers(0, len(TIME_LABELS), size=count)
+    auditor = rng.integers(0, len(auditors), size=count)
+    dept_codes = np.full(count, DEPARTMENTS.index(dept))
+
+    date_labels = [f"{year}-{month:02d}-{d:02d}" for d in range(1, DAYS_PER_MONTH + 1)]
+    data = {
+        "登入者Email": _categorical(auditor, categories=[f"{a}@hospital.com" for a in auditors]),
+        "稽核日期": _categorical(day, categories=date_labels),
+        "稽核時間": _categorical(seconds, categories=TIME_LABELS),
+        "稽核月份": _categorical(np.full(count, month - 1), "稽核月份"),
+        "稽核者單位": _categorical(dept_codes, "稽核者單位"),
+        "稽核人員": _categorical(auditor, categories=auditors),
+        "受稽核人員類別": _categorical(rng.integers(0, len(STAFF_CATEGORIES), size=count), "受稽核人員類別"),
+        "受稽核者單位": _categorical(dept_codes, "受稽核者單位"),  # 簡化：假設都在同一單位
+        "手部衛生時機": _categorical(rng.integers(0, len(HYGIENE_MOMENTS), size=count), "手部衛生時機"),
+        "手部衛生方式": _categorical(method, "手部衛生方式"),
+        "手部衛生正確性": _categorical(correctness, "手部衛生正確性"),
+        "不正確原因": _categorical(reason, categories=REASON_LABELS),
+    }
+    return pd.DataFrame({column: data[column] for column in COLUMNS})
+
+
+def generate_month_frames(year, month, seed, rows_per_month=DEFAULT_ROWS_PER_MONTH,
+                          chunk_rows=DEFAULT_CHUNK_ROWS):
+    """逐塊產生單月資料；seed 為此月份專屬的 np.random.SeedSequence"""
+    rng = np.random.default_rng(seed)
+
     # 為每月設定目標遵從率和正確率（在範圍內隨機）
-    target_compliance = random.uniform(0.920, 0.970)
-    target_correctness = random.uniform(0.950, 0.980)
-    
-    print(f"  ⏳ 生成 {month}月資料（目標遵從率: {target_compliance:.1%}, 正確率: {target_correctness:.1%}）...")
-    month_records = generate_month_data(2025, month, target_compliance, target_correctness)
-    all_records.extend(month_records)
-    
-    print(f"  ✅ {month}月完成：{len(month_records)} 筆記錄")
-
-# 創建 DataFrame
-df = pd.DataFrame(all_records)
-
-# 輸出為 Excel
-output_file = "手部衛生稽核模擬資料_2025年.xlsx"
-df.to_excel(output_file, index=False, engine='openpyxl')
-
-print(f"\n✅ 完成！共生成 {len(all_records)} 筆記錄")
-print(f"📊 檔案已儲存：{output_file}")
-
-# 計算統計資料
-print("\n📈 統計摘要：")
-for month in range(1, 13):
-    month_df = df[df['稽核月份'] == f"{month}月"]
-    total = len(month_df)
-    compliant = len(month_df[month_df['手部衛生方式'] != "沒有洗手"])
-    correct = len(month_df[month_df['手部衛生正確性'] == "正確(七步驟完全正確)"])
-    
-    compliance_rate = (compliant / total * 100) if total > 0 else 0
-    correctness_rate = (correct / compliant * 100) if compliant > 0 else 0
-    
-    print(f"  {month}月：{total}次，遵從率 {compliance_rate:.1f}%，正確率 {correctness_rate:.1f}%")
-
-print("\n🎉 模擬資料生成完成！")
+    target_compliance = rng.uniform(0.920, 0.970)
+    target_correctness = rng.uniform(0.950, 0.980)
+
+    # 每月總次數，確保每個單位至少30次，其餘平均隨機分配
+    low, high = rows_per_month
+    total_count = max(int(rng.integers(low, high + 1)), len(DEPARTMENTS) * MIN_PER_DEPT)
+    remaining = total_count - len(DEPARTMENTS) * MIN_PER_DEPT
+    dept_counts = MIN_PER_DEPT + rng.multinomial(remaining, np.full(len(DEPARTMENTS), 1 / len(DEPARTMENTS)))
+
+    # 每塊最多 chunk_rows 筆：大單位切成多段，記憶體用量不受單位大小影響
+    chunk_rows = max(1, int(chunk_rows))
+    blocks = []
+    block_rows = 0
+    for dept, count in zip(DEPARTMENTS, dept_counts):
+        count = int(count)
+        non_compliant_count, incorrect_count = _department_counts(rng, count, target_compliance, target_correctness)
+        start = 0
+        while start < count:
+            stop = min(count, start + chunk_rows - block_rows)
+            blocks.append(_department_block(rng, year, month, dept, start, stop,
+                                            non_compliant_count, incorrect_count))
+            block_rows += stop - start
+            start = stop
+            if block_rows >= chunk_rows:
+                yield pd.concat(blocks, ignore_index=True)
+                blocks = []
+                block_rows = 0
+    if blocks:
+        yield pd.concat(blocks, ignore_index=True)
+
+
+def generate_month_data(year, month, seed, rows_per_month=DEFAULT_ROWS_PER_MONTH):
+    """生成單月完整資料（DataFrame）"""
+    return pd.concat(list(generate_month_frames(year, month, seed, rows_per_month)), ignore_index=True)
+
+
+def _write_month(task):
+    """產生單月資料並逐塊寫入檔案，回傳 (年, 月, 月份計數表)"""
+    year, month, seed, rows_per_month, chunk_rows, fmt, path = task
+    counts = None
+    writer = None
+    try:
+        for i, frame in enumerate(generate_month_frames(year, month, seed, rows_per_month, chunk_rows)):
+            chunk_counts = compliance_counts(frame, by=["稽核月份"])
+            counts = chunk_counts if counts is None else counts.add(chunk_counts, fill_value=0)
+            if fmt == "parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                from columnar import to_columnar_frame, PARQUET_COMPRESSION
+                table = pa.Table.from_pandas(to_columnar_frame(frame), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema, compression=PARQUET_COMPRESSION)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                frame.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    finally:
+        if writer is not None:
+            writer.close()
+    return year, month, counts
+
+
+def _collect_month(task):
+    """產生單月資料並回傳完整 DataFrame（Excel 輸出用）"""
+    year, month, seed, rows_per_month = task
+    return year, month, generate_month_data(year, month, seed, rows_per_month)
+
+
+def print_summary(counts):
+    """列印各月份遵從率與正確率"""
+    print("\n📈 統計摘要：")
+    for (year, month_label), row in with_rates(counts).iterrows():
+        total = int(row[COUNT])
+        compliance_rate = row[COMPLIANCE_RATE] * 100
+        correctness_rate = row[CORRECTNESS_RATE] * 100 if row[COMPLIANT] > 0 else 0
+        print(f"  {year}年{month_label}：{total}次，遵從率 {compliance_rate:.1f}%，正確率 {correctness_rate:.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成手部衛生稽核模擬資料")
+    parser.add_argument("--years", type=int, nargs="+", default=[2025], help="年份（可多個）")
+    parser.add_argument("--rows-per-month", type=int, nargs=2, default=list(DEFAULT_ROWS_PER_MONTH),
+                        metavar=("MIN", "MAX"), help="每月總次數範圍")
+    parser.add_argument("--format", choices=["xlsx", "parquet", "csv"], default="xlsx")
+    parser.add_argument("--output", help="輸出檔（xlsx）或輸出資料夾（parquet/csv）")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="平行產生的程序數")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="每次寫入的最大列數")
+    args = parser.parse_args(argv)
+
+    months = [(year, month) for year in args.years for month in range(1, 13)]
+    # 每個月份獨立的亂數子序列：結果與平行程度無關
+    seeds = np.random.SeedSequence(args.seed).spawn(len(months))
+    rows_per_month = tuple(args.rows_per_month)
+    year_text = "、".join(str(y) for y in args.years)
+
+    print(f"🔄 開始生成{year_text}年手部衛生稽核模擬資料...")
+    started = time.perf_counter()
+
+    if args.format == "xlsx":
+        output = args.output or f"手部衛生稽核模擬資料_{year_text}年.xlsx"
+        from columnar import write_excel_chunks
+
+        tasks = [(year, month, seed, rows_per_month) for (year, month), seed in zip(months, seeds)]
+        parts = []
+
+        def month_frames(results):
+            # 依月份順序逐一寫入，寫完的月份不再保留
+            for _, _, frame in results:
+                parts.append(compliance_counts(frame, by=["稽核月份"]))
+                yield frame
+
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            total = write_excel_chunks(output, month_frames(pool.map(_collect_month, tasks)))
+        counts = pd.concat(parts)
+    else:
+        output = args.output or f"mock_data_{args.format}"
+        os.makedirs(output, exist_ok=True)
+        tasks = [
+            (year, month, seed, rows_per_month, args.chunk_rows, args.format,
+             os.path.join(output, f"{year}-{month:02d}.{args.format}"))
+            for (year, month), seed in zip(months, seeds)
+        ]
+        parts = []
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for year, month, month_counts in pool.map(_write_month, tasks):
+                parts.append(month_counts)
+                print(f"  ✅ {year}年{month}月完成：{int(month_counts[COUNT].sum())} 筆記錄")
+        counts = pd.concat(parts)
+        total = int(counts[COUNT].sum())
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ 完成！共生成 {total} 筆記錄（{elapsed:.1f} 秒，{total / elapsed:,.0f} 筆/秒）")
+    print(f"📊 檔案已儲存：{output}")
+    print_summary(counts)
+    print("\n🎉 模擬資料生成完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""歷史稽核資料匯入（Excel / CSV -> 各月份分區）
+
+來源檔以串流方式讀取（Excel 使用 openpyxl 唯讀模式，CSV 逐列讀取），不會整個載入記憶體。
+每讀取 batch_rows 筆，依「{年}年{月}」分組後每個分區呼叫一次 backend.append_rows，
+寫入成功後更新進度檔（checkpoint），中斷後重新執行會從上次完成的位置繼續。
+
+每筆資料給予由來源檔與列號決定的紀錄ID，續傳時第一批會先排除分區中已存在的紀錄ID，
+因此在寫入後、更新進度檔前中斷也不會產生重複列。
+"""
+import csv
+import datetime
+import json
+import os
+import time
+import zlib
+from collections import defaultdict
+
+from schema import (COLUMNS, DATE_COLUMN, TIME_COLUMN, DATE_FORMAT, TIME_FORMAT, RECORD_ID_FIELD,
+                    normalize_record, validate_record)
+from worksheet_cache import month_partition
+
+DEFAULT_BATCH_ROWS = 5000          # 每批讀取的來源列數（每個分區一次 append_rows）
+CHECKPOINT_SUFFIX = ".import.json"
+CHECKPOINT_VERSION = 1
+
+# 匯入的分區欄位：工作表欄位加上紀錄ID
+IMPORT_HEADERS = list(COLUMNS) + [RECORD_ID_FIELD]
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+
+
+def source_fingerprint(path):
+    """來源檔的大小與修改時間；與進度檔不符時表示檔案已變更"""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _cell_text(value):
+    """Excel 儲存格的值轉為工作表格式的文字"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime.datetime):
+        if value.time() == datetime.time():
+            return value.strftime(DATE_FORMAT)
+        return value.strftime(f"{DATE_FORMAT} {TIME_FORMAT}")
+    if isinstance(value, datetime.date):
+        return value.strftime(DATE_FORMAT)
+    if isinstance(value, datetime.time):
+        return value.strftime(TIME_FORMAT)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _iter_excel(path):
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        # 依序讀取所有標題列含有稽核日期的工作表（一個檔案可能每月一個工作表）
+        for worksheet in workbook.worksheets:
+            rows = worksheet.iter_rows(values_only=True)
+            headers = [_cell_text(value) for value in next(rows, ())]
+            if DATE_COLUMN not in headers:
+                continue
+            for row in rows:
+                if any(value is not None for value in row):
+                    yield dict(zip(headers, map(_cell_text, row)))
+    finally:
+        workbook.close()
+
+
+def _iter_csv(path):
+    # utf-8-sig：Excel 另存的 CSV 開頭有 BOM
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        headers = [header.strip() for header in next(reader, [])]
+        for row in reader:
+            if any(value.strip() for value in row):
+                yield dict(zip(headers, (value.strip() for value in row)))
+
+
+def iter_source_records(path):
+    """逐筆讀取來源檔，回傳 {欄位: 文字}"""
+    if path.lower().endswith(EXCEL_EXTENSIONS):
+        return _iter_excel(path)
+    return _iter_csv(path)
+
+
+def partition_for(record):
+    """記錄所屬的月份分區（年度由稽核日期與稽核月份決定）；無法判斷時回傳 None"""
+    try:
+        audit_date = datetime.datetime.strptime(record.get(DATE_COLUMN, "")[:10], DATE_FORMAT)
+    except ValueError:
+        return None
+    audit_month = record.get("稽核月份") or f"{audit_date.month}月"
+    return month_partition(audit_date, audit_month)
+
+
+def _prepare(record):
+    """標準化並驗證一筆來源記錄，回傳 (記錄, 錯誤訊息或 None)"""
+    record = normalize_record({column: record.get(column, "") for column in IMPORT_HEADERS})
+    # 稽核日期欄可能含時間（Excel 的日期時間儲存格）
+    date_text = record[DATE_COLUMN]
+    if len(date_text) > 10 and not record[TIME_COLUMN]:
+        record[TIME_COLUMN] = date_text[11:19]
+    record[DATE_COLUMN] = date_text[:10]
+    errors = validate_record(record)
+    if errors:
+        return record, errors[0]
+    if partition_for(record) is None:
+        return record, f"稽核日期格式不正確：{date_text}"
+    return record, None
+
+
+class ImportCheckpoint:
+    """匯入進度檔（JSON）；每批寫入成功後以暫存檔取代，避免中斷時損毀"""
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.fingerprint = source_fingerprint(source)
+        self.rows_done = 0          # 已處理的來源列數（含略過的列）
+        self.rows_written = 0
+        self.rows_rejected = 0
+        self.elapsed = 0.0          # 累計寫入秒數（跨多次執行）
+        self.partitions = {}
+        self.finished = False
+
+    @classmethod
+    def load(cls, path, source):
+        """讀取進度檔；不存在時回傳新的進度，來源檔已變更時拋出 ValueError"""
+        checkpoint = cls(path, source)
+        if not os.path.exists(path):
+            return checkpoint
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("fingerprint") != checkpoint.fingerprint:
+            raise ValueError(f"{source} 在上次匯入後已變更，請以 --restart 重新匯入")
+        checkpoint.rows_done = data["rows_done"]
+        checkpoint.rows_written = data["rows_written"]
+        checkpoint.rows_rejected = data["rows_rejected"]
+        checkpoint.elapsed = data["elapsed"]
+        checkpoint.partitions = data["partitions"]
+        checkpoint.finished = data["finished"]
+        return checkpoint
+
+    def save(self):
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "source": self.source,
+            "fingerprint": self.fingerprint,
+            "rows_done": self.rows_done,
+            "rows_written": self.rows_written,
+            "rows_rejected": self.rows_rejected,
+            "elapsed": round(self.elapsed, 3),
+            "partitions": self.partitions,
+            "finished": self.finished,
+            "updated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class HistoricalImport:
+    """將一個來源檔匯入儲存後端
+
+    backend：storage.StorageBackend；checkpoint_path 預設為「來源檔.import.json」；
+    rejects_path 指定時，未通過驗證的列連同原因附加寫入該 CSV。
+    """
+
+    def __init__(self, backend, source, checkpoint_path=None, batch_rows=DEFAULT_BATCH_ROWS,
+                 rejects_path=None, restart=False, clock=time.monotonic):
+        self.backend = backend
+        self.source = source
+        self.checkpoint_path = checkpoint_path or source + CHECKPOINT_SUFFIX
+        self.batch_rows = max(1, int(batch_rows))
+        self.rejects_path = rejects_path
+        self._clock = clock
+        if restart and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self.checkpoint = ImportCheckpoint.load(self.checkpoint_path, source)
+        # 紀錄ID 前綴：由檔名與大小決定，同一個來源檔每次匯入都相同
+        key = f"{os.path.basename(source)}:{self.checkpoint.fingerprint['size']}"
+        self._id_prefix = "import-{:08x}".format(zlib.crc32(key.encode("utf-8")))
+        self._partition_headers = {}
+
+        # 本次執行的統計
+        self.rows_written = 0
+        self.rows_skipped_existing = 0
+        self.append_calls = 0
+        self.elapsed = 0.0
+
+    @property
+    def resumed(self):
+        return self.checkpoint.rows_done > 0
+
+    @property
+    def rows_per_second(self):
+        return self.rows_written / self.elapsed if self.elapsed else 0.0
+
+    def run(self, progress=None):
+        """執行匯入（已完成時直接返回）；每批寫入後呼叫 progress(self)"""
+        checkpoint = self.checkpoint
+        if checkpoint.finished:
+            return self
+        started = self._clock()
+        # 續傳的第一批可能已寫入但尚未記錄進度，需先比對紀錄ID
+        verify = self.resumed
+        position = 0
+        batch = []
+        for record in iter_source_records(self.source):
+            position += 1
+            if position <= checkpoint.rows_done:
+                continue
+            batch.append((position, record))
+            if len(batch) >= self.batch_rows:
+                self._write_batch(batch, verify, started)
+                verify = False
+                batch = []
+                if progress is not None:
+                    progress(self)
+        if batch:
+            self._write_batch(batch, verify, started)
+        checkpoint.finished = True
+        checkpoint.save()
+        if progress is not None:
+            progress(self)
+        return self
+
+    def _write_batch(self, batch, verify, started):
+        checkpoint = self.checkpoint
+        grouped = defaultdict(list)
+        rejects = []
+        for position, source_record in batch:
+            record, error = _prepare(source_record)
+            if error is not None:
+                rejects.append((position, error, record))
+                continue
+            if not record[RECORD_ID_FIELD]:
+                record[RECORD_ID_FIELD] = f"{self._id_prefix}-{position}"
+            grouped[partition_for(record)].append(record)
+
+        for name, records in grouped.items():
+            headers = self._headers_for(name)
+            # 進度檔的筆數包含上次中斷前已寫入的列
+            checkpoint.partitions[name] = checkpoint.partitions.get(name, 0) + len(records)
+            checkpoint.rows_written += len(records)
+            if verify and RECORD_ID_FIELD in headers:
+                existing = set(self.backend.column_values(name, RECORD_ID_FIELD))
+                kept = [record for record in records if record[RECORD_ID_FIELD] not in existing]
+                self.rows_skipped_existing += len(records) - len(kept)
+                records = kept
+            if records:
+                self.backend.append_rows(name, [[record.get(h, "") for h in headers] for record in records],
+                                         headers)
+                self.append_calls += 1
+                self.rows_written += len(records)
+
+        if rejects:
+            self._write_rejects(rejects)
+        checkpoint.rows_rejected += len(rejects)
+        checkpoint.rows_done = batch[-1][0]
+        now = self._clock()
+        checkpoint.elapsed += now - started - self.elapsed
+        self.elapsed = now - started
+        checkpoint.save()
+
+    def _headers_for(self, name):
+        """分區既有的標題列（可能是較舊的欄位順序），新分區使用 IMPORT_HEADERS"""
+        headers = self._partition_headers.get(name)
+        if headers is None:
+            existing = self.backend.headers(name) if name in self.backend.list_partitions() else []
+            headers = self._partition_headers[name] = list(existing) or IMPORT_HEADERS
+        return headers
+
+    def _write_rejects(self, rejects):
+        if not self.rejects_path:
+            return
+        new_file = not os.path.exists(self.rejects_path)
+        with open(self.rejects_path, "a", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(["來源檔", "列號", "原因"] + IMPORT_HEADERS)
+            for position, error, record in rejects:
+                writer.writerow([self.source, position, error] + [record.get(h, "") for h in IMPORT_HEADERS])
@@ -0,0 +1,159 @@
+"""本機觀察記錄日誌：先寫入 SQLite（WAL 模式），再由背景執行緒同步到雲端"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from schema import RECORD_ID_FIELD
+
+DEFAULT_JOURNAL_PATH = "audit_journal.sqlite3"
+
+# 同步狀態
+PENDING = "pending"
+SYNCED = "synced"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    uid         TEXT NOT NULL UNIQUE,
+    sheet_name  TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    created_at  REAL NOT NULL,
+    synced_at   REAL,
+    last_error  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_observations_status ON observations (status, seq);
+"""
+
+
+def new_record_id():
+    """產生記錄唯一編號"""
+    return uuid.uuid4().hex
+
+
+class JournalEntry:
+    """日誌中的一筆待同步記錄"""
+
+    __slots__ = ("uid", "sheet_name", "record", "attempts")
+
+    def __init__(self, uid, sheet_name, record, attempts):
+        self.uid = uid
+        self.sheet_name = sheet_name
+        self.record = record
+        self.attempts = attempts
+
+
+class ObservationJournal:
+    """append-only 的本機日誌
+
+    每筆記錄以前端產生的 UUID 為唯一鍵，重複提交（重送、連點）
+    只會保留第一筆。多個執行緒共用同一個連線，以 lock 保護。
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def append(self, record, sheet_name, uid=None):
+        """寫入一筆記錄，回傳 (uid, 是否為新記錄)"""
+        uid = uid or record.get(RECORD_ID_FIELD) or new_record_id()
+        payload = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO observations (uid, sheet_name, payload, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (uid, sheet_name, payload, time.time()),
+            )
+        return uid, cursor.rowcount == 1
+
+    def append_many(self, records, sheet_name):
+        """在同一個交易中寫入多筆記錄，回傳 [(uid, 是否為新記錄)]"""
+        now = time.time()
+        results = []
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for record in records:
+                    uid = record.get(RECORD_ID_FIELD) or new_record_id()
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO observations (uid, sheet_name, payload, created_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (uid, sheet_name, json.dumps(record, ensure_ascii=False), now),
+                    )
+                    results.append((uid, cursor.rowcount == 1))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return results
+
+    def pending(self, limit=500):
+        """依寫入順序取出待同步記錄"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT uid, sheet_name, payload, attempts FROM observations "
+                "WHERE status = ? ORDER BY seq LIMIT ?",
+                (PENDING, limit),
+            ).fetchall()
+        return [JournalEntry(uid, sheet, json.loads(payload), attempts)
+                for uid, sheet, payload, attempts in rows]
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM observations WHERE status = ?", (PENDING,)
+            ).fetchone()[0]
+
+    def mark_attempt(self, uids):
+        """寫入雲端前先記錄嘗試次數，重送時據此檢查是否已寫入"""
+        self._update_many(
+            "UPDATE observations SET attempts = attempts + 1 WHERE uid = ?",
+            [(uid,) for uid in uids],
+        )
+
+    def mark_synced(self, uids):
+        now = time.time()
+        self._update_many(
+            "UPDATE observations SET status = ?, synced_at = ?, last_error = NULL WHERE uid = ?",
+            [(SYNCED, now, uid) for uid in uids],
+        )
+
+    def mark_failed(self, uids, error):
+        self._update_many(
+            "UPDATE observations SET last_error = ? WHERE uid = ?",
+            [(str(error), uid) for uid in uids],
+        )
+
+    def status(self, uids):
+        """查詢多筆記錄的同步狀態，回傳 {uid: (status, last_error)}"""
+        uids = list(uids)
+        if not uids:
+            return {}
+        placeholders = ",".join("?" * len(uids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT uid, status, last_error FROM observations WHERE uid IN ({placeholders})",
+                uids,
+            ).fetchall()
+        return {uid: (status, last_error) for uid, status, last_error in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _update_many(self, sql, params):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(sql, params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
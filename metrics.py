@@ -0,0 +1,300 @@
+"""程序層級的效能指標
+
+- 計時直方圖：每個（名稱, 標籤）一組，記錄次數、總秒數、錯誤次數與各區間次數
+- 計數器：例如配額限速次數
+- 統計來源：QuotaClient、批次寫入器、讀取快取、工作表快取的 stats()，匯出時才呼叫
+
+同一個 Streamlit 程序中的所有 session 共用 REGISTRY；MetricsExporter 定期寫出
+JSON 與 Prometheus 文字格式檔案供本機監控讀取。只使用標準函式庫，匯入成本極低。
+
+    with timer("save_record"):
+        ...
+    lap = stopwatch("app_section")   # 逐段計時（Streamlit 腳本不需縮排）
+    lap("login")
+"""
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# 直方圖區間上限（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_EXPORT_INTERVAL = 60.0    # 秒
+DEFAULT_JSON_PATH = "metrics.json"
+DEFAULT_PROMETHEUS_PATH = "metrics.prom"
+NAMESPACE = "hand_hygiene"
+
+_INVALID_NAME = re.compile(r"[^a-zA-Z0-9_]")
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum", "errors", "max")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)    # 最後一格為超過最大區間
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+        self.max = 0.0
+
+    def observe(self, seconds, error=False):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if error:
+            self.errors += 1
+
+    def quantile(self, q):
+        """由區間次數估計分位數（區間內線性內插）"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for i, n in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.max
+            if n and cumulative + n >= rank:
+                return lower + (upper - lower) * (rank - cumulative) / n
+            cumulative += n
+            lower = upper
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "sum_s": round(self.sum, 6),
+            "mean_s": round(self.sum / self.count, 6) if self.count else None,
+            "p50_s": _round(self.quantile(0.5)),
+            "p95_s": _round(self.quantile(0.95)),
+            "p99_s": _round(self.quantile(0.99)),
+            "max_s": round(self.max, 6),
+            "buckets": {str(le): n for le, n in zip(list(self.buckets) + ["+Inf"], self.counts)},
+        }
+
+
+def _round(value):
+    return None if value is None else round(value, 6)
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class MetricsRegistry:
+    def __init__(self, buckets=DEFAULT_BUCKETS, clock=time.perf_counter):
+        self.buckets = tuple(buckets)
+        self._clock = clock
+        self._histograms = {}
+        self._counters = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def observe(self, name, seconds, error=False, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds, error)
+
+    def increment(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """計時區塊；拋出 Exception 時計為錯誤（st.stop / st.rerun 不算錯誤）"""
+        started = self._clock()
+        error = False
+        try:
+            yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.observe(name, self._clock() - started, error, **labels)
+
+    def timed(self, name, **labels):
+        """函式裝飾器版本的 timer"""
+        def decorate(func):
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+            wrapper.__name__ = func.__name__
+            wrapper.__doc__ = func.__doc__
+            return wrapper
+        return decorate
+
+    def stopwatch(self, name, total_name=None):
+        """逐段計時：每次呼叫 lap(區段) 記錄距上一段結束的時間（標籤 section）"""
+        return Stopwatch(self, name, total_name)
+
+    def register_collector(self, name, stats):
+        """註冊統計來源：stats() 回傳 {欄位: 數值}，匯出時才呼叫；同名稱以最後註冊者為準"""
+        with self._lock:
+            self._collectors[name] = stats
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+    def snapshot(self):
+        """目前所有指標（可直接轉為 JSON）"""
+        with self._lock:
+            histograms = [
+                {"name": name, "labels": dict(labels), **histogram.snapshot()}
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            collectors = dict(self._collectors)
+        stats = {}
+        for name, collect in sorted(collectors.items()):
+            try:
+                stats[name] = collect()
+            except Exception as e:
+                stats[name] = {"error": str(e)}
+        return {
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "generated_at": time.time(),
+            "histograms": histograms,
+            "counters": counters,
+            "stats": stats,
+        }
+
+    def to_prometheus(self, snapshot=None, namespace=NAMESPACE):
+        """Prometheus 文字格式"""
+        snapshot = snapshot or self.snapshot()
+        lines = []
+        typed = set()
+
+        def declare(metric, kind):
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} {kind}")
+
+        for item in snapshot["histograms"]:
+            metric = _metric_name(namespace, item["name"], "seconds")
+            labels = item["labels"]
+            declare(metric, "histogram")
+            cumulative = 0
+            for le, n in item["buckets"].items():
+                cumulative += n
+                lines.append(f"{metric}_bucket{_labels(labels, le=le)} {cumulative}")
+            lines.append(f"{metric}_sum{_labels(labels)} {item['sum_s']}")
+            lines.append(f"{metric}_count{_labels(labels)} {item['count']}")
+        for item in snapshot["histograms"]:
+            metric = _metric_name(namespace, item["name"], "errors_total")
+            declare(metric, "counter")
+            lines.append(f"{metric}{_labels(item['labels'])} {item['errors']}")
+        for item in snapshot["counters"]:
+            metric = _metric_name(namespace, item["name"], "total")
+            declare(metric, "counter")
+            lines.append(f"{metric}{_labels(item['labels'])} {item['value']}")
+        for source, values in snapshot["stats"].items():
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                metric = _metric_name(namespace, source, key)
+                declare(metric, "gauge")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class Stopwatch:
+    def __init__(self, registry, name, total_name=None):
+        self.registry = registry
+        self.name = name
+        self.total_name = total_name
+        self._started = self._last = registry._clock()
+
+    def __call__(self, section):
+        now = self.registry._clock()
+        self.registry.observe(self.name, now - self._last, section=section)
+        self._last = now
+
+    def finish(self):
+        """記錄從建立到現在的總時間（total_name）"""
+        if self.total_name:
+            self.registry.observe(self.total_name, self.registry._clock() - self._started)
+
+
+def _metric_name(namespace, *parts):
+    return _INVALID_NAME.sub("_", "_".join((namespace,) + parts))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, **extra):
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{_INVALID_NAME.sub("_", key)}="{_escape(value)}"' for key, value in items) + "}"
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class MetricsExporter:
+    """背景執行緒：每 interval 秒將指標寫入 JSON 與 Prometheus 文字檔（未指定路徑者略過）"""
+
+    def __init__(self, registry, json_path=DEFAULT_JSON_PATH, prometheus_path=DEFAULT_PROMETHEUS_PATH,
+                 interval=DEFAULT_EXPORT_INTERVAL):
+        self.registry = registry
+        self.json_path = json_path
+        self.prometheus_path = prometheus_path
+        self.interval = max(1.0, float(interval))
+        self.exports = 0
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self):
+        snapshot = self.registry.snapshot()
+        if self.json_path:
+            _write_atomic(self.json_path, json.dumps(snapshot, ensure_ascii=False, indent=2))
+        if self.prometheus_path:
+            _write_atomic(self.prometheus_path, self.registry.to_prometheus(snapshot))
+        self.exports += 1
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.export()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+
+
+# 程序內共用的指標
+REGISTRY = MetricsRegistry()
+timer = REGISTRY.timer
+timed = REGISTRY.timed
+observe = REGISTRY.observe
+increment = REGISTRY.increment
+stopwatch = REGISTRY.stopwatch
+register_collector = REGISTRY.register_collector
@@ -0,0 +1,143 @@
+"""精簡的觀察記錄型別
+
+工作表的一列是 12 個中文長字串；Observation 改以小整數代碼（見 schema.CODE_TABLES）
+與 epoch 秒數保存，可與工作表列格式互相無損轉換。
+大量記錄使用 ObservationArray，以 array 逐欄保存。
+"""
+import calendar
+from array import array
+from datetime import datetime, timedelta
+
+from schema import (COLUMNS, CODE_TABLES, RECORD_ID_FIELD, DATE_COLUMN, TIME_COLUMN,
+                    DATE_FORMAT, TIME_FORMAT)
+
+# 以代碼保存的欄位（順序即 __slots__ 中的欄位順序）
+CODED_FIELDS = [
+    ("email", "登入者Email"),
+    ("month", "稽核月份"),
+    ("department", "稽核者單位"),
+    ("auditor", "稽核人員"),
+    ("staff_category", "受稽核人員類別"),
+    ("staff_unit", "受稽核者單位"),
+    ("moment", "手部衛生時機"),
+    ("method", "手部衛生方式"),
+    ("correctness", "手部衛生正確性"),
+    ("reason", "不正確原因"),
+]
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_timestamp(audit_date, audit_time):
+    """「2025-01-05」「08:30:00」-> epoch 秒數（以當地時間計，不做時區換算）"""
+    dt = datetime.fromisoformat(f"{audit_date} {audit_time}")
+    return calendar.timegm(dt.timetuple())
+
+
+def from_timestamp(timestamp):
+    """epoch 秒數 -> (稽核日期, 稽核時間) 字串"""
+    dt = _EPOCH + timedelta(seconds=timestamp)
+    return dt.strftime(DATE_FORMAT), dt.strftime(TIME_FORMAT)
+
+
+class Observation:
+    """一筆觀察記錄：代碼 + 時間戳"""
+
+    __slots__ = ("timestamp", "uid") + tuple(name for name, _ in CODED_FIELDS)
+
+    def __init__(self, timestamp, uid=None, **codes):
+        self.timestamp = timestamp
+        self.uid = uid
+        for name, _ in CODED_FIELDS:
+            setattr(self, name, codes[name])
+
+    @classmethod
+    def from_record(cls, record):
+        """由工作表欄位 dict 建立"""
+        codes = {name: CODE_TABLES[column].code(record[column]) for name, column in CODED_FIELDS}
+        return cls(
+            to_timestamp(record[DATE_COLUMN], record[TIME_COLUMN]),
+            uid=record.get(RECORD_ID_FIELD),
+            **codes,
+        )
+
+    @classmethod
+    def from_row(cls, row, headers=COLUMNS):
+        """由工作表的一列（list）建立"""
+        return cls.from_record(dict(zip(headers, row)))
+
+    def to_record(self):
+        """轉回工作表欄位 dict（欄位順序與工作表相同）"""
+        values = {column: CODE_TABLES[column].value(getattr(self, name)) for name, column in CODED_FIELDS}
+        values[DATE_COLUMN], values[TIME_COLUMN] = from_timestamp(self.timestamp)
+        record = {column: values[column] for column in COLUMNS}
+        if self.uid is not None:
+            record[RECORD_ID_FIELD] = self.uid
+        return record
+
+    def to_row(self):
+        return list(self.to_record().values())
+
+    def __repr__(self):
+        return f"Observation({self.to_record()!r})"
+
+
+class ObservationArray:
+    """以 array 逐欄保存的大量觀察記錄"""
+
+    def __init__(self):
+        self.timestamps = array("q")
+        self.codes = {name: array("i") for name, _ in CODED_FIELDS}
+        self.uids = []
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def append(self, observation):
+        self.timestamps.append(observation.timestamp)
+        for name, column_codes in self.codes.items():
+            column_codes.append(getattr(observation, name))
+        self.uids.append(observation.uid)
+
+    def append_record(self, record):
+        self.append(Observation.from_record(record))
+
+    def extend(self, other):
+        self.timestamps.extend(other.timestamps)
+        for name, column_codes in self.codes.items():
+            column_codes.extend(other.codes[name])
+        self.uids.extend(other.uids)
+
+    def __getitem__(self, i):
+        return Observation(
+            self.timestamps[i],
+            uid=self.uids[i],
+            **{name: column_codes[i] for name, column_codes in self.codes.items()},
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_rows(self):
+        """轉為工作表列（list of list）"""
+        return [observation.to_row() for observation in self]
+
+    def to_frame(self):
+        """轉為 DataFrame，代碼欄位直接成為 pandas Categorical（不需逐列轉換字串）"""
+        import numpy as np
+        import pandas as pd
+
+        timestamps = pd.to_datetime(np.frombuffer(self.timestamps, dtype=np.int64), unit="s")
+        data = {
+            DATE_COLUMN: timestamps.strftime(DATE_FORMAT),
+            TIME_COLUMN: timestamps.strftime(TIME_FORMAT),
+        }
+        for name, column in CODED_FIELDS:
+            table = CODE_TABLES[column]
+            codes = np.asarray(self.codes[name], dtype=np.int64)
+            data[column] = pd.Categorical.from_codes(codes, categories=list(table.values))
+        frame = pd.DataFrame({column: data[column] for column in COLUMNS})
+        if any(uid is not None for uid in self.uids):
+            frame[RECORD_ID_FIELD] = self.uids
+        return frame
@@ -0,0 +1,172 @@
+import streamlit as st
+import pandas as pd
+from datetime import date
+from connections import get_storage_backend, get_read_cache, start_connection_monitor, start_metrics_exporter
+from worksheet_cache import parse_month_sheet_name
+from query import query_audits
+from spc import (ControlCharts, PartitionCharts, PERIODS, MONTH, METRICS, PERIOD_COLUMN, RATE, CENTER, UCL, LCL,
+                 UNIT_COLUMN)
+from analytics import compliance_summary, audit_years, GROUP_COLUMNS, YEAR_COLUMN, COUNT, COMPLIANT, CORRECT_COUNT, COMPLIANCE_RATE, CORRECTNESS_RATE
+from schema import DATE_COLUMN
+
+st.set_page_config(
+    page_title="統計儀表板 - 手部衛生稽核系統",
+    page_icon="📈",
+    layout="wide"
+)
+
+start_connection_monitor()
+start_metrics_exporter()
+
+# 需先在主頁登入
+if not st.session_state.get("user_email"):
+    st.warning("請先回到主頁登入")
+    st.stop()
+
+st.title("📈 遵從率與正確率統計")
+
+@st.cache_data
+def load_audit_file(name, content):
+    """讀取上傳的稽核資料"""
+    import io
+    if name.endswith(".csv"):
+        return pd.read_csv(io.BytesIO(content))
+    return pd.read_excel(io.BytesIO(content), engine="openpyxl")
+
+@st.cache_resource
+def get_partition_charts():
+    """跨 session 共用的管制圖計數：各月份分區只累加新讀到的資料列"""
+    return PartitionCharts()
+
+def month_partitions_by_year():
+    """{年度: [月份工作表…]}，依月份排序"""
+    years = {}
+    for title in get_storage_backend().list_partitions():
+        parsed = parse_month_sheet_name(title)
+        if parsed is not None:
+            years.setdefault(parsed[0], []).append((parsed[1], title))
+    return {year: [title for _, title in sorted(months)] for year, months in sorted(years.items(), reverse=True)}
+
+source = st.radio("資料來源", ["雲端資料", "上傳檔案"], horizontal=True)
+
+if source == "雲端資料":
+    # 經由共用讀取快取讀取，重新整理時只下載新增的資料列
+    try:
+        years = month_partitions_by_year()
+    except Exception as e:
+        st.error(f"無法讀取雲端資料: {str(e)}")
+        st.stop()
+    if not years:
+        st.info("目前沒有月份資料")
+        st.stop()
+    col_year, col_refresh = st.columns([3, 1])
+    year = col_year.selectbox("年度", list(years))
+    refresh = col_refresh.button("🔄 重新整理")
+    # 只讀取該年度的月份分區，各分區同時讀取
+    df = query_audits(get_read_cache(), date(year, 1, 1), date(year, 12, 31),
+                      max_staleness=0 if refresh else None)
+    if df.empty:
+        st.info("此年度沒有資料")
+        st.stop()
+else:
+    uploaded = st.file_uploader("上傳稽核資料（Excel 或 CSV）", type=["xlsx", "csv"])
+    if uploaded is None:
+        st.info("請上傳與稽核工作表相同欄位格式的資料檔")
+        st.stop()
+    df = load_audit_file(uploaded.name, uploaded.getvalue())
+
+# 稽核年份由稽核日期計算，供分組與篩選
+if DATE_COLUMN in df:
+    df = df.assign(**{YEAR_COLUMN: audit_years(df)})
+group_columns = [column for column in GROUP_COLUMNS if column in df]
+group_by = st.multiselect("分組欄位", group_columns, default=["稽核月份"])
+
+# 篩選條件
+with st.expander("篩選條件"):
+    filters = {}
+    for column in group_columns:
+        options = sorted(df[column].dropna().unique())
+        selected = st.multiselect(column, options, key=f"filter_{column}")
+        if selected:
+            filters[column] = selected
+
+mask = pd.Series(True, index=df.index)
+for column, selected in filters.items():
+    mask &= df[column].isin(selected)
+df_filtered = df[mask]
+
+overall = compliance_summary(df_filtered).iloc[0]
+col1, col2, col3 = st.columns(3)
+col1.metric("觀察次數", int(overall[COUNT]))
+col2.metric("遵從率", f"{overall[COMPLIANCE_RATE]:.1%}")
+col3.metric("正確率", f"{overall[CORRECTNESS_RATE]:.1%}" if overall[COMPLIANT] else "-")
+
+if group_by:
+    summary = compliance_summary(df_filtered, by=group_by).reset_index()
+    st.dataframe(
+        summary,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            COUNT: st.column_config.NumberColumn(COUNT),
+            COMPLIANT: st.column_config.NumberColumn(COMPLIANT),
+            CORRECT_COUNT: st.column_config.NumberColumn(CORRECT_COUNT),
+            COMPLIANCE_RATE: st.column_config.ProgressColumn(COMPLIANCE_RATE, min_value=0, max_value=1, format="percent"),
+            CORRECTNESS_RATE: st.column_config.ProgressColumn(CORRECTNESS_RATE, min_value=0, max_value=1, format="percent"),
+        }
+    )
+
+# SPC p 管制圖：計數逐筆累加，管制界限在顯示時才計算
+with st.expander("📉 管制圖（p-chart）"):
+    if source == "雲端資料":
+        feed = get_partition_charts()
+        for name in years[year]:
+            headers, rows, version = get_read_cache().get_versioned(name)
+            feed.update(name, headers, rows, version)
+        charts = feed.charts(years[year])
+    else:
+        charts = ControlCharts().backfill(df)
+    units = charts.units()
+    if not units:
+        st.info("沒有可用的稽核日期資料")
+    else:
+        col_unit, col_period, col_metric = st.columns(3)
+        unit = col_unit.selectbox(UNIT_COLUMN, units, key="spc_unit")
+        period = col_period.radio("期間", PERIODS, index=PERIODS.index(MONTH), horizontal=True, key="spc_period")
+        metric = col_metric.radio("指標", METRICS, horizontal=True, key="spc_metric")
+        chart = charts.chart(period, metric, units=[unit])
+        st.line_chart(chart.set_index(PERIOD_COLUMN)[[RATE, CENTER, UCL, LCL]])
+        signals = charts.signals(period, metric)
+        if signals.empty:
+            st.caption("所有單位的各期間都在管制界限內")
+        else:
+            st.markdown(f"**超出管制界限的期間（{len(signals)}）**")
+            st.dataframe(
+                signals,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    column: st.column_config.NumberColumn(column, format="percent")
+                    for column in [RATE, CENTER, UCL, LCL]
+                }
+            )
+
+if source == "雲端資料":
+    # 月份報表：每個稽核單位一個工作表與摘要（以唯寫模式產生）
+    with st.expander("📥 下載月份報表（Excel）"):
+        report_month = st.selectbox("月份", years[year], key="report_month")
+        if st.button("產生報表", key="build_report"):
+            import io
+            from excel_report import MonthlyReport
+            headers, rows = get_read_cache().get(report_month)
+            if not headers:
+                st.info("此月份沒有資料")
+            else:
+                buffer = io.BytesIO()
+                count = MonthlyReport(buffer, report_month, headers).extend(rows).save()
+                st.download_button(
+                    f"下載 {report_month} 報表（{count} 筆）",
+                    buffer.getvalue(),
+                    file_name=f"{report_month}_手部衛生稽核報表.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                )
@@ -0,0 +1,108 @@
+import json
+
+import streamlit as st
+import pandas as pd
+
+import metrics
+from connections import load_secrets_section, start_connection_monitor, start_metrics_exporter
+
+st.set_page_config(
+    page_title="效能指標 - 手部衛生稽核系統",
+    page_icon="⏱️",
+    layout="wide"
+)
+
+start_connection_monitor()
+exporter = start_metrics_exporter()
+
+# 需先在主頁登入，且帳號列於 secrets.toml 的 [metrics] admins
+if not st.session_state.get("user_email"):
+    st.warning("請先回到主頁登入")
+    st.stop()
+admins = [email.lower() for email in load_secrets_section("metrics").get("admins", [])]
+if st.session_state.user_email.lower() not in admins:
+    st.error("此頁面僅限管理者檢視")
+    st.stop()
+
+st.title("⏱️ 效能指標")
+st.caption("本伺服器程序啟動（或重設）以來的累計值，所有使用者共用")
+
+col_refresh, col_reset, _ = st.columns([1, 1, 4])
+if col_refresh.button("🔄 重新整理"):
+    st.rerun()
+if col_reset.button("🗑️ 重設計時"):
+    metrics.REGISTRY.reset()
+    st.rerun()
+
+snapshot = metrics.REGISTRY.snapshot()
+
+def format_labels(labels):
+    return ", ".join(f"{key}={value}" for key, value in labels.items())
+
+def to_ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+st.subheader("延遲")
+if snapshot["histograms"]:
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "名稱": item["name"],
+                "標籤": format_labels(item["labels"]),
+                "次數": item["count"],
+                "錯誤": item["errors"],
+                "平均 (ms)": to_ms(item["mean_s"]),
+                "p50 (ms)": to_ms(item["p50_s"]),
+                "p95 (ms)": to_ms(item["p95_s"]),
+                "p99 (ms)": to_ms(item["p99_s"]),
+                "最大 (ms)": to_ms(item["max_s"]),
+            }
+            for item in snapshot["histograms"]
+        ]),
+        use_container_width=True,
+        hide_index=True
+    )
+else:
+    st.info("尚無計時資料")
+
+st.subheader("計數")
+if snapshot["counters"]:
+    st.dataframe(
+        pd.DataFrame([
+            {"名稱": item["name"], "標籤": format_labels(item["labels"]), "次數": item["value"]}
+            for item in snapshot["counters"]
+        ]),
+        use_container_width=True,
+        hide_index=True
+    )
+else:
+    st.caption("尚未發生配額限速或重試")
+
+st.subheader("元件統計")
+for name, values in snapshot["stats"].items():
+    with st.expander(name):
+        st.json(values)
+
+st.subheader("匯出")
+if exporter is None:
+    st.caption("定期匯出未啟用（[metrics] export_interval = 0）")
+else:
+    paths = [path for path in (exporter.json_path, exporter.prometheus_path) if path]
+    status = f"每 {exporter.interval:g} 秒寫入 {', '.join(paths)}，已匯出 {exporter.exports} 次"
+    if exporter.last_error:
+        status += f"；上次錯誤：{exporter.last_error}"
+    st.caption(status)
+
+col_json, col_prom = st.columns(2)
+col_json.download_button(
+    "📥 下載 JSON",
+    json.dumps(snapshot, ensure_ascii=False, indent=2),
+    file_name="metrics.json",
+    mime="application/json"
+)
+col_prom.download_button(
+    "📥 下載 Prometheus 格式",
+    metrics.REGISTRY.to_prometheus(snapshot),
+    file_name="metrics.prom",
+    mime="text/plain"
+)
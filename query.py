@@ -0,0 +1,162 @@
+"""跨月份分區的稽核資料查詢
+
+    df = query_audits(get_read_cache(), date(2025, 12, 1), date(2026, 2, 28), units=["5A病房"])
+
+依日期範圍算出需要的月份工作表，其他分區完全不讀取；選到的分區以有上限的執行緒池同時讀取
+（直接查詢 Google Sheets 後端時改為一次 values.batchGet）。單位、人員類別、時機的篩選在
+合併前逐分區套用。結果為一個型別化的 DataFrame：稽核日期為 datetime64，選項欄位為
+Categorical（類別依選項表順序，其他值接在後面）。
+
+日期範圍以稽核月份（分區）為準：完整落在範圍內的月份整個分區都保留，範圍起訖所在的月份
+再以稽核日期篩選。
+"""
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from read_cache import PartitionReadCache
+from schema import (COLUMNS, MONTH_LABELS, DEPARTMENTS, STAFF_CATEGORIES, HYGIENE_MOMENTS, HYGIENE_METHODS,
+                    CORRECTNESS_VALUES, DATE_COLUMN, DATE_FORMAT, normalize)
+from storage import GoogleSheetsBackend
+from worksheet_cache import month_sheet_name
+
+DEFAULT_WORKERS = 4     # 同時讀取的分區數（Sheets API 配額另由 QuotaClient 控制）
+
+UNIT_COLUMN = "稽核者單位"
+STAFF_COLUMN = "受稽核人員類別"
+MOMENT_COLUMN = "手部衛生時機"
+
+# 轉為 Categorical 的欄位 -> 類別順序
+CATEGORY_COLUMNS = {
+    "稽核月份": MONTH_LABELS,
+    "稽核者單位": DEPARTMENTS,
+    "受稽核人員類別": STAFF_CATEGORIES,
+    "受稽核者單位": DEPARTMENTS,
+    "手部衛生時機": HYGIENE_MOMENTS,
+    "手部衛生方式": HYGIENE_METHODS,
+    "手部衛生正確性": CORRECTNESS_VALUES,
+}
+
+
+def _as_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.datetime.strptime(value[:10], DATE_FORMAT).date()
+    return value
+
+
+def month_range(start, end):
+    """start 到 end（含）經過的 (年, 月)"""
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _month_span(year, month):
+    first = datetime.date(year, month, 1)
+    following = datetime.date(year + 1, 1, 1) if month == 12 else datetime.date(year, month + 1, 1)
+    return first, following - datetime.timedelta(days=1)
+
+
+def plan_partitions(start, end, existing):
+    """範圍內實際存在的分區，回傳 [(名稱, 是否需以稽核日期篩選)]（依月份排序）"""
+    existing = set(existing)
+    plan = []
+    for year, month in month_range(start, end):
+        name = month_sheet_name(year, f"{month}月")
+        if name in existing:
+            first, last = _month_span(year, month)
+            plan.append((name, first < start or last > end))
+    return plan
+
+
+def fetch_partitions(source, names, workers=DEFAULT_WORKERS, max_staleness=None):
+    """讀取多個分區，回傳 {名稱: (標題列, 資料列)}
+
+    source 可為 PartitionReadCache（經由快取，只下載新增的列）或 StorageBackend。
+    """
+    if not names:
+        return {}
+    if isinstance(source, GoogleSheetsBackend):
+        # 一次 batchGet 讀取所有分區
+        return source.export_partitions(names)
+    if isinstance(source, PartitionReadCache):
+        def read(name):
+            return source.get(name, max_staleness)
+    else:
+        def read(name):
+            return source.headers(name), source.read_rows(name)
+    with ThreadPoolExecutor(max_workers=max(1, min(int(workers), len(names))),
+                            thread_name_prefix="query") as pool:
+        return dict(zip(names, pool.map(read, names)))
+
+
+def _partition_frame(headers, rows, filters, date_range):
+    """單一分區 -> 篩選後的文字 DataFrame"""
+    import pandas as pd
+
+    width = len(headers)
+    padded = [row[:width] + [""] * (width - len(row)) for row in rows]
+    frame = pd.DataFrame(padded, columns=headers, dtype=object)
+    mask = pd.Series(True, index=frame.index)
+    for column, values in filters.items():
+        if column not in frame:
+            return frame.iloc[0:0]
+        mask &= frame[column].isin(values)
+    if date_range is not None and DATE_COLUMN in frame:
+        start, end = date_range
+        # DATE_FORMAT 為 YYYY-MM-DD，可直接以字串比較
+        dates = frame[DATE_COLUMN].str.slice(0, 10)
+        mask &= (dates >= start.strftime(DATE_FORMAT)) & (dates <= end.strftime(DATE_FORMAT))
+    return frame[mask]
+
+
+def typed_frame(frame):
+    """文字欄位轉型：稽核日期 -> datetime64，選項欄位 -> Categorical"""
+    import pandas as pd
+
+    frame = frame.copy()
+    if DATE_COLUMN in frame:
+        frame[DATE_COLUMN] = pd.to_datetime(frame[DATE_COLUMN].str.slice(0, 10), format=DATE_FORMAT,
+                                            errors="coerce")
+    for column, options in CATEGORY_COLUMNS.items():
+        if column not in frame:
+            continue
+        extra = sorted(set(frame[column].dropna()) - set(options))
+        frame[column] = pd.Categorical(frame[column], categories=list(options) + extra,
+                                       ordered=column == "稽核月份")
+    return frame
+
+
+def query_audits(source, start, end, units=None, staff_categories=None, moments=None,
+                 workers=DEFAULT_WORKERS, max_staleness=None):
+    """查詢 start 到 end（含）的稽核記錄，回傳型別化的 DataFrame
+
+    units、staff_categories、moments 為 None 或空白時不篩選該欄位。
+    """
+    import pandas as pd
+
+    start, end = _as_date(start), _as_date(end)
+    if start > end:
+        raise ValueError(f"開始日期 {start} 晚於結束日期 {end}")
+    backend = source.backend if isinstance(source, PartitionReadCache) else source
+    filters = {
+        column: {normalize(column, value) for value in values}
+        for column, values in ((UNIT_COLUMN, units), (STAFF_COLUMN, staff_categories), (MOMENT_COLUMN, moments))
+        if values
+    }
+
+    with metrics.timer("audit_query"):
+        plan = plan_partitions(start, end, backend.list_partitions())
+        parts = fetch_partitions(source, [name for name, _ in plan], workers, max_staleness)
+        frames = []
+        for name, partial in plan:
+            headers, rows = parts.get(name, ([], []))
+            if headers:
+                frames.append(_partition_frame(headers, rows, filters, (start, end) if partial else None))
+        frames = [frame for frame in frames if len(frame)]
+        if not frames:
+            return typed_frame(pd.DataFrame(columns=list(COLUMNS), dtype=object))
+        return typed_frame(pd.concat(frames, ignore_index=True))
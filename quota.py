@@ -0,0 +1,257 @@
+"""Google Sheets API 配額控制
+
+Google Sheets 對每個服務帳號有每分鐘讀取 / 寫入次數上限，所有 session 共用同一個帳號。
+QuotaClient 在程序內統一管理：
+
+- 每種配額（讀取、寫入）一個 token bucket，超過速率時等待而不是失敗
+- 以指數退避加隨機抖動重試：讀取遇到 429 / 5xx / 連線錯誤時重試；寫入只在 429 時重試
+  （5xx、逾時與連線錯誤時請求可能已寫入，重試 append_rows 等操作會產生重複列，
+  交由呼叫端處理，例如 SheetsWriteBehind 重送前會比對紀錄ID）
+- 相同的讀取同時發出時只呼叫一次 API，其他呼叫共用結果
+
+QuotaSpreadsheet / QuotaWorksheet 包裝 gspread 物件，使既有程式碼不需修改即可套用。
+"""
+import random
+import threading
+import time
+
+from gspread.exceptions import APIError
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+
+import metrics
+
+READ = "read"
+WRITE = "write"
+
+# Google Sheets 預設配額為每位使用者每分鐘 60 次讀取、60 次寫入
+DEFAULT_READ_PER_MINUTE = 60
+DEFAULT_WRITE_PER_MINUTE = 60
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE = 1.0      # 秒
+BACKOFF_MAX = 32.0      # 秒
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+WRITE_RETRY_STATUS = {429}   # 429 表示請求未被處理，重試不會重複寫入
+
+# gspread 方法 -> 配額類別（未列出的方法不經過配額控制）
+SPREADSHEET_METHODS = {
+    "worksheets": READ,
+    "worksheet": READ,
+    "fetch_sheet_metadata": READ,
+    "values_batch_get": READ,
+    "values_get": READ,
+    "add_worksheet": WRITE,
+    "del_worksheet": WRITE,
+    "batch_update": WRITE,
+    "values_batch_update": WRITE,
+}
+WORKSHEET_METHODS = {
+    "get_values": READ,
+    "get_all_values": READ,
+    "get_all_records": READ,
+    "row_values": READ,
+    "col_values": READ,
+    "append_row": WRITE,
+    "append_rows": WRITE,
+    "add_rows": WRITE,
+    "add_cols": WRITE,
+    "resize": WRITE,
+    "update_cell": WRITE,
+    "update": WRITE,
+    "batch_update": WRITE,
+}
+
+
+class TokenBucket:
+    """每分鐘 per_minute 個 token，最多累積 burst 個"""
+
+    def __init__(self, per_minute, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst if burst is not None else max(1, per_minute // 6))
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取得一個 token，必要時等待；回傳等待秒數"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 先預扣 token，排隊的呼叫依序等待
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            self._sleep(wait)
+        return wait
+
+
+class _InFlight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def is_retryable(error, kind=READ):
+    """可以安全重試的錯誤；寫入（非冪等）只重試確定未被處理的 429"""
+    if isinstance(error, APIError):
+        return error.code in (RETRY_STATUS if kind == READ else WRITE_RETRY_STATUS)
+    return kind == READ and isinstance(error, (RequestsConnectionError, Timeout))
+
+
+class QuotaClient:
+    """程序層級的 Sheets API 呼叫閘道"""
+
+    def __init__(self, read_per_minute=DEFAULT_READ_PER_MINUTE, write_per_minute=DEFAULT_WRITE_PER_MINUTE,
+                 max_retries=DEFAULT_MAX_RETRIES, sleep=time.sleep):
+        self.buckets = {
+            READ: TokenBucket(read_per_minute, sleep=sleep),
+            WRITE: TokenBucket(write_per_minute, sleep=sleep),
+        }
+        self.max_retries = int(max_retries)
+        self._sleep = sleep
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+        # 統計
+        self.calls = {READ: 0, WRITE: 0}
+        self.throttled = {READ: 0, WRITE: 0}
+        self.throttled_seconds = 0.0
+        self.retries = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def call(self, kind, func, *args, coalesce_key=None, **kwargs):
+        """經過配額控制呼叫 func；讀取可指定 coalesce_key 合併相同的同時呼叫"""
+        if kind != READ or coalesce_key is None:
+            return self._call_with_retry(kind, func, args, kwargs)
+
+        with self._lock:
+            flight = self._in_flight.get(coalesce_key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[coalesce_key] = _InFlight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._call_with_retry(kind, func, args, kwargs)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(coalesce_key, None)
+            flight.done.set()
+
+    def wrap(self, spreadsheet):
+        """包裝 gspread Spreadsheet"""
+        if isinstance(spreadsheet, QuotaSpreadsheet):
+            return spreadsheet
+        return QuotaSpreadsheet(spreadsheet, self)
+
+    def stats(self):
+        return {
+            "read_calls": self.calls[READ],
+            "write_calls": self.calls[WRITE],
+            "throttled_reads": self.throttled[READ],
+            "throttled_writes": self.throttled[WRITE],
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "retries": self.retries,
+            "coalesced_reads": self.coalesced,
+            "failures": self.failures,
+        }
+
+    def _call_with_retry(self, kind, func, args, kwargs):
+        method = getattr(func, "__name__", "call")
+        attempt = 0
+        while True:
+            waited = self.buckets[kind].acquire()
+            with self._lock:
+                self.calls[kind] += 1
+                if waited:
+                    self.throttled[kind] += 1
+                    self.throttled_seconds += waited
+            if waited:
+                metrics.increment("sheets_throttled", kind=kind)
+            try:
+                # 每次 API 呼叫（含重試）各自計時
+                with metrics.timer("sheets_api", kind=kind, method=method):
+                    return func(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e, kind) or attempt >= self.max_retries:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+            # 指數退避加完全隨機抖動，避免多個執行緒同時重試
+            delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            metrics.increment("sheets_retries", kind=kind)
+            self._sleep(delay)
+
+
+class _QuotaProxy:
+    """將指定方法改經 QuotaClient 呼叫，其餘屬性直接轉給原物件"""
+
+    _methods = {}
+
+    def __init__(self, target, client):
+        self._target = target
+        self._client = client
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        kind = self._methods.get(name)
+        if kind is None or not callable(attr):
+            return attr
+
+        def method(*args, **kwargs):
+            key = None
+            if kind == READ:
+                key = (id(self._target), name, repr(args), repr(sorted(kwargs.items())))
+            return self._wrap_result(self._client.call(kind, attr, *args, coalesce_key=key, **kwargs))
+        return method
+
+    def _wrap_result(self, result):
+        return result
+
+    @property
+    def unwrapped(self):
+        return self._target
+
+
+class QuotaWorksheet(_QuotaProxy):
+    _methods = WORKSHEET_METHODS
+
+
+class QuotaSpreadsheet(_QuotaProxy):
+    _methods = SPREADSHEET_METHODS
+
+    def _wrap_result(self, result):
+        # worksheets() / worksheet() / add_worksheet() 回傳的工作表也要經過配額控制
+        if isinstance(result, list):
+            return [self._wrap_worksheet(item) for item in result]
+        return self._wrap_worksheet(result)
+
+    def _wrap_worksheet(self, item):
+        if hasattr(item, "append_rows") and not isinstance(item, QuotaWorksheet):
+            return QuotaWorksheet(item, self._client)
+        return item
+
+    def del_worksheet(self, worksheet):
+        if isinstance(worksheet, QuotaWorksheet):
+            worksheet = worksheet.unwrapped
+        return self._client.call(WRITE, self._target.del_worksheet, worksheet)
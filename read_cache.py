@@ -0,0 +1,158 @@
+"""月份分區的增量讀取快取
+
+每個分區保存已讀取的資料列與游標（已讀筆數）；資料過期後只以
+backend.read_rows(分區, 游標) 讀取新增的列，而不是重新下載整張工作表。
+總列數超過上限時，依最近使用順序（LRU）淘汰整個分區。
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 30.0               # 秒；期間內直接使用快取
+DEFAULT_FULL_REFRESH = 3600.0    # 秒；超過後整個分區重新讀取（反映修改或刪除的列）
+DEFAULT_MAX_ROWS = 200_000       # 所有分區合計最多保留的列數
+
+
+class _Entry:
+    __slots__ = ("headers", "rows", "fetched_at", "loaded_at", "version", "lock")
+
+    def __init__(self):
+        self.headers = []
+        self.rows = []
+        self.fetched_at = None    # 最後一次增量讀取
+        self.loaded_at = None     # 最後一次完整讀取（None 表示尚未讀取）
+        self.version = 0          # 每次完整讀取取新的版本號；增量讀取只附加，不改變版本
+        self.lock = threading.Lock()
+
+
+class PartitionReadCache:
+    """程序層級、跨 session 共用的分區讀取快取
+
+    同一分區同時只會有一個執行緒向後端讀取，其他執行緒等待後直接使用結果。
+    """
+
+    def __init__(self, backend, ttl=DEFAULT_TTL, full_refresh=DEFAULT_FULL_REFRESH,
+                 max_rows=DEFAULT_MAX_ROWS, clock=time.monotonic):
+        self.backend = backend
+        self.ttl = float(ttl)
+        self.full_refresh = float(full_refresh)
+        self.max_rows = int(max_rows)
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions = itertools.count(1)   # 跨分區遞增，invalidate 後重新讀取也不會重複
+
+        # 統計
+        self.hits = 0
+        self.incremental_fetches = 0
+        self.full_fetches = 0
+        self.rows_fetched = 0
+        self.evictions = 0
+
+    def get(self, name, max_staleness=None):
+        """取得分區的 (標題列, 資料列)；max_staleness（秒）可覆寫 ttl
+
+        資料列為快取內的串列（不複製）：之後的增量讀取只會在尾端附加，
+        呼叫端應視為唯讀，並以取得當下的 len() 為準。
+        """
+        headers, rows, _ = self.get_versioned(name, max_staleness)
+        return headers, rows
+
+    def get_versioned(self, name, max_staleness=None):
+        """同 get，另回傳分區版本：版本相同時資料列只會在尾端附加；
+        完整重新讀取（可能有修改或刪除的列）後版本改變，依游標累加的呼叫端需重新計算
+        """
+        ttl = self.ttl if max_staleness is None else float(max_staleness)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = self._entries[name] = _Entry()
+            self._entries.move_to_end(name)
+
+        with entry.lock:
+            now = self._clock()
+            if entry.loaded_at is not None and now - entry.fetched_at < ttl:
+                self.hits += 1
+            elif entry.loaded_at is None or now - entry.loaded_at >= self.full_refresh:
+                self._load(name, entry, now)
+            else:
+                self._fetch_new(name, entry, now)
+            headers, rows, version = entry.headers, entry.rows, entry.version
+
+        self._evict(keep=name)
+        return headers, rows, version
+
+    def frame(self, names, max_staleness=None):
+        """多個分區合併為 DataFrame（欄位取聯集，全部為文字）"""
+        import pandas as pd
+
+        frames = []
+        for name in names:
+            headers, rows = self.get(name, max_staleness)
+            if not headers:
+                continue
+            width = len(headers)
+            padded = [row[:width] + [""] * (width - len(row)) for row in rows]
+            frames.append(pd.DataFrame(padded, columns=headers, dtype=object))
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def invalidate(self, name=None):
+        """移除快取，下次讀取時完整重新讀取"""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    @property
+    def cached_rows(self):
+        with self._lock:
+            return sum(len(entry.rows) for entry in self._entries.values())
+
+    def stats(self):
+        return {
+            "partitions": len(self._entries),
+            "cached_rows": self.cached_rows,
+            "hits": self.hits,
+            "incremental_fetches": self.incremental_fetches,
+            "full_fetches": self.full_fetches,
+            "rows_fetched": self.rows_fetched,
+            "evictions": self.evictions,
+        }
+
+    def _load(self, name, entry, now):
+        if entry.headers:
+            # 重新完整讀取已存在的分區前清除其 handle，取得其他程序擴充後的格線大小；
+            # 尚未建立的分區沿用後端記住的「不存在」，不重新讀取 metadata
+            self.backend.invalidate(name)
+        entry.headers = self.backend.headers(name)
+        entry.rows = self.backend.read_rows(name) if entry.headers else []
+        entry.loaded_at = entry.fetched_at = now
+        entry.version = next(self._versions)
+        self.full_fetches += 1
+        self.rows_fetched += len(entry.rows)
+
+    def _fetch_new(self, name, entry, now):
+        new_rows = self.backend.read_rows(name, offset=len(entry.rows))
+        if new_rows:
+            # 就地附加（呼叫端持有 entry.lock），每次只處理新增的列
+            entry.rows.extend(new_rows)
+        entry.fetched_at = now
+        self.incremental_fetches += 1
+        self.rows_fetched += len(new_rows)
+
+    def _evict(self, keep):
+        """超過列數上限時淘汰最久未使用的分區（保留剛讀取的分區）"""
+        with self._lock:
+            total = sum(len(entry.rows) for entry in self._entries.values())
+            while total > self.max_rows and len(self._entries) > 1:
+                name, entry = next(iter(self._entries.items()))
+                if name == keep:
+                    self._entries.move_to_end(name)
+                    name, entry = next(iter(self._entries.items()))
+                del self._entries[name]
+                total -= len(entry.rows)
+                self.evictions += 1
@@ -0,0 +1,126 @@
+"""不正確原因的標準代碼表與位元遮罩編碼
+
+每個標準原因對應一個固定的位元；一筆記錄的複選原因編碼為一個整數遮罩，
+「其他」的註明文字另外保存。舊資料或模擬資料中的不同寫法以別名對應到同一原因。
+"""
+from schema import DRY_HANDRUB, WET_HANDWASH, NONE_TEXT, OTHER_OPTION as OTHER_LABEL
+
+SEPARATOR = ", "
+
+# 標準原因：位元位置固定，只能在尾端新增
+REASONS = [
+    "步驟不完整",
+    "戴手套洗手",
+    "搓揉時間過短(少於20-30秒)或未搓到全乾",
+    "乾洗手液量不足",
+    "未使用洗手劑(含肥皂)洗手",
+    "洗手後未擦乾",
+    "洗手時間過短(少於40-60秒)",
+]
+REASON_BITS = {reason: 1 << i for i, reason in enumerate(REASONS)}
+
+# 其他寫法 -> 標準原因
+ALIASES = {
+    "未搓到手部全乾": "搓揉時間過短(少於20-30秒)或未搓到全乾",
+    "搓揉時間過短(少於20-30秒)": "搓揉時間過短(少於20-30秒)或未搓到全乾",
+    "乾洗手液量不足已覆蓋全手": "乾洗手液量不足",
+    "只用清水洗手": "未使用洗手劑(含肥皂)洗手",
+    "濕洗手後未擦乾": "洗手後未擦乾",
+}
+
+# 各執行方式可選的原因（依畫面顯示順序）
+REASON_OPTIONS = {
+    DRY_HANDRUB: ["步驟不完整", "戴手套洗手", "搓揉時間過短(少於20-30秒)或未搓到全乾", "乾洗手液量不足"],
+    WET_HANDWASH: ["步驟不完整", "戴手套洗手", "未使用洗手劑(含肥皂)洗手", "洗手後未擦乾", "洗手時間過短(少於40-60秒)"],
+}
+
+_LOOKUP = {**REASON_BITS, **{alias: REASON_BITS[reason] for alias, reason in ALIASES.items()}}
+
+
+def reason_options(hygiene_method):
+    """執行方式對應的不正確原因選項"""
+    return REASON_OPTIONS.get(hygiene_method, [])
+
+
+def encode_reasons(text):
+    """「原因1, 原因2」-> (遮罩, 其他文字或 None)"""
+    if not text or text == NONE_TEXT:
+        return 0, None
+    mask = 0
+    others = []
+    for part in str(text).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        bit = _LOOKUP.get(part)
+        if bit is None:
+            others.append(part)
+        else:
+            mask |= bit
+    return mask, SEPARATOR.join(others) if others else None
+
+
+def decode_reasons(mask, other=None):
+    """遮罩 -> 標準原因清單（其他文字附在最後）"""
+    reasons = [reason for reason, bit in REASON_BITS.items() if mask & bit]
+    if other:
+        reasons.append(other)
+    return reasons
+
+
+def format_reasons(mask, other=None):
+    """遮罩 -> 工作表中的「不正確原因」文字"""
+    reasons = decode_reasons(mask, other)
+    return SEPARATOR.join(reasons) if reasons else NONE_TEXT
+
+
+def encode_series(series):
+    """整欄編碼：只對不重複的文字做一次解析，回傳 (遮罩陣列, 其他文字 Series)"""
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    encoded = [encode_reasons(text) for text in uniques]
+    unique_masks = np.array([mask for mask, _ in encoded] + [0], dtype=np.uint32)
+    unique_others = np.array([other for _, other in encoded] + [None], dtype=object)
+    # 缺值（代碼 -1）對應到最後一個元素
+    masks = unique_masks[codes]
+    others = pd.Series(unique_others[codes], index=series.index)
+    return masks, others
+
+
+def reason_counts(masks):
+    """各標準原因出現的次數"""
+    import numpy as np
+    import pandas as pd
+
+    masks = np.asarray(masks, dtype=np.uint32)
+    bits = np.arange(len(REASONS), dtype=np.uint32)
+    counts = ((masks[:, None] >> bits) & 1).sum(axis=0).astype(np.int64)
+    return pd.Series(counts, index=REASONS, name="次數")
+
+
+def reason_breakdown(df, by="稽核者單位", column="不正確原因"):
+    """依 by 欄位分組統計各標準原因次數（每組一列、每個原因一欄）"""
+    import numpy as np
+    import pandas as pd
+
+    masks, _ = encode_series(df[column])
+    group_codes, groups = pd.factorize(df[by], sort=True)
+    valid = group_codes >= 0
+    group_codes = group_codes[valid]
+    masks = masks[valid]
+    result = {
+        reason: np.bincount(group_codes, weights=(masks & bit) > 0, minlength=len(groups)).astype(np.int64)
+        for reason, bit in REASON_BITS.items()
+    }
+    return pd.DataFrame(result, index=pd.Index(groups, name=by))
+
+
+def top_reasons(df, by="稽核者單位", n=3):
+    """各組最常見的前 n 個原因，回傳長表（組, 原因, 次數）"""
+    breakdown = reason_breakdown(df, by=by)
+    long = breakdown.stack().rename("次數").reset_index().rename(columns={"level_1": "原因"})
+    long = long[long["次數"] > 0]
+    return (long.sort_values([by, "次數"], ascending=[True, False])
+                .groupby(by, sort=False).head(n).reset_index(drop=True))
@@ -0,0 +1,221 @@
+"""稽核資料欄位、固定選項表與驗證規則
+
+所有入口（app.py、app_new.py、模擬資料、匯入工具）與儲存編碼、統計都使用這裡的定義。
+選項表為不可變的 Options（tuple），index() / in 以預先建立的 dict 查詢。
+不正確原因的標準代碼表另見 reasons.py。
+
+修改欄位或選項時請遞增 SCHEMA_VERSION：選項只能在尾端新增（代碼依順序編號），
+改名的舊值加入 ALIASES 對應到新值。
+"""
+import sys
+import threading
+from types import MappingProxyType
+
+# 1：原始 12 個工作表欄位；2：新增紀錄ID 欄
+SCHEMA_VERSION = 2
+
+
+class Options(tuple):
+    """不可變的選項表；index()、in 為 O(1) 查詢"""
+
+    def __new__(cls, values):
+        options = super().__new__(cls, values)
+        options._positions = MappingProxyType({value: i for i, value in enumerate(options)})
+        return options
+
+    def __contains__(self, value):
+        return value in self._positions
+
+    def index(self, value, *args):
+        try:
+            return self._positions[value]
+        except (KeyError, TypeError):
+            raise ValueError(f"{value!r} 不在選項中") from None
+
+    def index_of(self, value, default=0):
+        """選項位置，不在選項中時回傳 default（供 selectbox 的 index 使用）"""
+        return self._positions.get(value, default)
+
+    def __add__(self, other):
+        return Options(tuple(self) + tuple(other))
+
+    def __reduce__(self):
+        return Options, (tuple(self),)
+
+
+# 工作表欄位（依序）
+COLUMNS = Options([
+    "登入者Email", "稽核日期", "稽核時間", "稽核月份", "稽核者單位", "稽核人員",
+    "受稽核人員類別", "受稽核者單位", "手部衛生時機", "手部衛生方式", "手部衛生正確性", "不正確原因",
+])
+
+# 記錄唯一編號欄位（附加在工作表欄位之後，由前端產生）
+RECORD_ID_FIELD = "紀錄ID"
+DATE_COLUMN = "稽核日期"
+TIME_COLUMN = "稽核時間"
+DATE_FORMAT = "%Y-%m-%d"
+TIME_FORMAT = "%H:%M:%S"
+
+# 選項表中「其他」的選項，選擇後另行填寫文字
+OTHER_OPTION = "其他(請註明)"
+NONE_TEXT = "無"
+
+MONTH_LABELS = Options(f"{m}月" for m in range(1, 13))
+
+DEPARTMENTS = Options([
+    "ER", "HDR", "OPD", "OPD(市區)", "ICU", "RCW", "7W", "8W", "9W", "11W",
+    "內科", "外科", "精神科", "復健科", "放射科", "檢驗科",
+    "松齡1.2區", "松齡3區", "松齡5.6區", "康寧居", "日照",
+])
+
+STAFF_CATEGORIES = Options([
+    "護理師", "照服員", "傳送/班長", "病房服務員", "內科醫師", "外科醫師",
+    "內科專師", "外科專師", "職能治療", "物理治療", "營養師", "呼吸治療師",
+    "門診助理員", "語言治療師", "社工師", "醫檢師", "放射師", "精神科醫師",
+    "精神科專師", "精神科職能治療", "心理師",
+])
+
+# 畫面上的選項（含「其他」）
+DEPARTMENT_OPTIONS = DEPARTMENTS + [OTHER_OPTION]
+STAFF_CATEGORY_OPTIONS = STAFF_CATEGORIES + [OTHER_OPTION]
+
+HYGIENE_MOMENTS = Options([
+    "時機1: 接觸病人前",
+    "時機2: 執行清潔/無菌操作技術前",
+    "時機3: 暴露病人體液風險後",
+    "時機4: 接觸病人後",
+    "時機5: 接觸病人周遭環境後",
+])
+
+DRY_HANDRUB = "乾洗手（酒精性乾洗手液）"
+WET_HANDWASH = "濕洗手（肥皂和水）"
+NO_HYGIENE = "沒有洗手"
+HYGIENE_METHODS = Options([DRY_HANDRUB, WET_HANDWASH, NO_HYGIENE])
+
+CORRECT = "正確(七步驟完全正確)"
+INCORRECT = "不正確"
+NOT_ASSESSED = "未評估(沒有洗手)"
+CORRECTNESS_VALUES = Options([CORRECT, INCORRECT, NOT_ASSESSED])
+# 有洗手時可選的正確性
+ASSESSED_VALUES = Options([CORRECT, INCORRECT])
+
+# 固定選項的欄位 -> 選項表
+VOCABULARIES = MappingProxyType({
+    "稽核月份": MONTH_LABELS,
+    "稽核者單位": DEPARTMENTS,
+    "受稽核人員類別": STAFF_CATEGORIES,
+    "受稽核者單位": DEPARTMENTS,
+    "手部衛生時機": HYGIENE_MOMENTS,
+    "手部衛生方式": HYGIENE_METHODS,
+    "手部衛生正確性": CORRECTNESS_VALUES,
+})
+
+# 可填寫「其他」文字的欄位；其餘選項欄位只接受選項表中的值
+FREE_TEXT_ALLOWED = frozenset(["稽核者單位", "受稽核人員類別", "受稽核者單位"])
+
+# 舊版畫面或舊資料的寫法 -> 標準值
+_DEPARTMENT_ALIASES = {
+    "松1.2": "松齡1.2區",
+    "松3": "松齡3區",
+    "松5.6": "松齡5.6區",
+    "康": "康寧居",
+}
+ALIASES = MappingProxyType({
+    "稽核者單位": _DEPARTMENT_ALIASES,
+    "受稽核者單位": _DEPARTMENT_ALIASES,
+})
+
+
+def normalize(column, value):
+    """舊寫法轉為標準值（例如「松1.2」->「松齡1.2區」）"""
+    if isinstance(value, str):
+        value = value.strip()
+    aliases = ALIASES.get(column)
+    if aliases:
+        return aliases.get(value, value)
+    return value
+
+
+def normalize_record(record):
+    """回傳標準化後的新 dict"""
+    return {column: normalize(column, value) for column, value in record.items()}
+
+
+# 驗證規則：(欄位, 訊息)；必填欄位
+REQUIRED_FIELDS = (
+    ("稽核月份", "請選擇稽核月份！"),
+    ("稽核者單位", "請填寫稽核單位！"),
+    ("稽核人員", "請填寫稽核人員姓名！"),
+    ("受稽核人員類別", "請填寫受稽核人員類別！"),
+    ("受稽核者單位", "請填寫受稽核人員單位！"),
+)
+
+
+def validate_record(record):
+    """依驗證規則檢查一筆觀察記錄，回傳錯誤訊息清單（空清單表示通過）"""
+    errors = []
+    for column, message in REQUIRED_FIELDS:
+        if column in record and not record[column]:
+            errors.append(message)
+    for column, options in VOCABULARIES.items():
+        value = record.get(column)
+        if value and value not in options and column not in FREE_TEXT_ALLOWED:
+            errors.append(f"「{column}」的值不正確：{value}")
+
+    method = record.get("手部衛生方式")
+    correctness = record.get("手部衛生正確性")
+    reasons = record.get("不正確原因")
+    if method == NO_HYGIENE:
+        if correctness not in (None, NOT_ASSESSED):
+            errors.append("沒有洗手時正確性應為未評估！")
+    elif method is not None:
+        if correctness not in ASSESSED_VALUES:
+            errors.append("請評估執行正確性！")
+        elif correctness == INCORRECT and (not reasons or reasons == NONE_TEXT):
+            errors.append("請選擇不正確原因！")
+    return errors
+
+
+class CodeTable:
+    """選項值 <-> 小整數代碼 的對照表
+
+    固定選項依選項表順序編碼；遇到新的值（例如「其他」的註明文字）時
+    附加在尾端並取得新代碼，因此編碼不會遺失任何資訊。
+    """
+
+    def __init__(self, values=()):
+        self.values = []
+        self._codes = {}
+        self._lock = threading.Lock()
+        for value in values:
+            self.code(value)
+
+    def code(self, value):
+        """取得值的代碼，未知的值會新增"""
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self.values)
+                    self.values.append(sys.intern(value) if isinstance(value, str) else value)
+                    self._codes[value] = code
+        return code
+
+    def value(self, code):
+        return self.values[code]
+
+    def __contains__(self, value):
+        return value in self._codes
+
+    def __len__(self):
+        return len(self.values)
+
+
+# 各欄位共用的代碼表（程序內唯一）
+CODE_TABLES = {column: CodeTable(values) for column, values in VOCABULARIES.items()}
+# 受稽核者單位與稽核者單位共用同一個代碼表
+CODE_TABLES["受稽核者單位"] = CODE_TABLES["稽核者單位"]
+# 自由文字欄位：僅做字串 interning 與編碼
+for _column in ("登入者Email", "稽核人員", "不正確原因"):
+    CODE_TABLES[_column] = CodeTable()
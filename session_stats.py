@@ -0,0 +1,81 @@
+"""本次稽核的累計統計：每新增一筆觀察只更新計數，不重建 DataFrame"""
+from collections import Counter
+
+from journal import RECORD_ID_FIELD
+from schema import NO_HYGIENE, CORRECT
+from sheets_writer import STATUS_PENDING, STATUS_CONFIRMED, STATUS_FAILED
+
+# 觀察記錄表顯示的欄位
+DISPLAY_COLUMNS = ["稽核者單位", "受稽核人員類別", "受稽核者單位", "手部衛生時機",
+                   "手部衛生方式", "手部衛生正確性", "不正確原因"]
+SEQ_COLUMN = "序"
+STATUS_COLUMN = "同步狀態"
+
+
+class SessionStats:
+    """單一 session 的累計計數與顯示表格
+
+    所有計數在 add() 時以 O(1) 更新；顯示表格以欄為單位保存，
+    新記錄直接附加在每一欄的尾端，可直接交給 st.dataframe。
+    """
+
+    def __init__(self, status_labels):
+        self.status_labels = status_labels
+        self.total = 0
+        self.compliant = 0       # 有執行手部衛生
+        self.correct = 0         # 執行且正確
+        self.staff_counts = Counter()
+        self.moment_counts = Counter()
+        self.status_counts = Counter()
+
+        self.table = {column: [] for column in [SEQ_COLUMN] + DISPLAY_COLUMNS + [STATUS_COLUMN]}
+        self._row_of = {}        # 紀錄ID -> 表格列索引
+        self._status = {}        # 紀錄ID -> 提交狀態
+        self.unconfirmed = set()
+
+    def add(self, observation, status=STATUS_PENDING):
+        """加入一筆觀察記錄"""
+        self.total += 1
+        if observation["手部衛生方式"] != NO_HYGIENE:
+            self.compliant += 1
+            if observation["手部衛生正確性"] == CORRECT:
+                self.correct += 1
+        self.staff_counts[observation["受稽核人員類別"]] += 1
+        self.moment_counts[observation["手部衛生時機"]] += 1
+
+        uid = observation[RECORD_ID_FIELD]
+        self._row_of[uid] = self.total - 1
+        self.table[SEQ_COLUMN].append(self.total)
+        for column in DISPLAY_COLUMNS:
+            self.table[column].append(observation[column])
+        self.table[STATUS_COLUMN].append(self.status_labels[status])
+        self._status[uid] = status
+        self.status_counts[status] += 1
+        if status != STATUS_CONFIRMED:
+            self.unconfirmed.add(uid)
+
+    def update_status(self, status_map):
+        """套用最新的提交狀態 {紀錄ID: status}，只更新有變動的列"""
+        for uid, status in status_map.items():
+            previous = self._status.get(uid)
+            if previous is None or previous == status:
+                continue
+            self._status[uid] = status
+            self.status_counts[previous] -= 1
+            self.status_counts[status] += 1
+            self.table[STATUS_COLUMN][self._row_of[uid]] = self.status_labels[status]
+            if status == STATUS_CONFIRMED:
+                self.unconfirmed.discard(uid)
+
+    @property
+    def compliance_rate(self):
+        return self.compliant / self.total if self.total else 0.0
+
+    @property
+    def correctness_rate(self):
+        return self.correct / self.compliant if self.compliant else 0.0
+
+    def status_summary(self):
+        """各提交狀態的筆數，依 pending/confirmed/failed 排序"""
+        return [(status, self.status_counts[status])
+                for status in (STATUS_PENDING, STATUS_CONFIRMED, STATUS_FAILED)]
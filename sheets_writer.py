@@ -0,0 +1,209 @@
+"""批次寫入器：跨 session 收集觀察記錄，定時批次寫入儲存後端的各月份分區"""
+import atexit
+import threading
+import time
+from collections import defaultdict
+
+from journal import RECORD_ID_FIELD, SYNCED
+
+# 預設批次設定
+DEFAULT_BATCH_SIZE = 50        # 累積多少筆就立即寫入
+DEFAULT_FLUSH_INTERVAL = 5.0   # 最長等待秒數
+MAX_ROWS_PER_FLUSH = 500       # 每次從日誌讀取的最大筆數
+
+# 提交狀態
+STATUS_PENDING = "pending"       # 已寫入本機日誌，等待同步
+STATUS_CONFIRMED = "confirmed"   # 已寫入儲存後端
+STATUS_FAILED = "failed"         # 同步失敗，背景持續重試
+
+
+class SheetsWriteBehind:
+    """程序層級的寫入聚合器
+
+    所有 session 提交的記錄先寫入本機日誌（ObservationJournal）並立即返回，
+    背景執行緒每 flush_interval 秒或累積 batch_size 筆時，
+    依分區分組，每個分區只呼叫一次 backend.append_rows。
+    網路中斷時記錄留在日誌中，恢復連線後自動補送；
+    重送前會比對分區中的紀錄ID，避免產生重複列。
+    """
+
+    def __init__(self, backend, journal, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        # backend：storage.StorageBackend
+        self.backend = backend
+        self.journal = journal
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.1, float(flush_interval))
+
+        self._unflushed = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._checked_sheets = set()   # 已確認標題列含紀錄ID的分區
+
+        # 統計
+        self.queued_rows = 0
+        self.duplicate_rows = 0
+        self.flushed_rows = 0
+        self.append_calls = 0
+        self.failed_flushes = 0
+        self.last_error = None
+
+        self._thread = threading.Thread(
+            target=self._run, name="sheets-write-behind", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, record, sheet_name):
+        """將一筆記錄寫入本機日誌，不等待雲端寫入；回傳記錄編號"""
+        uid, inserted = self.journal.append(record, sheet_name)
+        with self._lock:
+            if not inserted:
+                self.duplicate_rows += 1
+                return uid
+            self.queued_rows += 1
+            self._unflushed += 1
+            if self._unflushed >= self.batch_size:
+                self._wakeup.set()
+        return uid
+
+    def submit_many(self, records, sheet_name):
+        """將一批記錄寫入本機日誌並立即喚醒背景執行緒（整批以一次 append_rows 寫入）；回傳記錄編號"""
+        results = self.journal.append_many(records, sheet_name)
+        inserted = sum(1 for _, new in results if new)
+        with self._lock:
+            self.duplicate_rows += len(results) - inserted
+            self.queued_rows += inserted
+            self._unflushed += inserted
+            if inserted:
+                self._wakeup.set()
+        return [uid for uid, _ in results]
+
+    @property
+    def pending_count(self):
+        return self.journal.pending_count()
+
+    def flush(self):
+        """立即將日誌中待同步的記錄寫入，回傳成功寫入筆數"""
+        with self._flush_lock:
+            with self._lock:
+                self._unflushed = 0
+
+            written = 0
+            while True:
+                entries = self.journal.pending(MAX_ROWS_PER_FLUSH)
+                batches = defaultdict(list)
+                for entry in entries:
+                    batches[entry.sheet_name].append(entry)
+
+                failed = False
+                for sheet_name, batch in batches.items():
+                    if self._flush_sheet(sheet_name, batch):
+                        written += len(batch)
+                    else:
+                        failed = True
+
+                # 失敗的記錄仍在日誌中，留待下次再試
+                if failed or len(entries) < MAX_ROWS_PER_FLUSH:
+                    return written
+
+    def close(self):
+        """停止背景執行緒並寫出剩餘記錄"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._wakeup.set()
+        self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def sync_status(self, uids):
+        """查詢記錄的提交狀態，回傳 {uid: STATUS_*}"""
+        result = {}
+        for uid, (status, last_error) in self.journal.status(uids).items():
+            if status == SYNCED:
+                result[uid] = STATUS_CONFIRMED
+            elif last_error:
+                result[uid] = STATUS_FAILED
+            else:
+                result[uid] = STATUS_PENDING
+        return result
+
+    def stats(self):
+        return {
+            "queued_rows": self.queued_rows,
+            "duplicate_rows": self.duplicate_rows,
+            "flushed_rows": self.flushed_rows,
+            "pending_rows": self.pending_count,
+            "append_calls": self.append_calls,
+            "failed_flushes": self.failed_flushes,
+            "last_error": self.last_error,
+        }
+
+    def _check_record_id_column(self, sheet_name, headers):
+        """舊版建立的月份工作表沒有紀錄ID欄：先補上標題，重送時才能依紀錄ID排除已寫入的列
+
+        每個分區只檢查一次；標題列與記錄欄位對不上時拋出例外，記錄留在日誌中不寫入。
+        """
+        if sheet_name in self._checked_sheets or RECORD_ID_FIELD not in headers:
+            return
+        existing = self.backend.headers(sheet_name)
+        if not existing:
+            # 分區尚未建立：append_rows 以完整標題建立
+            return
+        if RECORD_ID_FIELD not in existing:
+            if headers[:len(existing)] != existing or headers.index(RECORD_ID_FIELD) != len(existing):
+                raise ValueError(f"{sheet_name} 的標題列與記錄欄位不符，無法補上「{RECORD_ID_FIELD}」欄")
+            self.backend.add_column(sheet_name, RECORD_ID_FIELD)
+        self._checked_sheets.add(sheet_name)
+
+    def _flush_sheet(self, sheet_name, batch):
+        """將同一分區的記錄以一次 append_rows 寫入"""
+        uids = [entry.uid for entry in batch]
+        try:
+            headers = list(batch[0].record.keys())
+            self._check_record_id_column(sheet_name, headers)
+            if any(entry.attempts for entry in batch):
+                # 曾經嘗試寫入：先排除分區中已存在的記錄
+                existing = set(self.backend.column_values(sheet_name, RECORD_ID_FIELD))
+                batch = [entry for entry in batch if entry.uid not in existing]
+            if batch:
+                self.journal.mark_attempt([entry.uid for entry in batch])
+                self.backend.append_rows(sheet_name, [list(entry.record.values()) for entry in batch], headers)
+                self.append_calls += 1
+                self.flushed_rows += len(batch)
+            self.journal.mark_synced(uids)
+            return True
+        except Exception as e:
+            self.failed_flushes += 1
+            self.last_error = str(e)
+            # 記錄失敗本身也可能出錯（例如日誌或 metadata 讀取失敗），不影響回傳結果
+            try:
+                self.journal.mark_failed(uids, e)
+            except Exception as cleanup_error:
+                self.last_error = f"{e}; {cleanup_error}"
+            self._checked_sheets.discard(sheet_name)
+            try:
+                # 清除該分區的快取，下次重新取得
+                self.backend.invalidate(sheet_name)
+            except Exception:
+                pass
+            return False
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._stopped:
+                break
+            try:
+                flushed = not self.pending_count or self.flush()
+            except Exception as e:
+                # 日誌讀取等錯誤：記錄後繼續執行，記錄留在日誌中等待下次補送
+                self.failed_flushes += 1
+                self.last_error = str(e)
+                flushed = False
+            if not flushed:
+                # 全部寫入失敗時稍作等待，避免立即重試
+                time.sleep(min(self.flush_interval, 1.0))
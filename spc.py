@@ -0,0 +1,226 @@
+"""SPC p 管制圖：各稽核單位每週、每月的遵從率與正確率
+
+ControlCharts 只保存 (單位, 期間) 的觀察次數、遵從次數、正確次數：
+新觀察以 add() 逐筆 O(1) 累加，歷史資料以 backfill() 一次向量化彙總；
+中心線與管制界限在 chart() 時才由計數算出，不需重新讀取原始資料列。
+
+    charts = ControlCharts().backfill(df)
+    charts.add_record(observation)
+    chart = charts.chart(MONTH, COMPLIANCE_RATE, units=["ICU"])
+
+p 管制圖：中心線 p̄ = 該單位所有期間的事件數 / 樣本數，
+第 i 期的管制界限 p̄ ± 3·sqrt(p̄(1-p̄)/n_i)（限制在 0~1）。
+遵從率的樣本數為觀察次數；正確率的樣本數為有執行手部衛生的次數。
+"""
+import datetime
+import threading
+
+from analytics import compliance_counts, COUNT, COMPLIANT, CORRECT_COUNT, COMPLIANCE_RATE, CORRECTNESS_RATE
+from excel_report import OutcomeCounts, option_order
+from schema import DEPARTMENTS, NO_HYGIENE, CORRECT, DATE_COLUMN, DATE_FORMAT
+
+WEEK = "週"
+MONTH = "月"
+PERIODS = [WEEK, MONTH]
+METRICS = [COMPLIANCE_RATE, CORRECTNESS_RATE]
+
+UNIT_COLUMN = "稽核者單位"
+PERIOD_COLUMN = "期間"
+SIGMA = 3.0
+
+# 管制圖欄位
+SAMPLES = "樣本數"
+EVENTS = "事件數"
+RATE = "比率"
+CENTER = "中心線"
+UCL = "管制上限"
+LCL = "管制下限"
+SIGNAL = "狀態"
+ABOVE = "高於管制上限"
+BELOW = "低於管制下限"
+
+
+def period_key(audit_date, period):
+    """稽核日期 -> 期間標籤：月為「2025-01」，週為 ISO 週「2025-W03」（字串排序即時間順序）"""
+    if isinstance(audit_date, str):
+        if period == MONTH:
+            return audit_date[:7]
+        audit_date = datetime.datetime.strptime(audit_date[:10], DATE_FORMAT).date()
+    if period == MONTH:
+        return f"{audit_date.year:04d}-{audit_date.month:02d}"
+    year, week, _ = audit_date.isocalendar()
+    return f"{year:04d}-W{week:02d}"
+
+
+def period_labels(dates, period):
+    """向量化版的 period_key：回傳期間的 pd.Categorical（無法解析的日期為缺值）
+
+    先對不重複的日期計算標籤再以代碼展開，百萬筆資料也只需處理數百個日期。
+    """
+    import numpy as np
+    import pandas as pd
+
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        dates = dates.dt.normalize()
+    codes, uniques = pd.factorize(dates)
+    if isinstance(uniques, pd.DatetimeIndex):
+        parsed = uniques
+    else:
+        parsed = pd.to_datetime(pd.Index(uniques).astype(str).str.slice(0, 10), format=DATE_FORMAT, errors="coerce")
+    if period == MONTH:
+        labels = parsed.strftime("%Y-%m")
+    else:
+        iso = parsed.isocalendar()
+        labels = iso["year"].astype("string") + "-W" + iso["week"].astype("string").str.zfill(2)
+    labels = pd.Series(np.asarray(labels, dtype=object)).where(~parsed.isna())
+    label_codes, label_uniques = pd.factorize(labels, sort=True)
+    period_codes = np.where(codes >= 0, label_codes[np.maximum(codes, 0)], -1) if len(label_codes) else codes
+    return pd.Categorical.from_codes(period_codes, categories=label_uniques)
+
+
+class ControlCharts:
+    """各期間類型（週、月）一個 OutcomeCounts，key 為 (單位, 期間)"""
+
+    def __init__(self):
+        self.counts = {period: OutcomeCounts() for period in PERIODS}
+        self.observations = 0
+
+    def add(self, unit, audit_date, compliant, correct):
+        """加入一筆觀察（O(1)）"""
+        correct = compliant and correct
+        for period, counts in self.counts.items():
+            counts.add((unit, period_key(audit_date, period)), compliant, correct)
+        self.observations += 1
+
+    def add_record(self, record):
+        compliant = record["手部衛生方式"] != NO_HYGIENE
+        self.add(record[UNIT_COLUMN], record[DATE_COLUMN], compliant, record["手部衛生正確性"] == CORRECT)
+
+    def add_rows(self, headers, rows):
+        """加入工作表格式的資料列"""
+        unit_index = headers.index(UNIT_COLUMN)
+        date_index = headers.index(DATE_COLUMN)
+        method_index = headers.index("手部衛生方式")
+        correctness_index = headers.index("手部衛生正確性")
+        width = max(unit_index, date_index, method_index, correctness_index) + 1
+        for row in rows:
+            if len(row) < width or not row[date_index]:
+                continue
+            self.add(row[unit_index], row[date_index], row[method_index] != NO_HYGIENE,
+                     row[correctness_index] == CORRECT)
+        return self
+
+    def backfill(self, df):
+        """由歷史資料（DataFrame）一次彙總累加；無法解析日期的列略過"""
+        import pandas as pd
+
+        if df.empty:
+            return self
+        grouped_by_period = {}
+        for period, counts in self.counts.items():
+            # .array 保留類別欄位的代碼，分組時不需重新編碼
+            frame = pd.DataFrame({
+                UNIT_COLUMN: df[UNIT_COLUMN].array,
+                PERIOD_COLUMN: period_labels(df[DATE_COLUMN], period),
+                "手部衛生方式": df["手部衛生方式"].array,
+                "手部衛生正確性": df["手部衛生正確性"].array,
+            })
+            grouped = grouped_by_period[period] = compliance_counts(frame, by=[UNIT_COLUMN, PERIOD_COLUMN])
+            for key, n, n_compliant, n_correct in zip(grouped.index, grouped[COUNT], grouped[COMPLIANT],
+                                                      grouped[CORRECT_COUNT]):
+                counts.add_counts(key, int(n), int(n_compliant), int(n_correct))
+        # 觀察筆數以月份分組為準（units()、observations 都以月份計數為基礎）
+        self.observations += int(grouped_by_period[MONTH][COUNT].sum())
+        return self
+
+    def merge(self, other):
+        for period, counts in self.counts.items():
+            counts.merge(other.counts[period])
+        self.observations += other.observations
+        return self
+
+    def units(self):
+        """有資料的單位，依單位選項表排序"""
+        return sorted({unit for unit, _ in self.counts[MONTH].counts}, key=option_order(DEPARTMENTS))
+
+    def chart(self, period=MONTH, metric=COMPLIANCE_RATE, units=None, sigma=SIGMA):
+        """p 管制圖資料：每個 (單位, 期間) 一列，含比率、中心線、管制上下限與狀態"""
+        import numpy as np
+        import pandas as pd
+
+        columns = [UNIT_COLUMN, PERIOD_COLUMN, SAMPLES, EVENTS, RATE, CENTER, UCL, LCL, SIGNAL]
+        # 遵從率：觀察次數中的遵從次數；正確率：遵從次數中的正確次數
+        samples_at, events_at = (0, 1) if metric == COMPLIANCE_RATE else (1, 2)
+        selected = None if units is None else set(units)
+        data = [
+            (unit, key, entry[samples_at], entry[events_at])
+            for (unit, key), entry in self.counts[period].counts.items()
+            if entry[samples_at] and (selected is None or unit in selected)
+        ]
+        if not data:
+            return pd.DataFrame(columns=columns)
+        by_department = option_order(DEPARTMENTS)
+        data.sort(key=lambda item: (by_department(item[0]), item[1]))
+        frame = pd.DataFrame(data, columns=[UNIT_COLUMN, PERIOD_COLUMN, SAMPLES, EVENTS])
+
+        totals = frame.groupby(UNIT_COLUMN, sort=False)[[SAMPLES, EVENTS]].transform("sum")
+        n = frame[SAMPLES].to_numpy(dtype=float)
+        p_bar = totals[EVENTS].to_numpy(dtype=float) / totals[SAMPLES].to_numpy(dtype=float)
+        spread = sigma * np.sqrt(p_bar * (1 - p_bar) / n)
+        frame[RATE] = frame[EVENTS] / n
+        frame[CENTER] = p_bar
+        frame[UCL] = np.minimum(1.0, p_bar + spread)
+        frame[LCL] = np.maximum(0.0, p_bar - spread)
+        frame[SIGNAL] = np.select([frame[RATE] > frame[UCL], frame[RATE] < frame[LCL]], [ABOVE, BELOW], "")
+        return frame[columns]
+
+    def signals(self, period=MONTH, metric=COMPLIANCE_RATE, units=None):
+        """超出管制界限的點"""
+        chart = self.chart(period, metric, units)
+        return chart[chart[SIGNAL] != ""].reset_index(drop=True)
+
+
+class PartitionCharts:
+    """依月份分區維護的管制圖計數
+
+    分區新增的資料列逐筆 O(1) 累加（與讀取快取相同，假設同一版本的分區只會附加）；
+    版本改變（讀取快取完整重新讀取，可能有修改、刪除或整理）或列數比上次少時，
+    只重新彙總該分區。多個 session 共用，以 lock 保護。
+    """
+
+    def __init__(self):
+        self._partitions = {}    # 分區 -> (版本, 已累加列數, ControlCharts)
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+
+    def update(self, name, headers, rows, version=None):
+        """version 為 PartitionReadCache.get_versioned 回傳的分區版本（None 表示只依列數判斷）"""
+        # rows 可能是讀取快取中會在尾端附加的串列，以當下的列數為準
+        total = len(rows)
+        with self._lock:
+            known_version, consumed, charts = self._partitions.get(name, (None, 0, None))
+            if charts is None or total < consumed or version != known_version:
+                if charts is not None:
+                    self.rebuilds += 1
+                charts, consumed = ControlCharts(), 0
+            if headers and total > consumed:
+                charts.add_rows(headers, rows[consumed:total])
+            self._partitions[name] = (version, total, charts)
+        return charts
+
+    def charts(self, names):
+        """合併多個分區的計數（O(單位數 × 期間數)）"""
+        merged = ControlCharts()
+        with self._lock:
+            for name in names:
+                entry = self._partitions.get(name)
+                if entry is not None:
+                    merged.merge(entry[2])
+        return merged
+
+    def discard(self, name=None):
+        with self._lock:
+            if name is None:
+                self._partitions.clear()
+            else:
+                self._partitions.pop(name, None)
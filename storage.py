@@ -0,0 +1,730 @@
+"""儲存後端：Google Sheets、SQLite、記憶體
+
+所有後端都以「分區」（partition，例如 2026年1月）保存資料列，第一列為標題列。
+app 與管理工具只透過以下操作存取資料：
+
+- get_or_create_partition(name, headers)
+- append_rows(name, rows, headers)      大量附加
+- read_rows(name, offset)               讀取 offset 之後的資料列（不含標題列）
+- list_partitions() / delete_partition(name)
+
+本機後端（SQLite、記憶體）可再以 MirroredBackend 包裝，附加的資料列經由批次寫入器
+（sheets_writer.SheetsWriteBehind）非同步複寫到 Google Sheets。
+"""
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+from schema import RECORD_ID_FIELD
+
+SPREADSHEET_NAME = "hand-hygiene-new"
+DEFAULT_SQLITE_PATH = "audit_storage.sqlite3"
+DEFAULT_MIRROR_JOURNAL_PATH = "mirror_journal.sqlite3"
+KEY_FILE = "key.json"
+
+# 月份工作表容量：依觀察到的每月筆數一次預留足夠列數，避免逐列擴充格線
+MIN_GROWTH_ROWS = 500          # 每次擴充的最少列數
+CAPACITY_MARGIN = 1.2          # 新工作表容量 = 近期每月最大筆數 × 此倍數
+RECENT_MONTHS = 3              # 估計每月筆數時參考的近期月份數
+
+
+class StorageBackend(ABC):
+    """儲存後端介面；子類別需實作所有 abstractmethod，否則建立時即拋出 TypeError"""
+
+    name = "base"
+
+    def open(self):
+        """建立連線；重複呼叫不會重新連線"""
+        return self
+
+    @abstractmethod
+    def get_or_create_partition(self, name, headers):
+        """取得分區，不存在時以 headers 建立"""
+
+    @abstractmethod
+    def append_rows(self, name, rows, headers=None):
+        """附加多列資料，分區不存在時以 headers 建立；回傳附加列數"""
+
+    @abstractmethod
+    def read_rows(self, name, offset=0):
+        """讀取第 offset 筆之後的資料列（不含標題列）"""
+
+    @abstractmethod
+    def headers(self, name):
+        """分區的標題列；分區不存在時為空串列"""
+
+    @abstractmethod
+    def list_partitions(self):
+        """所有分區名稱"""
+
+    @abstractmethod
+    def delete_partition(self, name):
+        """刪除分區；不存在時不做任何事"""
+
+    def add_column(self, name, column):
+        """在分區標題列的最後加上一欄（既有資料列該欄為空白）"""
+        raise NotImplementedError(f"{self.name} 後端不支援新增欄位")
+
+    def column_values(self, name, column):
+        """讀取單一欄位的所有值（不含標題列）"""
+        headers = self.headers(name)
+        if column not in headers:
+            return []
+        index = headers.index(column)
+        return [row[index] if index < len(row) else "" for row in self.read_rows(name)]
+
+    def row_count(self, name):
+        """資料列數（不含標題列）"""
+        return len(self.read_rows(name))
+
+    def partition_info(self, names=None):
+        """各分區大小：{名稱: {"rows": 資料列數, "columns": 欄數, "grid_rows", "grid_cols"}}
+
+        grid_rows / grid_cols 為工作表格線大小，沒有格線概念的後端為 None
+        """
+        existing = self.list_partitions()
+        names = existing if names is None else [name for name in names if name in existing]
+        return {
+            name: {"rows": self.row_count(name), "columns": len(self.headers(name)),
+                   "grid_rows": None, "grid_cols": None}
+            for name in names
+        }
+
+    def export_partitions(self, names):
+        """讀取多個分區的完整內容，回傳 {名稱: (標題列, 資料列)}"""
+        return {name: (self.headers(name), self.read_rows(name)) for name in names}
+
+    def delete_partitions(self, names):
+        """刪除多個分區，回傳實際刪除的名稱"""
+        existing = set(self.list_partitions())
+        deleted = [name for name in names if name in existing]
+        for name in deleted:
+            self.delete_partition(name)
+        return deleted
+
+    def compact(self, names=None):
+        """回收未使用的空間；回傳 {名稱: (整理前, 整理後)} 的大小（無法計算時為空 dict）"""
+        return {}
+
+    def ping(self):
+        """健康檢查：連線失效時拋出例外"""
+        self.open()
+        self.list_partitions()
+
+    def reset(self):
+        """捨棄目前的連線，下次使用時重新建立"""
+
+    def invalidate(self, name=None):
+        """清除快取（寫入失敗時呼叫）；沒有快取的後端不需處理"""
+
+
+# ---- Google Sheets ----
+
+def column_letter(index):
+    """欄號 -> 欄名，例如 13 -> M"""
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def absolute_range_name(sheet_name, range_name):
+    """加上工作表名稱的 A1 範圍，例如 '2026年1月'!A:A"""
+    title = sheet_name.replace("'", "''")
+    return f"'{title}'!{range_name}"
+
+
+def open_spreadsheet(service_account_info=None, spreadsheet_name=SPREADSHEET_NAME, key_file=KEY_FILE):
+    """以本地 key.json 或服務帳號資訊開啟試算表"""
+    import gspread
+
+    if os.path.exists(key_file):
+        # 本地開發環境
+        gc = gspread.service_account(filename=key_file)
+    else:
+        # 雲端環境（Streamlit secrets）
+        gc = gspread.service_account_from_dict(dict(service_account_info))
+    return gc.open(spreadsheet_name)
+
+
+class GoogleSheetsBackend(StorageBackend):
+    """每個分區對應一個工作表"""
+
+    name = "sheets"
+
+    def __init__(self, spreadsheet=None, connect=None):
+        # connect()：延遲建立連線的函式，回傳 gspread Spreadsheet
+        self._spreadsheet = spreadsheet
+        self._connect = connect
+        self._cache = None
+        self._lock = threading.Lock()
+        # 容量管理：各工作表最後一列的列號、近期每月最大筆數（None 表示尚未估計）
+        self._last_rows = {}
+        self._monthly_peak = None
+        self.grow_calls = 0
+
+    @property
+    def spreadsheet(self):
+        return self.open()._spreadsheet
+
+    @property
+    def cache(self):
+        self.open()
+        return self._cache
+
+    def open(self):
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    from worksheet_cache import WorksheetCache
+                    if self._spreadsheet is None:
+                        self._spreadsheet = self._connect()
+                    self._cache = WorksheetCache(self._spreadsheet)
+        return self
+
+    def ping(self):
+        # 只要求 spreadsheetId 欄位，回應最小
+        self.spreadsheet.fetch_sheet_metadata({"fields": "spreadsheetId"})
+
+    def cache_stats(self):
+        """工作表快取與容量管理的統計；尚未連線時不建立連線"""
+        cache = self._cache
+        stats = cache.stats() if cache is not None else {}
+        stats["grow_calls"] = self.grow_calls
+        return stats
+
+    def reset(self):
+        with self._lock:
+            if self._connect is not None:
+                self._spreadsheet = None
+            self._cache = None
+            self._last_rows.clear()
+
+    def worksheet(self, name, headers=None, create=False):
+        return self.cache.get(name, headers, create=create)
+
+    def get_or_create_partition(self, name, headers):
+        worksheet = self.worksheet(name)
+        if worksheet is None:
+            worksheet = self.cache.get(name, headers, create=True, rows=self.initial_rows())
+        return worksheet
+
+    def append_rows(self, name, rows, headers=None):
+        if not rows:
+            return 0
+        if headers is not None:
+            worksheet = self.get_or_create_partition(name, headers)
+        else:
+            worksheet = self.worksheet(name)
+        if worksheet is None:
+            raise KeyError(name)
+        last_row = self._last_rows.get(name)
+        if last_row is not None:
+            # 已知目前列數：這批寫入會超出格線時先一次擴充
+            self._ensure_capacity(worksheet, last_row + len(rows))
+        response = worksheet.append_rows(rows)
+        last_row = _updated_last_row(response)
+        if last_row is not None:
+            self._last_rows[name] = last_row
+            self._observe(last_row - 1)
+            self._ensure_capacity(worksheet, last_row)
+        return len(rows)
+
+    # ---- 容量管理 ----
+
+    def growth_rows(self):
+        """每次擴充的列數：至少 MIN_GROWTH_ROWS，或近期每月筆數的 1/4"""
+        peak = self._monthly_peak or 0
+        return max(MIN_GROWTH_ROWS, _round_up(peak / 4, 100))
+
+    def initial_rows(self):
+        """新月份工作表的列數：容納近期每月最大筆數再加上餘裕"""
+        from worksheet_cache import NEW_SHEET_ROWS
+
+        if self._monthly_peak is None:
+            self._monthly_peak = self._estimate_monthly_peak()
+        return max(NEW_SHEET_ROWS, _round_up(self._monthly_peak * CAPACITY_MARGIN, 100) + 1)
+
+    def _estimate_monthly_peak(self):
+        """以一次 batchGet 讀取近期月份工作表的筆數"""
+        from worksheet_cache import parse_month_sheet_name
+
+        months = sorted(
+            (parsed, title) for title in self.list_partitions()
+            if (parsed := parse_month_sheet_name(title)) is not None
+        )[-RECENT_MONTHS:]
+        if not months:
+            return 0
+        try:
+            info = self.partition_info([title for _, title in months])
+        except Exception:
+            return 0
+        return max((size["rows"] for size in info.values()), default=0)
+
+    def _observe(self, data_rows):
+        self._monthly_peak = max(self._monthly_peak or 0, data_rows)
+
+    def _ensure_capacity(self, worksheet, last_row):
+        """剩餘空列少於擴充量的 1/4 時，一次擴充 growth_rows() 列"""
+        growth = self.growth_rows()
+        if worksheet.row_count - last_row >= growth // 4:
+            return
+        needed = max(growth, last_row - worksheet.row_count + growth)
+        worksheet.add_rows(needed)
+        self.grow_calls += 1
+
+    def read_rows(self, name, offset=0):
+        worksheet = self.worksheet(name)
+        # 第 1 列為標題列，資料從第 2 列開始；超出格線的範圍 Sheets 會拒絕，先行排除
+        if worksheet is None or offset + 2 > worksheet.row_count:
+            return []
+        # 不指定結束列，只傳回有資料的部分
+        return worksheet.get_values(f"A{offset + 2}:{column_letter(worksheet.col_count)}")
+
+    def headers(self, name):
+        worksheet = self.worksheet(name)
+        return worksheet.row_values(1) if worksheet is not None else []
+
+    def add_column(self, name, column):
+        worksheet = self.worksheet(name)
+        if worksheet is None:
+            raise KeyError(name)
+        headers = worksheet.row_values(1)
+        if len(headers) >= worksheet.col_count:
+            worksheet.add_cols(len(headers) + 1 - worksheet.col_count)
+        worksheet.update_cell(1, len(headers) + 1, column)
+
+    def column_values(self, name, column):
+        worksheet = self.worksheet(name)
+        if worksheet is None:
+            return []
+        headers = worksheet.row_values(1)
+        if column not in headers:
+            return []
+        return worksheet.col_values(headers.index(column) + 1)[1:]
+
+    def list_partitions(self):
+        return self.cache.titles()
+
+    def delete_partition(self, name):
+        worksheet = self.worksheet(name)
+        if worksheet is not None:
+            self.spreadsheet.del_worksheet(worksheet)
+        self.cache.invalidate(name)
+
+    def _worksheets(self, names=None):
+        """從快取的 metadata 取得工作表（不發出 API 呼叫）"""
+        titles = self.list_partitions() if names is None else names
+        return [ws for ws in (self.worksheet(title) for title in titles) if ws is not None]
+
+    def _batch_values(self, ranges):
+        """以一次 values.batchGet 讀取多個範圍"""
+        if not ranges:
+            return []
+        response = self.spreadsheet.values_batch_get(ranges)
+        return [value_range.get("values", []) for value_range in response.get("valueRanges", [])]
+
+    def partition_info(self, names=None):
+        # 格線大小取自 metadata；實際列數 / 欄數以一次 batchGet 讀取第 A 欄與標題列
+        worksheets = self._worksheets(names)
+        ranges = []
+        for ws in worksheets:
+            ranges.append(absolute_range_name(ws.title, "A:A"))
+            ranges.append(absolute_range_name(ws.title, "1:1"))
+        values = self._batch_values(ranges)
+        info = {}
+        for i, ws in enumerate(worksheets):
+            column_a, header = values[2 * i], values[2 * i + 1]
+            info[ws.title] = {
+                "rows": max(len(column_a) - 1, 0),
+                "columns": len(header[0]) if header else 0,
+                "grid_rows": ws.row_count,
+                "grid_cols": ws.col_count,
+            }
+        return info
+
+    def export_partitions(self, names):
+        worksheets = self._worksheets(names)
+        values = self._batch_values([absolute_range_name(ws.title, f"A1:{column_letter(ws.col_count)}")
+                                     for ws in worksheets])
+        return {ws.title: (rows[0] if rows else [], rows[1:]) for ws, rows in zip(worksheets, values)}
+
+    def delete_partitions(self, names):
+        # 以一次 batchUpdate 刪除所有工作表
+        worksheets = self._worksheets(names)
+        if worksheets:
+            self.spreadsheet.batch_update({
+                "requests": [{"deleteSheet": {"sheetId": ws.id}} for ws in worksheets]
+            })
+            self.invalidate()
+        return [ws.title for ws in worksheets]
+
+    def compact(self, names=None):
+        """將工作表格線縮小到實際使用的範圍，以一次 batchUpdate 完成"""
+        info = self.partition_info(names)
+        requests = []
+        result = {}
+        for ws in self._worksheets(list(info)):
+            size = info[ws.title]
+            rows = size["rows"] + 1
+            cols = max(size["columns"], 1)
+            if rows >= ws.row_count and cols >= ws.col_count:
+                continue
+            rows, cols = min(rows, ws.row_count), min(cols, ws.col_count)
+            requests.append({"updateSheetProperties": {
+                "properties": {"sheetId": ws.id, "gridProperties": {"rowCount": rows, "columnCount": cols}},
+                "fields": "gridProperties(rowCount,columnCount)",
+            }})
+            result[ws.title] = (ws.row_count * ws.col_count, rows * cols)
+        if requests:
+            self.spreadsheet.batch_update({"requests": requests})
+            self.invalidate()
+        return result
+
+    def invalidate(self, name=None):
+        if self._cache is not None:
+            self._cache.invalidate(name)
+        if name is None:
+            self._last_rows.clear()
+        else:
+            self._last_rows.pop(name, None)
+
+
+def _round_up(value, step):
+    return int(math.ceil(value / step) * step) if value > 0 else 0
+
+
+def _updated_last_row(response):
+    """append 回應中 updatedRange（例如 '2026年1月'!A1001:M1010）的最後一列"""
+    try:
+        updated_range = response["updates"]["updatedRange"]
+    except (TypeError, KeyError):
+        return None
+    match = re.search(r"(\d+)$", updated_range.rpartition("!")[2])
+    return int(match.group(1)) if match else None
+
+
+# ---- SQLite ----
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS partitions (
+    name        TEXT PRIMARY KEY,
+    headers     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rows (
+    partition   TEXT NOT NULL,
+    seq         INTEGER NOT NULL,
+    record_id   TEXT,
+    data        TEXT NOT NULL,
+    PRIMARY KEY (partition, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_rows_record_id ON rows (record_id);
+"""
+
+
+class SQLiteBackend(StorageBackend):
+    """本機 SQLite：以 (分區, 序號) 為主鍵，讀取 offset 之後的資料只需索引範圍掃描"""
+
+    name = "sqlite"
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, record_id_column=RECORD_ID_FIELD):
+        self.path = path
+        self.record_id_column = record_id_column
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                    conn.executescript(_SQLITE_SCHEMA)
+                    self._conn = conn
+        return self
+
+    # 分區清單一律從 partitions 表讀取：同一個檔案可能同時被管理工具（匯入、刪除、封存）
+    # 的其他程序修改，程序內的快取會過期
+    def _partition_headers(self, name):
+        row = self._conn.execute("SELECT headers FROM partitions WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_or_create_partition(self, name, headers):
+        self.open()
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO partitions (name, headers) VALUES (?, ?)",
+                               (name, json.dumps(list(headers), ensure_ascii=False)))
+        return name
+
+    def append_rows(self, name, rows, headers=None):
+        if not rows:
+            return 0
+        self.open()
+        with self._lock:
+            # IMMEDIATE：分區確認與寫入在同一個寫入交易內，避免其他程序在兩者之間刪除分區而留下孤兒資料列
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if headers is not None:
+                    self._conn.execute("INSERT OR IGNORE INTO partitions (name, headers) VALUES (?, ?)",
+                                       (name, json.dumps(list(headers), ensure_ascii=False)))
+                partition_headers = self._partition_headers(name)
+                if partition_headers is None:
+                    raise KeyError(name)
+                id_index = partition_headers.index(self.record_id_column) \
+                    if self.record_id_column in partition_headers else None
+                (last_seq,) = self._conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM rows WHERE partition = ?", (name,)
+                ).fetchone()
+                self._conn.executemany(
+                    "INSERT INTO rows (partition, seq, record_id, data) VALUES (?, ?, ?, ?)",
+                    [
+                        (name, last_seq + i + 1,
+                         row[id_index] if id_index is not None and id_index < len(row) else None,
+                         json.dumps(list(row), ensure_ascii=False))
+                        for i, row in enumerate(rows)
+                    ],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def read_rows(self, name, offset=0):
+        self.open()
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT data FROM rows WHERE partition = ? AND seq > ? ORDER BY seq", (name, offset)
+            )
+            return [json.loads(data) for (data,) in cursor]
+
+    def headers(self, name):
+        self.open()
+        with self._lock:
+            return self._partition_headers(name) or []
+
+    def add_column(self, name, column):
+        self.open()
+        with self._lock:
+            headers = self._partition_headers(name)
+            if headers is None:
+                raise KeyError(name)
+            self._conn.execute("UPDATE partitions SET headers = ? WHERE name = ?",
+                               (json.dumps(headers + [column], ensure_ascii=False), name))
+
+    def column_values(self, name, column):
+        if column == self.record_id_column:
+            self.open()
+            with self._lock:
+                cursor = self._conn.execute(
+                    "SELECT record_id FROM rows WHERE partition = ? ORDER BY seq", (name,)
+                )
+                return [record_id for (record_id,) in cursor]
+        return super().column_values(name, column)
+
+    def row_count(self, name):
+        self.open()
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rows WHERE partition = ?", (name,)).fetchone()[0]
+
+    def list_partitions(self):
+        self.open()
+        with self._lock:
+            return [name for (name,) in self._conn.execute("SELECT name FROM partitions ORDER BY rowid")]
+
+    def delete_partition(self, name):
+        self.delete_partitions([name])
+
+    def delete_partitions(self, names):
+        self.open()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                deleted = []
+                for name in names:
+                    self._conn.execute("DELETE FROM rows WHERE partition = ?", (name,))
+                    if self._conn.execute("DELETE FROM partitions WHERE name = ?", (name,)).rowcount:
+                        deleted.append(name)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return deleted
+
+    def compact(self, names=None):
+        """VACUUM 回收已刪除資料的空間，回傳資料庫檔大小（位元組）"""
+        self.open()
+        before = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        with self._lock:
+            self._conn.execute("VACUUM")
+            self._conn.execute("ANALYZE")
+        after = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {self.path: (before, after)}
+
+
+# ---- 記憶體 ----
+
+class MemoryBackend(StorageBackend):
+    """程序內記憶體，用於測試與基準測試"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._partitions = {}
+        self._lock = threading.Lock()
+
+    def get_or_create_partition(self, name, headers):
+        with self._lock:
+            self._partitions.setdefault(name, (list(headers), []))
+        return name
+
+    def append_rows(self, name, rows, headers=None):
+        if name not in self._partitions:
+            if headers is None:
+                raise KeyError(name)
+            self.get_or_create_partition(name, headers)
+        with self._lock:
+            self._partitions[name][1].extend(list(row) for row in rows)
+        return len(rows)
+
+    def read_rows(self, name, offset=0):
+        with self._lock:
+            if name not in self._partitions:
+                return []
+            return [list(row) for row in self._partitions[name][1][offset:]]
+
+    def headers(self, name):
+        return list(self._partitions.get(name, ([], []))[0])
+
+    def add_column(self, name, column):
+        with self._lock:
+            self._partitions[name][0].append(column)
+
+    def row_count(self, name):
+        return len(self._partitions.get(name, ([], []))[1])
+
+    def list_partitions(self):
+        return list(self._partitions)
+
+    def delete_partition(self, name):
+        with self._lock:
+            self._partitions.pop(name, None)
+
+
+# ---- 複寫 ----
+
+class MirroredBackend(StorageBackend):
+    """以本機後端為主，附加的資料列再非同步複寫到另一個後端（通常為 Google Sheets）
+
+    讀取、列出與管理操作都只作用於主要後端；複寫只包含附加的資料列，
+    刪除、封存與整理不會同步到複寫端。複寫由 SheetsWriteBehind 負責：
+    先寫入複寫日誌，失敗時保留並重試，重送前依紀錄ID排除已寫入的列。
+    """
+
+    def __init__(self, primary, mirror_writer):
+        # mirror_writer：sheets_writer.SheetsWriteBehind，其 backend 為複寫端
+        self.primary = primary
+        self.mirror = mirror_writer
+        self.name = primary.name
+
+    def open(self):
+        self.primary.open()
+        return self
+
+    def get_or_create_partition(self, name, headers):
+        return self.primary.get_or_create_partition(name, headers)
+
+    def append_rows(self, name, rows, headers=None):
+        appended = self.primary.append_rows(name, rows, headers)
+        if rows:
+            headers = list(headers) if headers is not None else self.primary.headers(name)
+            self.mirror.submit_many([dict(zip(headers, row)) for row in rows], name)
+        return appended
+
+    def read_rows(self, name, offset=0):
+        return self.primary.read_rows(name, offset)
+
+    def headers(self, name):
+        return self.primary.headers(name)
+
+    def add_column(self, name, column):
+        return self.primary.add_column(name, column)
+
+    def column_values(self, name, column):
+        return self.primary.column_values(name, column)
+
+    def row_count(self, name):
+        return self.primary.row_count(name)
+
+    def list_partitions(self):
+        return self.primary.list_partitions()
+
+    def partition_info(self, names=None):
+        return self.primary.partition_info(names)
+
+    def export_partitions(self, names):
+        return self.primary.export_partitions(names)
+
+    def delete_partition(self, name):
+        self.primary.delete_partition(name)
+
+    def delete_partitions(self, names):
+        return self.primary.delete_partitions(names)
+
+    def compact(self, names=None):
+        return self.primary.compact(names)
+
+    def ping(self):
+        # 複寫端的連線也一併預先建立並檢查（open() 只開啟主要後端，複寫端失效不影響本機寫入）
+        self.primary.ping()
+        self.mirror.backend.ping()
+
+    def reset(self):
+        self.primary.reset()
+        self.mirror.backend.reset()
+
+    def invalidate(self, name=None):
+        self.primary.invalidate(name)
+
+    def mirror_stats(self):
+        return self.mirror.stats()
+
+
+def open_backend(config=None, connect=None):
+    """依設定建立後端
+
+    config 為 dict（例如 secrets.toml 的 [storage] 區段）：
+    backend = "sheets"（預設）| "sqlite" | "memory"、sqlite_path = "..."、
+    mirror = "sheets"（本機後端再非同步複寫到 Google Sheets）、mirror_journal_path = "..."
+    connect 為建立 Google Sheets 連線的函式（sheets 後端使用）
+    """
+    config = dict(config or {})
+    kind = config.get("backend", GoogleSheetsBackend.name)
+    if kind == GoogleSheetsBackend.name:
+        backend = GoogleSheetsBackend(connect=connect)
+    elif kind == SQLiteBackend.name:
+        backend = SQLiteBackend(config.get("sqlite_path", DEFAULT_SQLITE_PATH))
+    elif kind == MemoryBackend.name:
+        backend = MemoryBackend()
+    else:
+        raise ValueError(f"未知的儲存後端：{kind}")
+
+    mirror = config.get("mirror")
+    if not mirror:
+        return backend
+    if mirror == kind:
+        raise ValueError(f"複寫端不可與主要後端相同：{mirror}")
+    from journal import ObservationJournal
+    from sheets_writer import SheetsWriteBehind
+
+    writer = SheetsWriteBehind(
+        open_backend({"backend": mirror}, connect=connect),
+        ObservationJournal(config.get("mirror_journal_path", DEFAULT_MIRROR_JOURNAL_PATH)),
+    )
+    return MirroredBackend(backend, writer)
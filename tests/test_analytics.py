@@ -0,0 +1,34 @@
+"""遵從率統計：依月份分組時不同年度的同名月份分開計算"""
+import pandas as pd
+import pytest
+
+from analytics import compliance_counts, YEAR_COLUMN, COUNT
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "稽核日期": ["2024-01-05", "2025-01-05", "2025-01-20", "2025-02-01"],
+        "稽核月份": ["1月", "1月", "1月", "2月"],
+        "稽核者單位": ["內科", "內科", "外科", "內科"],
+        "手部衛生方式": ["洗手", "乾洗手", "沒有洗手", "洗手"],
+        "手部衛生正確性": ["正確", "正確", "", "不正確"],
+    })
+
+
+@pytest.mark.parametrize("as_dates", [
+    lambda s: s,
+    lambda s: s.astype("category"),
+    lambda s: pd.to_datetime(s),
+])
+def test_month_grouping_separates_years(frame, as_dates):
+    frame["稽核日期"] = as_dates(frame["稽核日期"])
+    counts = compliance_counts(frame, by=["稽核月份"])
+
+    assert counts.index.names == [YEAR_COLUMN, "稽核月份"]
+    assert counts[COUNT].to_dict() == {(2024, "1月"): 1, (2025, "1月"): 2, (2025, "2月"): 1}
+
+
+def test_year_grouping_with_other_columns(frame):
+    counts = compliance_counts(frame, by=["稽核者單位", YEAR_COLUMN])
+    assert counts[COUNT].to_dict() == {("內科", 2024): 1, ("內科", 2025): 2, ("外科", 2025): 1}
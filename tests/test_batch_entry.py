@@ -0,0 +1,91 @@
+"""批次表格：整批驗證、空白列略過、預設值與不正確原因的標準寫法"""
+import math
+
+from batch_entry import (GRID_COLUMNS, CORRECTNESS_COLUMN, METHOD_COLUMN, MOMENT_COLUMN, REASON_COLUMN,
+                         STAFF_UNIT_COLUMN, build_records, empty_grid)
+from schema import (COLUMNS, CORRECT, DRY_HANDRUB, HYGIENE_MOMENTS, INCORRECT, NO_HYGIENE, NONE_TEXT,
+                    NOT_ASSESSED, RECORD_ID_FIELD, WET_HANDWASH)
+
+BASE = {
+    "登入者Email": "auditor@hospital.com",
+    "稽核日期": "2026-01-05",
+    "稽核時間": "10:00:00",
+    "稽核月份": "1月",
+    "稽核者單位": "ICU",
+    "稽核人員": "王小明",
+}
+MOMENT = HYGIENE_MOMENTS[0]
+
+
+def grid_rows(*changes, rows=4):
+    """空白表格的 records，依序套用每列的變更"""
+    records = empty_grid("護理師", "ICU", rows=rows).to_dict("records")
+    for record, change in zip(records, changes):
+        record.update(change)
+    return records
+
+
+def ids(n):
+    return [f"row-{i}" for i in range(n)]
+
+
+def test_empty_grid_defaults_to_base_staff():
+    grid = empty_grid("護理師", "ICU", rows=3)
+    assert list(grid.columns) == GRID_COLUMNS
+    assert grid[STAFF_UNIT_COLUMN].tolist() == ["ICU"] * 3
+
+
+def test_blank_rows_are_skipped_and_record_ids_follow_row_position():
+    rows = grid_rows(
+        {MOMENT_COLUMN: MOMENT, METHOD_COLUMN: DRY_HANDRUB, CORRECTNESS_COLUMN: CORRECT},
+        {},
+        {MOMENT_COLUMN: MOMENT, METHOD_COLUMN: WET_HANDWASH, CORRECTNESS_COLUMN: CORRECT},
+    )
+    records, errors = build_records(rows, BASE, ids(len(rows)))
+
+    assert errors == []
+    assert [record[RECORD_ID_FIELD] for record in records] == ["row-0", "row-2"]
+    # 共用欄位由基本資料帶入，欄位與工作表一致
+    assert all(set(COLUMNS) <= set(record) for record in records)
+    assert all(record["稽核人員"] == "王小明" for record in records)
+    assert all(record[REASON_COLUMN] == NONE_TEXT for record in records)
+
+
+def test_no_hygiene_defaults_to_not_assessed():
+    rows = grid_rows({MOMENT_COLUMN: MOMENT, METHOD_COLUMN: NO_HYGIENE, CORRECTNESS_COLUMN: None})
+    records, errors = build_records(rows, BASE, ids(len(rows)))
+
+    assert errors == []
+    assert records[0][CORRECTNESS_COLUMN] == NOT_ASSESSED
+
+
+def test_incorrect_reasons_are_canonicalized():
+    rows = grid_rows({MOMENT_COLUMN: MOMENT, METHOD_COLUMN: DRY_HANDRUB, CORRECTNESS_COLUMN: INCORRECT,
+                      REASON_COLUMN: " 未搓到手部全乾 , 步驟不完整"})
+    records, errors = build_records(rows, BASE, ids(len(rows)))
+
+    assert errors == []
+    assert records[0][REASON_COLUMN] == "步驟不完整, 搓揉時間過短(少於20-30秒)或未搓到全乾"
+
+
+def test_errors_name_each_invalid_row():
+    rows = grid_rows(
+        {MOMENT_COLUMN: MOMENT, METHOD_COLUMN: DRY_HANDRUB, CORRECTNESS_COLUMN: CORRECT},
+        {MOMENT_COLUMN: MOMENT, METHOD_COLUMN: DRY_HANDRUB, CORRECTNESS_COLUMN: INCORRECT},
+        {MOMENT_COLUMN: None, METHOD_COLUMN: WET_HANDWASH, CORRECTNESS_COLUMN: CORRECT},
+        {MOMENT_COLUMN: MOMENT, METHOD_COLUMN: NO_HYGIENE, CORRECTNESS_COLUMN: CORRECT},
+    )
+    _, errors = build_records(rows, BASE, ids(len(rows)))
+
+    assert errors == [
+        "第 2 列：請選擇不正確原因！",
+        "第 3 列：請選擇手部衛生時機！",
+        "第 4 列：沒有洗手時正確性應為未評估！",
+    ]
+
+
+def test_nan_cells_from_the_editor_count_as_blank():
+    rows = grid_rows({MOMENT_COLUMN: math.nan, METHOD_COLUMN: math.nan, REASON_COLUMN: math.nan})
+    records, errors = build_records(rows, BASE, ids(len(rows)))
+
+    assert records == [] and errors == []
@@ -0,0 +1,31 @@
+"""Excel 逐塊轉 Parquet：後面的塊有更多不同的自由文字值時仍能寫入同一個檔案"""
+import pandas as pd
+
+from columnar import excel_to_parquet, load_parquet, write_excel_chunks
+from schema import DATE_COLUMN
+
+CHUNK_ROWS = 200
+
+
+def frame(start, rows, auditors):
+    return pd.DataFrame({
+        "紀錄ID": [f"r{start + i}" for i in range(rows)],
+        DATE_COLUMN: ["2025/01/05"] * rows,
+        "稽核人員": [f"稽核員{i % auditors}" for i in range(rows)],
+        "單位": ["內科"] * rows,
+    })
+
+
+def test_multi_chunk_conversion_with_growing_dictionaries(tmp_path):
+    src, dst = tmp_path / "history.xlsx", tmp_path / "history.parquet"
+    # 第一塊只有 10 位稽核人員（int8 索引即可），後兩塊有 300 位
+    chunks = [frame(0, 200, 10), frame(200, 400, 300)]
+    write_excel_chunks(str(src), chunks)
+
+    assert excel_to_parquet(str(src), str(dst), chunk_rows=CHUNK_ROWS) == 600
+
+    df = load_parquet(str(dst))
+    expected = pd.concat(chunks, ignore_index=True)
+    assert df["紀錄ID"].tolist() == expected["紀錄ID"].tolist()
+    assert df["稽核人員"].astype(str).tolist() == expected["稽核人員"].tolist()
+    assert df["稽核人員"].nunique() == 300
@@ -0,0 +1,101 @@
+"""歷史資料匯入續傳：在 append_rows 之後、進度檔儲存之前中斷，重新執行不產生重複列"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import importer
+from generate_mock_data import generate_month_data
+from importer import HistoricalImport
+from schema import RECORD_ID_FIELD
+from storage import MemoryBackend
+
+BATCH_ROWS = 200
+
+
+@pytest.fixture
+def source(tmp_path):
+    """跨兩個月份的來源 CSV"""
+    frames = [generate_month_data(year, month, np.random.SeedSequence(seed), rows_per_month=(700, 700))
+              for seed, (year, month) in enumerate([(2025, 12), (2026, 1)])]
+    path = tmp_path / "history.csv"
+    pd.concat(frames, ignore_index=True).astype(str).to_csv(path, index=False, encoding="utf-8-sig")
+    return str(path)
+
+
+def source_rows(path):
+    return len(pd.read_csv(path))
+
+
+def imported_ids(backend):
+    return [record_id for name in backend.list_partitions()
+            for record_id in backend.column_values(name, RECORD_ID_FIELD)]
+
+
+def test_full_import(source):
+    backend = MemoryBackend()
+    job = HistoricalImport(backend, source, batch_rows=BATCH_ROWS).run()
+
+    ids = imported_ids(backend)
+    assert len(ids) == source_rows(source) == job.checkpoint.rows_written
+    assert len(set(ids)) == len(ids)
+    assert sorted(backend.list_partitions()) == ["2025年12月", "2026年1月"]
+    assert job.checkpoint.finished
+
+
+def test_resume_after_crash_between_append_and_checkpoint(source, monkeypatch):
+    backend = MemoryBackend()
+    save = importer.ImportCheckpoint.save
+    saves = []
+
+    def crash_on_second_save(checkpoint):
+        saves.append(1)
+        if len(saves) == 2:
+            raise KeyboardInterrupt("crash before checkpoint")
+        save(checkpoint)
+
+    monkeypatch.setattr(importer.ImportCheckpoint, "save", crash_on_second_save)
+    with pytest.raises(KeyboardInterrupt):
+        HistoricalImport(backend, source, batch_rows=BATCH_ROWS).run()
+    # 第二批已寫入，但進度檔仍停在第一批
+    assert len(imported_ids(backend)) == 2 * BATCH_ROWS
+    monkeypatch.setattr(importer.ImportCheckpoint, "save", save)
+
+    job = HistoricalImport(backend, source, batch_rows=BATCH_ROWS)
+    assert job.resumed and job.checkpoint.rows_done == BATCH_ROWS
+    job.run()
+
+    ids = imported_ids(backend)
+    assert len(ids) == source_rows(source)
+    assert len(set(ids)) == len(ids)
+    assert job.rows_skipped_existing == BATCH_ROWS
+
+
+def test_resume_after_ambiguous_append_failure(source):
+    class FlakyBackend(MemoryBackend):
+        # 第 3 次 append_rows 寫入後回應遺失
+        calls = 0
+
+        def append_rows(self, name, rows, headers=None):
+            self.calls += 1
+            written = super().append_rows(name, rows, headers)
+            if self.calls == 3:
+                raise ConnectionError("response lost")
+            return written
+
+    backend = FlakyBackend()
+    with pytest.raises(ConnectionError):
+        HistoricalImport(backend, source, batch_rows=BATCH_ROWS).run()
+    HistoricalImport(backend, source, batch_rows=BATCH_ROWS).run()
+
+    ids = imported_ids(backend)
+    assert len(ids) == source_rows(source)
+    assert len(set(ids)) == len(ids)
+
+
+def test_finished_import_is_not_repeated(source):
+    backend = MemoryBackend()
+    HistoricalImport(backend, source, batch_rows=BATCH_ROWS).run()
+    job = HistoricalImport(backend, source, batch_rows=BATCH_ROWS).run()
+
+    assert job.rows_written == 0
+    assert len(imported_ids(backend)) == source_rows(source)
@@ -0,0 +1,164 @@
+"""日誌補送：寫入結果不明（已寫入但回應遺失、只寫入部分列）時，重送不產生重複列"""
+import pytest
+
+from benchmarks.fake_sheets import FakeSpreadsheet
+from journal import ObservationJournal, SYNCED
+from schema import RECORD_ID_FIELD
+from sheets_writer import SheetsWriteBehind
+from storage import GoogleSheetsBackend, MemoryBackend
+
+SHEET = "2026年1月"
+
+
+class FlakyBackend(MemoryBackend):
+    """前 failures 次 append_rows 只寫入前 written 列後拋出連線錯誤"""
+
+    def __init__(self, failures=1, written=None):
+        super().__init__()
+        self.failures = failures
+        self.written = written
+        self.append_calls = 0
+
+    def append_rows(self, name, rows, headers=None):
+        self.append_calls += 1
+        if self.failures:
+            self.failures -= 1
+            count = len(rows) if self.written is None else self.written
+            super().append_rows(name, rows[:count], headers)
+            raise ConnectionError("response lost")
+        return super().append_rows(name, rows, headers)
+
+
+def make_records(n):
+    return [{RECORD_ID_FIELD: f"uid-{i}", "稽核日期": "2026-01-05", "備註": str(i)} for i in range(n)]
+
+
+@pytest.fixture
+def make_writer():
+    writers = []
+
+    def make(backend, journal=None):
+        # 背景執行緒不主動寫入，由測試呼叫 flush()
+        writer = SheetsWriteBehind(backend, journal or ObservationJournal(":memory:"),
+                                   batch_size=10_000, flush_interval=3600)
+        writers.append(writer)
+        return writer
+
+    yield make
+    for writer in writers:
+        writer.close()
+
+
+def record_ids(backend):
+    return backend.column_values(SHEET, RECORD_ID_FIELD)
+
+
+@pytest.mark.parametrize("written", [None, 2], ids=["response-lost", "partial-append"])
+def test_replay_after_ambiguous_append_has_no_duplicates(make_writer, written):
+    backend = FlakyBackend(failures=1, written=written)
+    writer = make_writer(backend)
+    records = make_records(5)
+    uids = [writer.submit(record, SHEET) for record in records]
+
+    assert writer.flush() == 0
+    assert writer.pending_count == 5
+    assert writer.last_error == "response lost"
+
+    assert writer.flush() == 5
+    assert sorted(record_ids(backend)) == sorted(uids)
+    assert writer.pending_count == 0
+    assert set(writer.sync_status(uids).values()) == {"confirmed"}
+
+
+def test_replay_skips_append_when_everything_was_written(make_writer):
+    backend = FlakyBackend(failures=1)
+    writer = make_writer(backend)
+    for record in make_records(3):
+        writer.submit(record, SHEET)
+
+    writer.flush()
+    writer.flush()
+    # 第二次只比對紀錄ID，不再呼叫 append_rows
+    assert backend.append_calls == 1
+    assert len(record_ids(backend)) == 3
+
+
+def test_resubmitted_record_is_journaled_once(make_writer):
+    backend = MemoryBackend()
+    writer = make_writer(backend)
+    record = make_records(1)[0]
+    writer.submit(record, SHEET)
+    writer.submit(dict(record), SHEET)
+
+    assert writer.duplicate_rows == 1
+    writer.flush()
+    assert record_ids(backend) == ["uid-0"]
+
+
+def test_pending_records_survive_restart(tmp_path, make_writer):
+    path = str(tmp_path / "journal.sqlite3")
+    offline = FlakyBackend(failures=1, written=0)
+    writer = make_writer(offline, ObservationJournal(path))
+    for record in make_records(2):
+        writer.submit(record, SHEET)
+    writer.flush()
+
+    # 模擬重新啟動：另一個程序開啟同一個日誌檔
+    backend = MemoryBackend()
+    journal = ObservationJournal(path)
+    assert journal.pending_count() == 2
+    make_writer(backend, journal).flush()
+    assert sorted(record_ids(backend)) == ["uid-0", "uid-1"]
+    assert set(status for status, _ in journal.status(["uid-0", "uid-1"]).values()) == {SYNCED}
+
+
+def test_failure_cleanup_errors_do_not_escape(make_writer):
+    class BrokenJournal(ObservationJournal):
+        def mark_failed(self, uids, error):
+            raise RuntimeError("database is locked")
+
+    writer = make_writer(FlakyBackend(failures=1, written=0), BrokenJournal(":memory:"))
+    writer.submit(make_records(1)[0], SHEET)
+
+    assert writer.flush() == 0
+    assert "database is locked" in writer.last_error
+
+
+def legacy_records(n):
+    """紀錄ID接在原有欄位之後"""
+    return [{"稽核日期": "2026-01-05", "備註": str(i), RECORD_ID_FIELD: f"uid-{i}"} for i in range(n)]
+
+
+def test_replay_on_legacy_sheet_without_record_id_column(make_writer):
+    # 舊版建立的工作表：標題列沒有紀錄ID
+    backend = FlakyBackend(failures=1)
+    MemoryBackend.append_rows(backend, SHEET, [["2025-12-31", "舊資料"]], ["稽核日期", "備註"])
+    writer = make_writer(backend)
+    uids = [writer.submit(record, SHEET) for record in legacy_records(3)]
+
+    writer.flush()
+    assert writer.flush() == 3
+    assert backend.headers(SHEET) == ["稽核日期", "備註", RECORD_ID_FIELD]
+    assert record_ids(backend) == [""] + uids
+
+
+def test_legacy_google_sheet_gets_record_id_header(make_writer):
+    backend = GoogleSheetsBackend(FakeSpreadsheet())
+    backend.append_rows(SHEET, [["2025-12-31", "舊資料"]], ["稽核日期", "備註"])
+    writer = make_writer(backend)
+    uids = [writer.submit(record, SHEET) for record in legacy_records(2)]
+
+    assert writer.flush() == 2
+    assert backend.headers(SHEET) == ["稽核日期", "備註", RECORD_ID_FIELD]
+    assert record_ids(backend) == [""] + uids
+
+
+def test_mismatched_legacy_header_is_reported(make_writer):
+    backend = MemoryBackend()
+    backend.append_rows(SHEET, [["舊資料", "2025-12-31"]], ["備註", "稽核日期"])
+    writer = make_writer(backend)
+    writer.submit(legacy_records(1)[0], SHEET)
+
+    assert writer.flush() == 0
+    assert RECORD_ID_FIELD in writer.last_error
+    assert backend.row_count(SHEET) == 1
@@ -0,0 +1,88 @@
+"""效能指標：直方圖分位數、計時錯誤、逐段計時與 Prometheus 匯出"""
+import pytest
+
+from metrics import Histogram, MetricsRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def histogram(registry, name, **labels):
+    return next(item for item in registry.snapshot()["histograms"]
+                if item["name"] == name and item["labels"] == labels)
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    h = Histogram(buckets=(0.1, 0.2, 0.4))
+    for seconds in [0.05] * 50 + [0.15] * 45 + [0.3] * 5:
+        h.observe(seconds)
+
+    assert h.quantile(0.5) == pytest.approx(0.1)
+    assert h.quantile(0.95) == pytest.approx(0.2)
+    assert 0.2 < h.quantile(0.99) <= 0.4
+    assert Histogram().quantile(0.5) is None
+
+
+def test_timer_records_errors_and_reraises():
+    clock = FakeClock()
+    registry = MetricsRegistry(clock=clock)
+
+    with registry.timer("save", kind="batch"):
+        clock.now += 0.02
+    with pytest.raises(ValueError):
+        with registry.timer("save", kind="batch"):
+            clock.now += 0.5
+            raise ValueError("boom")
+
+    item = histogram(registry, "save", kind="batch")
+    assert item["count"] == 2
+    assert item["errors"] == 1
+    assert item["max_s"] == pytest.approx(0.5)
+
+
+def test_stopwatch_records_each_section():
+    clock = FakeClock()
+    registry = MetricsRegistry(clock=clock)
+    lap = registry.stopwatch("app_section", "app_rerun")
+    clock.now += 0.1
+    lap("login")
+    clock.now += 0.3
+    lap("form")
+    lap.finish()
+
+    assert histogram(registry, "app_section", section="login")["sum_s"] == pytest.approx(0.1)
+    assert histogram(registry, "app_section", section="form")["sum_s"] == pytest.approx(0.3)
+    assert histogram(registry, "app_rerun")["sum_s"] == pytest.approx(0.4)
+
+
+def test_collector_errors_do_not_break_snapshot():
+    registry = MetricsRegistry()
+    registry.register_collector("ok", lambda: {"hits": 3})
+    registry.register_collector("broken", lambda: 1 / 0)
+
+    stats = registry.snapshot()["stats"]
+    assert stats["ok"] == {"hits": 3}
+    assert "error" in stats["broken"]
+
+
+def test_prometheus_export():
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.observe("sheets_api", 0.05, kind="read")
+    registry.observe("sheets_api", 0.5, kind="read", error=True)
+    registry.increment("sheets_retries", kind="write")
+    registry.register_collector("read_cache", lambda: {"hits": 7, "enabled": True, "last_error": None})
+
+    lines = registry.to_prometheus().splitlines()
+    assert "# TYPE hand_hygiene_sheets_api_seconds histogram" in lines
+    assert 'hand_hygiene_sheets_api_seconds_bucket{kind="read",le="0.1"} 1' in lines
+    assert 'hand_hygiene_sheets_api_seconds_bucket{kind="read",le="+Inf"} 2' in lines
+    assert 'hand_hygiene_sheets_api_errors_total{kind="read"} 1' in lines
+    assert 'hand_hygiene_sheets_retries_total{kind="write"} 1' in lines
+    assert "hand_hygiene_read_cache_hits 7" in lines
+    # 布林值與非數值的統計不匯出
+    assert not any("enabled" in line or "last_error" in line for line in lines)
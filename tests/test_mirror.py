@@ -0,0 +1,46 @@
+"""複寫後端：健康檢查與重建連線同時涵蓋 Google Sheets 複寫端"""
+import pytest
+
+from benchmarks.fake_sheets import FakeSpreadsheet
+from journal import ObservationJournal
+from sheets_writer import SheetsWriteBehind
+from storage import GoogleSheetsBackend, MemoryBackend, MirroredBackend
+
+
+@pytest.fixture
+def connections():
+    return []
+
+
+@pytest.fixture
+def backend(connections):
+    def connect():
+        spreadsheet = FakeSpreadsheet()
+        connections.append(spreadsheet)
+        return spreadsheet
+
+    writer = SheetsWriteBehind(GoogleSheetsBackend(connect=connect), ObservationJournal(":memory:"),
+                               flush_interval=3600)
+    yield MirroredBackend(MemoryBackend(), writer)
+    writer.close()
+
+
+def test_ping_prewarms_mirror_connection(backend, connections):
+    backend.ping()
+    assert len(connections) == 1
+
+
+def test_reset_rebuilds_mirror_connection(backend, connections):
+    backend.ping()
+    backend.reset()
+    backend.ping()
+    assert len(connections) == 2
+
+
+def test_failed_mirror_fails_health_check(backend):
+    def refuse():
+        raise ConnectionError("offline")
+
+    backend.mirror.backend._connect = refuse
+    with pytest.raises(ConnectionError):
+        backend.ping()
@@ -0,0 +1,112 @@
+"""跨月份查詢：分區裁剪（含跨年度）、邊界月份的日期篩選與分區讀取方式"""
+import datetime
+
+import pytest
+
+from benchmarks.fake_sheets import FakeSpreadsheet
+from query import fetch_partitions, plan_partitions, query_audits
+from read_cache import PartitionReadCache
+from storage import GoogleSheetsBackend, MemoryBackend
+from worksheet_cache import month_partition, partition_year
+
+HEADERS = ["稽核日期", "稽核月份", "稽核者單位", "受稽核人員類別", "手部衛生時機", "手部衛生方式", "手部衛生正確性"]
+EXISTING = ["2025年10月", "2025年11月", "2025年12月", "2026年1月", "2026年2月", "統計"]
+
+
+def row(audit_date, unit="ICU"):
+    month = f"{int(audit_date[5:7])}月"
+    return [audit_date, month, unit, "護理師", "時機1: 接觸病人前", "沒有洗手", "未評估(沒有洗手)"]
+
+
+class RecordingBackend(MemoryBackend):
+    """記錄讀取過的分區"""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = []
+
+    def read_rows(self, name, offset=0):
+        self.reads.append(name)
+        return super().read_rows(name, offset)
+
+
+def fill(backend):
+    data = {
+        "2025年11月": ["2025-11-20"],
+        "2025年12月": ["2025-12-01", "2025-12-20", "2025-12-31"],
+        "2026年1月": ["2026-01-01", "2026-01-10", "2026-01-20"],
+        "2026年2月": ["2026-02-03"],
+    }
+    for name, dates in data.items():
+        backend.append_rows(name, [row(d, unit="ICU" if i % 2 == 0 else "ER") for i, d in enumerate(dates)],
+                            HEADERS)
+    return backend
+
+
+def test_plan_spans_year_boundary_and_marks_partial_months():
+    plan = plan_partitions(datetime.date(2025, 12, 15), datetime.date(2026, 1, 10), EXISTING)
+    assert plan == [("2025年12月", True), ("2026年1月", True)]
+
+
+def test_plan_keeps_whole_months_unfiltered_and_skips_missing():
+    plan = plan_partitions(datetime.date(2025, 11, 1), datetime.date(2026, 3, 31), EXISTING)
+    assert plan == [("2025年11月", False), ("2025年12月", False), ("2026年1月", False), ("2026年2月", False)]
+    assert plan_partitions(datetime.date(2024, 1, 1), datetime.date(2024, 12, 31), EXISTING) == []
+
+
+def test_query_reads_only_partitions_in_range():
+    backend = fill(RecordingBackend())
+    df = query_audits(backend, "2025-12-15", "2026-01-10")
+
+    assert sorted(backend.reads) == ["2025年12月", "2026年1月"]
+    assert df["稽核日期"].dt.strftime("%Y-%m-%d").tolist() == ["2025-12-20", "2025-12-31", "2026-01-01", "2026-01-10"]
+    assert str(df["稽核日期"].dtype).startswith("datetime64")
+    assert df["稽核月份"].cat.ordered
+
+
+def test_query_filters_units_per_partition():
+    backend = fill(MemoryBackend())
+    df = query_audits(backend, datetime.date(2025, 11, 1), datetime.date(2026, 2, 28), units=["ER"])
+    assert df["稽核日期"].dt.strftime("%Y-%m-%d").tolist() == ["2025-12-20", "2026-01-10"]
+    assert set(df["稽核者單位"]) == {"ER"}
+
+
+def test_query_without_matching_partitions_returns_typed_empty_frame():
+    df = query_audits(fill(MemoryBackend()), "2024-01-01", "2024-12-31")
+    assert df.empty
+    assert "稽核日期" in df.columns
+
+
+def test_query_rejects_reversed_range():
+    with pytest.raises(ValueError):
+        query_audits(MemoryBackend(), "2026-02-01", "2026-01-01")
+
+
+def test_sheets_partitions_are_fetched_with_one_batch_get():
+    spreadsheet = FakeSpreadsheet()
+    backend = fill(GoogleSheetsBackend(spreadsheet))
+    reads_before = spreadsheet.calls["read"]
+
+    parts = fetch_partitions(backend, ["2025年12月", "2026年1月"])
+
+    assert spreadsheet.calls["read"] - reads_before == 1
+    assert parts["2025年12月"][0] == HEADERS
+    assert len(parts["2026年1月"][1]) == 3
+
+
+def test_read_cache_partitions_are_fetched_concurrently_through_the_cache():
+    backend = fill(RecordingBackend())
+    cache = PartitionReadCache(backend)
+    names = ["2025年11月", "2025年12月", "2026年1月"]
+
+    first = fetch_partitions(cache, names, workers=3)
+    second = fetch_partitions(cache, names, workers=3)
+
+    assert first == second
+    assert sorted(backend.reads) == sorted(names)
+
+
+def test_december_audit_entered_in_january_belongs_to_previous_year():
+    assert partition_year(datetime.date(2027, 1, 5), "12月") == 2026
+    assert month_partition("2027-01-05", "12月") == "2026年12月"
+    assert month_partition("2027-01-05", "1月") == "2027年1月"
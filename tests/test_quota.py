@@ -0,0 +1,156 @@
+"""配額控制：token bucket 速率、重試規則（寫入不重試結果不明的錯誤）與讀取合併"""
+import threading
+import time
+
+import pytest
+from gspread.exceptions import APIError
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+
+from quota import QuotaClient, TokenBucket, READ, WRITE
+
+
+class FakeResponse:
+    def __init__(self, code):
+        self.status_code = code
+        self.text = ""
+
+    def json(self):
+        return {"error": {"code": self.status_code, "message": "error", "status": "ERROR"}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def failing_once(error, result="ok"):
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) == 1:
+            raise error
+        return result
+    return func, calls
+
+
+def make_client():
+    return QuotaClient(read_per_minute=6000, write_per_minute=6000, max_retries=3, sleep=lambda seconds: None)
+
+
+def test_token_bucket_allows_burst_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(per_minute=60, burst=2, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(1.0)
+    assert bucket.acquire() == pytest.approx(1.0)
+    assert clock.sleeps == pytest.approx([1.0, 1.0])
+
+
+def test_token_bucket_refills_while_idle():
+    clock = FakeClock()
+    bucket = TokenBucket(per_minute=60, burst=2, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 10
+    # 閒置期間最多累積 burst 個 token
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("error", [APIError(FakeResponse(429)), APIError(FakeResponse(503)),
+                                   Timeout(), RequestsConnectionError()],
+                         ids=["429", "503", "timeout", "connection"])
+def test_reads_retry_transient_errors(error):
+    client = make_client()
+    func, calls = failing_once(error)
+
+    assert client.call(READ, func) == "ok"
+    assert len(calls) == 2
+    assert client.retries == 1
+
+
+def test_writes_retry_rate_limit():
+    client = make_client()
+    func, calls = failing_once(APIError(FakeResponse(429)))
+
+    assert client.call(WRITE, func) == "ok"
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("error", [APIError(FakeResponse(500)), APIError(FakeResponse(503)),
+                                   Timeout(), RequestsConnectionError()],
+                         ids=["500", "503", "timeout", "connection"])
+def test_writes_do_not_retry_ambiguous_errors(error):
+    # 請求可能已寫入：重試 append_rows 會產生重複列，交由呼叫端（日誌補送）處理
+    client = make_client()
+    func, calls = failing_once(error)
+
+    with pytest.raises(type(error)):
+        client.call(WRITE, func)
+    assert len(calls) == 1
+    assert client.retries == 0
+    assert client.failures == 1
+
+
+def test_non_retryable_read_error_is_raised_immediately():
+    client = make_client()
+    func, calls = failing_once(APIError(FakeResponse(400)))
+
+    with pytest.raises(APIError):
+        client.call(READ, func)
+    assert len(calls) == 1
+
+
+def test_retries_stop_after_max_retries():
+    client = make_client()
+    calls = []
+
+    def always_busy():
+        calls.append(1)
+        raise APIError(FakeResponse(429))
+
+    with pytest.raises(APIError):
+        client.call(WRITE, always_busy)
+    assert len(calls) == client.max_retries + 1
+
+
+def test_concurrent_identical_reads_are_coalesced():
+    client = make_client()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_read():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ["row"]
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(client.call(READ, slow_read, coalesce_key="k")))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(client.call(READ, slow_read, coalesce_key="k")))
+    follower.start()
+    # 等待跟隨者加入同一個進行中的呼叫後才放行
+    deadline = time.monotonic() + 5
+    while client.coalesced == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert results == [["row"], ["row"]]
+    assert len(calls) == 1
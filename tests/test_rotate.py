@@ -0,0 +1,52 @@
+"""年度輪替：歸檔寫入後刪除工作表失敗，重新執行不重複歸檔"""
+import pytest
+
+from admin_cli import rotate_year, rotation_marker_path, year_archive_path
+from columnar import load_parquet
+from schema import RECORD_ID_FIELD
+from storage import MemoryBackend
+
+# 舊工作表沒有紀錄ID欄位
+OLD_HEADERS = ["稽核日期", "稽核者單位"]
+NEW_HEADERS = [RECORD_ID_FIELD, "稽核日期", "稽核者單位"]
+
+
+class QuotaError(Exception):
+    pass
+
+
+@pytest.fixture
+def backend():
+    backend = MemoryBackend()
+    backend.append_rows("2024年1月", [["2024-01-05", "內科"], ["2024-01-05", "內科"]], OLD_HEADERS)
+    backend.append_rows("2024年2月", [["a", "2024-02-01", "外科"]], NEW_HEADERS)
+    return backend
+
+
+def test_rotate_again_after_failed_delete(backend, tmp_path, monkeypatch):
+    titles = ["2024年1月", "2024年2月"]
+    real_delete = backend.delete_partitions
+
+    def fail_delete(names):
+        raise QuotaError()
+
+    monkeypatch.setattr(backend, "delete_partitions", fail_delete)
+    with pytest.raises(QuotaError):
+        rotate_year(backend, 2024, titles, str(tmp_path))
+    monkeypatch.setattr(backend, "delete_partitions", real_delete)
+
+    # 刪除失敗後又有新資料寫入
+    backend.append_rows("2024年1月", [["2024-01-31", "內科"]])
+    path, moved, total = rotate_year(backend, 2024, titles, str(tmp_path))
+
+    assert (moved, total) == (1, 4)
+    archive = load_parquet(path)
+    assert archive[RECORD_ID_FIELD].tolist().count("a") == 1
+    assert backend.list_partitions() == []
+    assert not (tmp_path / rotation_marker_path(year_archive_path("", 2024))).exists()
+
+
+def test_rotate_merges_into_existing_archive(backend, tmp_path):
+    rotate_year(backend, 2024, ["2024年1月"], str(tmp_path))
+    _, moved, total = rotate_year(backend, 2024, ["2024年2月"], str(tmp_path))
+    assert (moved, total) == (1, 3)
@@ -0,0 +1,62 @@
+"""SQLite 後端：同一個檔案由多個程序（App 與管理工具）共用時，分區清單保持一致"""
+import pytest
+
+from schema import RECORD_ID_FIELD
+from storage import SQLiteBackend
+
+HEADERS = [RECORD_ID_FIELD, "單位"]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "audit.sqlite3")
+
+
+def test_partition_created_elsewhere_is_listed(path):
+    app = SQLiteBackend(path).open()
+    app.append_rows("2026年1月", [["a", "內科"]], headers=HEADERS)
+
+    SQLiteBackend(path).append_rows("2026年2月", [["b", "外科"]], headers=HEADERS)
+
+    assert app.list_partitions() == ["2026年1月", "2026年2月"]
+    assert app.headers("2026年2月") == HEADERS
+    app.append_rows("2026年2月", [["c", "外科"]])
+    assert app.column_values("2026年2月", RECORD_ID_FIELD) == ["b", "c"]
+
+
+def test_append_after_delete_elsewhere_leaves_no_orphans(path):
+    app = SQLiteBackend(path).open()
+    app.append_rows("2026年2月", [["a", "內科"]], headers=HEADERS)
+
+    assert SQLiteBackend(path).delete_partitions(["2026年2月"]) == ["2026年2月"]
+
+    assert app.list_partitions() == []
+    with pytest.raises(KeyError):
+        app.append_rows("2026年2月", [["b", "內科"]])
+    assert app.row_count("2026年2月") == 0
+
+
+def test_failed_delete_rolls_back(path, monkeypatch):
+    backend = SQLiteBackend(path).open()
+    backend.append_rows("2026年1月", [["a", "內科"]], headers=HEADERS)
+
+    class Boom(Exception):
+        pass
+
+    real_conn = backend._conn
+
+    class FailingConn:
+        def execute(self, sql, *args):
+            if sql.startswith("DELETE FROM partitions"):
+                raise Boom()
+            return real_conn.execute(sql, *args)
+
+    monkeypatch.setattr(backend, "_conn", FailingConn())
+    with pytest.raises(Boom):
+        backend.delete_partition("2026年1月")
+    monkeypatch.setattr(backend, "_conn", real_conn)
+
+    assert not real_conn.in_transaction
+    assert backend.row_count("2026年1月") == 1
+    backend.append_rows("2026年1月", [["b", "內科"]])
+    assert backend.row_count("2026年1月") == 2
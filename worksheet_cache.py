@@ -0,0 +1,153 @@
+"""月份工作表 handle 快取：每個程序只讀取一次試算表 metadata"""
+import datetime
+import re
+import threading
+
+import metrics
+
+# 新建月份工作表的預設大小
+NEW_SHEET_ROWS = 1000
+NEW_SHEET_COLS = 20
+
+
+_MONTH_SHEET_PATTERN = re.compile(r"^(\d{4})年(\d{1,2})月$")
+_MONTH_LABEL_PATTERN = re.compile(r"^(\d{1,2})月$")
+
+
+def month_sheet_name(year, audit_month):
+    """月份工作表名稱，例如：2026年1月"""
+    return f"{year}年{audit_month}"
+
+
+def partition_year(audit_date, audit_month):
+    """稽核月份所屬的年度：稽核日期當月或之前最近的該月份
+
+    例如 2027-01-05 輸入的「12月」稽核屬於 2026 年。audit_date 可為 date 或「YYYY-MM-DD」字串。
+    """
+    if isinstance(audit_date, str):
+        audit_date = datetime.date.fromisoformat(audit_date[:10])
+    match = _MONTH_LABEL_PATTERN.match(str(audit_month))
+    if match is not None and int(match.group(1)) > audit_date.month:
+        return audit_date.year - 1
+    return audit_date.year
+
+
+def month_partition(audit_date, audit_month):
+    """記錄所屬的月份工作表名稱（年度由稽核日期決定，見 partition_year）"""
+    return month_sheet_name(partition_year(audit_date, audit_month), audit_month)
+
+
+def parse_month_sheet_name(sheet_name):
+    """「2026年1月」-> (2026, 1)；不是月份工作表時回傳 None"""
+    match = _MONTH_SHEET_PATTERN.match(sheet_name)
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+class WorksheetCache:
+    """以工作表名稱為 key 的 Worksheet handle 快取
+
+    第一次使用時以一次 spreadsheet.worksheets() 載入所有工作表，
+    之後的查詢直接命中快取；建立缺少的工作表時以 lock 保護，
+    避免多個 session 同時呼叫 add_worksheet 產生重複工作表。
+    重新讀取 metadata 後仍不存在的名稱也會記住，直到 invalidate() 或建立該工作表為止。
+    """
+
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+        self._handles = {}
+        self._missing = set()     # 已確認不存在的工作表名稱
+        self._bootstrapped = False
+        self._lock = threading.Lock()
+
+        # 統計
+        self.hits = 0
+        self.metadata_calls = 0
+        self.created = 0
+        self.invalidations = 0
+
+    @metrics.timed("worksheet_lookup")
+    def get(self, sheet_name, headers=None, create=True, rows=None):
+        """取得工作表；不存在且 create=True 時以 rows 列（預設 NEW_SHEET_ROWS）建立並寫入標題列"""
+        worksheet = self._handles.get(sheet_name)
+        if worksheet is not None and self._bootstrapped:
+            self.hits += 1
+            return worksheet
+
+        with self._lock:
+            if not self._bootstrapped:
+                self._reload()
+            elif sheet_name in self._handles or sheet_name in self._missing:
+                self.hits += 1
+            else:
+                # 可能已由其他程序建立，重新讀取一次 metadata
+                self._reload()
+
+            worksheet = self._handles.get(sheet_name)
+            if worksheet is None:
+                if create:
+                    worksheet = self._create(sheet_name, headers, rows or NEW_SHEET_ROWS)
+                else:
+                    self._missing.add(sheet_name)
+            return worksheet
+
+    def titles(self):
+        """目前快取中的所有工作表名稱"""
+        with self._lock:
+            if not self._bootstrapped:
+                self._reload()
+            return list(self._handles)
+
+    def invalidate(self, sheet_name=None):
+        """清除單一工作表或全部快取，下次查詢時重新讀取 metadata"""
+        with self._lock:
+            self.invalidations += 1
+            if sheet_name is None:
+                self._handles.clear()
+                self._missing.clear()
+                self._bootstrapped = False
+            else:
+                self._handles.pop(sheet_name, None)
+                self._missing.discard(sheet_name)
+
+    def stats(self):
+        return {
+            "cached_sheets": len(self._handles),
+            "missing_sheets": len(self._missing),
+            "hits": self.hits,
+            "metadata_calls": self.metadata_calls,
+            "metadata_calls_avoided": self.hits,
+            "created": self.created,
+            "invalidations": self.invalidations,
+        }
+
+    def _reload(self):
+        """以一次 API 呼叫讀取所有工作表（呼叫端需持有 lock）"""
+        self.metadata_calls += 1
+        self._handles = {ws.title: ws for ws in self.spreadsheet.worksheets()}
+        self._missing.difference_update(self._handles)
+        self._bootstrapped = True
+
+    def _create(self, sheet_name, headers, rows=NEW_SHEET_ROWS):
+        """建立工作表（呼叫端需持有 lock）"""
+        from gspread.exceptions import APIError
+
+        try:
+            worksheet = self.spreadsheet.add_worksheet(
+                title=sheet_name, rows=rows, cols=NEW_SHEET_COLS
+            )
+        except APIError:
+            # 其他程序剛好建立了同名工作表
+            self._reload()
+            worksheet = self._handles.get(sheet_name)
+            if worksheet is None:
+                raise
+            return worksheet
+
+        if headers:
+            worksheet.append_row(headers)
+        self.created += 1
+        self._handles[sheet_name] = worksheet
+        self._missing.discard(sheet_name)
+        return worksheet